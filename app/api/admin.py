@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from pydantic import BaseModel, Field
+from typing import Optional
+import logging
+
+from app.core.admission import admission_controller
+from app.core.profiling import profiling_state, list_profiles
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Create router
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+class ProfilingSettings(BaseModel):
+    enabled: bool
+    sample_rate: Optional[float] = Field(None, ge=0.0, le=1.0)
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Reject the request unless it carries the configured ADMIN_TOKEN."""
+    if not profiling_state.token or x_admin_token != profiling_state.token:
+        raise HTTPException(status_code=403, detail="Invalid or missing admin token")
+
+@router.get("/profiling", dependencies=[Depends(require_admin_token)])
+async def get_profiling():
+    """Return the profiling settings of this worker and the stored profiles."""
+    return {
+        "settings": profiling_state.as_dict(),
+        "profiles": list_profiles(profiling_state.directory),
+    }
+
+@router.put("/profiling", dependencies=[Depends(require_admin_token)])
+async def update_profiling(settings: ProfilingSettings):
+    """
+    Switch sampled profiling on or off for this worker.
+
+    Each uvicorn worker keeps its own setting; use PROFILING_ENABLED to enable it everywhere.
+    """
+    profiling_state.enabled = settings.enabled
+    if settings.sample_rate is not None:
+        profiling_state.sample_rate = settings.sample_rate
+    logger.info(f"Profiling {'enabled' if settings.enabled else 'disabled'} (sample rate {profiling_state.sample_rate})")
+    return {"settings": profiling_state.as_dict()}
+
+@router.get("/admission", dependencies=[Depends(require_admin_token)])
+async def get_admission():
+    """
+    Return the admission budgets of this worker with active and queued requests per class.
+
+    Counters (admitted, rejected, max_queued) are totals since the worker started.
+    """
+    return admission_controller.as_dict()
@@ -1,16 +1,25 @@
 from fastapi import APIRouter
-from app.api import mcp
-from app.api import ingestion
+import importlib
+import os
 
-api_router = APIRouter()
+# Worker role deciding which routers are mounted:
+#   api         - everything (default)
+#   mcp-only    - MCP tools only, no ingestion backends are imported
+#   ingest-only - ingestion endpoints only
+APP_ROLE = os.getenv("APP_ROLE", "api")
+
+ROLE_ROUTERS = {
+    "api": ["admin", "mcp", "ingestion", "content"],
+    "mcp-only": ["admin", "mcp"],
+    "ingest-only": ["admin", "ingestion"],
+}
 
-# Include MCP router
-api_router.include_router(mcp.router)
+if APP_ROLE not in ROLE_ROUTERS:
+    raise ValueError(f"Invalid APP_ROLE '{APP_ROLE}', expected one of: {', '.join(ROLE_ROUTERS)}")
 
-# Include ingestion router
-api_router.include_router(ingestion.router)
+api_router = APIRouter()
 
-# Include content router (for content management endpoints)
-# Uncomment when content.py is fully implemented
-# from app.api import content
-# api_router.include_router(content.router) 
\ No newline at end of file
+# Include the routers for this role; modules are only imported when mounted
+for module_name in ROLE_ROUTERS[APP_ROLE]:
+    module = importlib.import_module(f"app.api.{module_name}")
+    api_router.include_router(module.router)
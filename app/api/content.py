@@ -1,12 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
 from datetime import date
+import logging
 
-from app.db.database import get_db_session
-from app.db.models import Content as ContentModel, Tag as TagModel
-from app.models.content import Content, ContentCreate, Tag, SearchParams, ListParams
+from app.db.database import get_db_session, get_read_db_session, async_read_session
+from app.db import crud, reads
+from app.db.bulk_import import import_ndjson
+from app.db.export import EXPORT_FORMATS, check_format, export_content
+from app.db.stats import list_tag_counts
+from app.models.content import Content, ContentCreate, TagWithCount, BulkImportResponse
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/content", tags=["content"])
 
@@ -15,8 +21,65 @@ async def create_content(content: ContentCreate, db: AsyncSession = Depends(get_
     """
     Create new content entry.
     """
-    # TODO: Implement content creation with tag handling
-    return {"message": "Content creation endpoint - to be implemented"}
+    row = await crud.create_content(db, content)
+    return crud.content_to_dict(row, raw_content=content.raw_content)
+
+@router.post("/bulk", response_model=BulkImportResponse)
+async def bulk_import_content(request: Request, db: AsyncSession = Depends(get_db_session)):
+    """
+    Import content from an NDJSON body (application/x-ndjson), one ContentCreate per line.
+
+    The body is read and validated as it arrives and written in batches of
+    CONTENT_IMPORT_BATCH_SIZE through COPY, one transaction per batch. Invalid lines
+    are skipped and reported by line number.
+    """
+    try:
+        report = await import_ndjson(db, request.stream())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error importing content: {str(e)}")
+    logger.info(f"Bulk import: {report.imported} imported, {report.failed} failed")
+    return report.as_dict()
+
+@router.get("/export")
+async def export_contents(
+    format: str = Query("ndjson", description="ndjson, parquet or arrow"),
+    source: Optional[str] = None,
+    tag: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    include_raw: bool = False,
+):
+    """
+    Stream content with tags as NDJSON, Parquet or an Arrow IPC stream.
+
+    Rows come from a server-side cursor on the read database and are encoded one
+    batch at a time, so the export size does not affect server memory.
+    """
+    try:
+        check_format(format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+    async def body():
+        # The session has to outlive the endpoint, so the stream opens its own
+        async with async_read_session() as db:
+            try:
+                async for chunk in export_content(
+                    db, format, source=source, tag=tag, start_date=start_date,
+                    end_date=end_date, include_raw=include_raw,
+                ):
+                    yield chunk
+            finally:
+                await db.rollback()
+
+    filename = f"content.{format}"
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 @router.get("/", response_model=List[Content])
 async def list_contents(
@@ -24,39 +87,65 @@ async def list_contents(
     tag: Optional[str] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    limit: int = Query(10, ge=1, le=100),
+    limit: int = Query(10, ge=1, le=1000),
     offset: int = Query(0, ge=0),
-    db: AsyncSession = Depends(get_db_session)
+    db: AsyncSession = Depends(get_read_db_session)
 ):
     """
-    List content with optional filtering.
+    List content with optional filtering, newest first.
+
+    Raw bodies are not included (raw_content is empty); get an entry by id for it.
     """
-    # TODO: Implement content listing with filtering
-    return [{"message": "Content listing endpoint - to be implemented"}]
+    try:
+        items = await reads.list_content(db, source, tag, start_date, end_date, limit, offset)
+    except Exception as e:
+        logger.error(f"Error listing content: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error listing content: {str(e)}")
+    # Rows are encoded directly; validating them through the response model would cost more than the query
+    return Response(content=reads.dumps(items), media_type="application/json")
 
 @router.get("/{content_id}", response_model=Content)
-async def get_content(content_id: int, db: AsyncSession = Depends(get_db_session)):
+async def get_content(
+    content_id: int,
+    content_date: Optional[date] = Query(None, alias="date", description="Entry date; narrows the lookup to one partition"),
+    db: AsyncSession = Depends(get_read_db_session)
+):
     """
-    Get a specific content entry by ID.
+    Get a specific content entry by ID, including the full raw body.
     """
-    # TODO: Implement content retrieval
-    return {"message": f"Get content {content_id} - to be implemented"}
+    # The raw body is only fetched from the blob store here, never for listings
+    item = await reads.get_content(db, content_id, content_date)
+    if item is None:
+        raise HTTPException(status_code=404, detail=f"Content {content_id} not found")
+    return Response(content=reads.dumps(item), media_type="application/json")
 
 @router.put("/{content_id}", response_model=Content)
-async def update_content(content_id: int, content: ContentCreate, db: AsyncSession = Depends(get_db_session)):
+async def update_content(
+    content_id: int,
+    content: ContentCreate,
+    content_date: Optional[date] = Query(None, alias="date", description="Current entry date; narrows the lookup to one partition"),
+    db: AsyncSession = Depends(get_db_session)
+):
     """
-    Update a specific content entry.
+    Replace a specific content entry, including its tags.
     """
-    # TODO: Implement content update
-    return {"message": f"Update content {content_id} - to be implemented"}
+    row = await crud.update_content(db, content_id, content, content_date)
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Content {content_id} not found")
+    return crud.content_to_dict(row, raw_content=content.raw_content)
 
 @router.delete("/{content_id}")
-async def delete_content(content_id: int, db: AsyncSession = Depends(get_db_session)):
+async def delete_content(
+    content_id: int,
+    content_date: Optional[date] = Query(None, alias="date", description="Entry date; narrows the lookup to one partition"),
+    db: AsyncSession = Depends(get_db_session)
+):
     """
     Delete a specific content entry.
     """
-    # TODO: Implement content deletion
-    return {"message": f"Delete content {content_id} - to be implemented"}
+    if not await crud.delete_content(db, content_id, content_date):
+        raise HTTPException(status_code=404, detail=f"Content {content_id} not found")
+    return {"id": content_id, "deleted": True}
 
 @router.get("/search/", response_model=List[Content])
 async def search_content(
@@ -64,20 +153,25 @@ async def search_content(
     source: Optional[str] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    limit: int = Query(10, ge=1, le=100),
+    limit: int = Query(10, ge=1, le=1000),
     offset: int = Query(0, ge=0),
-    db: AsyncSession = Depends(get_db_session)
+    db: AsyncSession = Depends(get_read_db_session)
 ):
     """
-    Search content by keyword with optional filters.
+    Search content by keyword in titles and text, with optional filters, newest first.
     """
-    # TODO: Implement content search
-    return [{"message": f"Search for '{keyword}' - to be implemented"}]
+    try:
+        items = await reads.search_content(
+            db, keyword, source=source, start_date=start_date, end_date=end_date, limit=limit, offset=offset
+        )
+    except Exception as e:
+        logger.error(f"Error searching content: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error searching content: {str(e)}")
+    return Response(content=reads.dumps(items), media_type="application/json")
 
-@router.get("/tags/", response_model=List[Tag])
-async def list_tags(db: AsyncSession = Depends(get_db_session)):
+@router.get("/tags/", response_model=List[TagWithCount])
+async def list_tags(db: AsyncSession = Depends(get_read_db_session)):
     """
-    List all available tags.
+    List all available tags with their content counts, most used first.
     """
-    # TODO: Implement tag listing
-    return [{"message": "Tag listing endpoint - to be implemented"}] 
\ No newline at end of file
+    return await list_tag_counts(db) 
\ No newline at end of file
@@ -1,27 +1,31 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
+import asyncio
 import os
-import shutil
-import tempfile
 import logging
+import threading
 from datetime import datetime
 
 # Import database dependencies
 from app.db.database import get_db_session
-from app.db.models import Content as ContentModel, Tag as TagModel, content_tags
+from app.db.crud import create_content, create_contents, content_to_dict, get_source
 from app.models.content import ContentCreate, Content
+from app.ingestion.uploads import UploadError, receive_upload
 
-# Import ingestion modules
-from app.ingestion.web_scraper import WebScraper
-from app.ingestion.twitter import TwitterClient
-from app.ingestion.pdf_processor import PDFProcessor
+# Ingestion backends (playwright, tweepy, PyPDF2, bs4) are imported lazily inside
+# the endpoints so that importing this module stays cheap
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
+# Messages written per transaction by the mailbox import
+EMAIL_IMPORT_BATCH_SIZE = int(os.getenv("EMAIL_IMPORT_BATCH_SIZE", "500"))
+# Largest mailbox upload accepted (mailboxes are usually far larger than single files)
+EMAIL_IMPORT_MAX_BYTES = int(os.getenv("EMAIL_IMPORT_MAX_BYTES", str(1024 * 1024 * 1024)))
+
 # Create router
 router = APIRouter(prefix="/ingestion", tags=["ingestion"])
 
@@ -29,7 +33,8 @@ router = APIRouter(prefix="/ingestion", tags=["ingestion"])
 class WebScrapeRequest(BaseModel):
     url: str
     source: str
-    selectors: Dict[str, str]
+    # One-off selectors; by default the source's extraction profile for the URL's domain is used
+    selectors: Optional[Dict[str, str]] = None
     tags: List[str] = []
     
 class TwitterRequest(BaseModel):
@@ -45,6 +50,23 @@ class EmailRequest(BaseModel):
     date: Optional[str] = None
     tags: List[str] = []
 
+class MailboxImportResponse(BaseModel):
+    imported: int
+    failed: int
+    errors: List[str] = []
+
+def _truncate(text: Optional[str], length: int = 100) -> Optional[str]:
+    """Shorten long text for API responses."""
+    if text is None or len(text) <= length:
+        return text
+    return text[:length] + "..."
+
+def _ingestion_response(content, content_create: ContentCreate) -> Dict[str, Any]:
+    """Build the response for a saved content entry with truncated bodies."""
+    response = content_to_dict(content, raw_content=_truncate(content_create.raw_content))
+    response["clean_content"] = _truncate(response["clean_content"])
+    return response
+
 # Endpoints for ingestion
 @router.post("/web-scrape", response_model=Content)
 async def ingest_web_content(
@@ -54,17 +76,36 @@ async def ingest_web_content(
 ):
     """
     Ingest content from a web page by scraping it.
+
+    Selectors, date format and render mode come from the source's extraction profile
+    for the URL's domain (see app/ingestion/profiles.py) unless selectors are given.
     """
     try:
-        # Initialize web scraper
-        scraper = WebScraper()
+        from app.ingestion.politeness import source_rate
+        from app.ingestion.profiles import profile_cache
         
         # Configure selectors
-        config = request.selectors
+        config = request.selectors or await profile_cache.get(db, request.source, request.url)
+        if not config:
+            raise HTTPException(
+                status_code=400,
+                detail=f"No selectors given and source '{request.source}' has no extraction profile for {request.url}"
+            )
+        
+        # Per-host request rate from the source's configuration, if it has one
+        source = await get_source(db, request.source)
+        rate = source_rate(source.config if source else None)
+        
+        # Initialize web scraper
+        from app.ingestion.web_scraper import WebScraper
+        scraper = WebScraper()
         
         # Scrape the URL
         # Note: This would be better as a background task, but for simplicity we'll do it synchronously
-        content_data = await scraper.scrape_url(request.url, config)
+        try:
+            content_data = await scraper.scrape_url(request.url, config, rate)
+        finally:
+            await scraper.close()
         
         # Add source and tags
         content_data["source"] = request.source
@@ -81,21 +122,14 @@ async def ingest_web_content(
             tags=request.tags
         )
         
-        # TODO: Save to database
-        # For now, return mock response
-        return {
-            "id": 1,
-            "source": content_create.source,
-            "raw_content": content_create.raw_content[:100] + "...",  # Truncate for response
-            "clean_content": content_create.clean_content[:100] + "..." if content_create.clean_content else None,
-            "title": content_create.title,
-            "url": content_create.url,
-            "date": content_create.date,
-            "metadata": content_create.metadata,
-            "created_at": datetime.now(),
-            "updated_at": datetime.now(),
-            "tags": [{"id": 1, "name": tag, "created_at": datetime.now()} for tag in request.tags]
-        }
+        # Save to database, with any date format the profile learned on the way
+        content = await create_content(db, content_create)
+        learned = await profile_cache.save_learned(db, [] if request.selectors else [config])
+        await db.commit()
+        profile_cache.mark_saved(learned)
+        return _ingestion_response(content, content_create)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error ingesting web content: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error ingesting web content: {str(e)}")
@@ -111,6 +145,7 @@ async def ingest_twitter_content(
     """
     try:
         # Initialize Twitter client
+        from app.ingestion.twitter import TwitterClient
         twitter_client = TwitterClient()
         
         tweets = []
@@ -125,9 +160,22 @@ async def ingest_twitter_content(
         else:
             raise HTTPException(status_code=400, detail="Invalid query type or missing query parameter")
             
-        # TODO: Save tweets to database
-        # For now, return the tweets
+        # Save tweets to database
+        for tweet in tweets:
+            content = await create_content(db, ContentCreate(
+                source=tweet["source"],
+                raw_content=tweet["raw_content"],
+                clean_content=tweet["clean_content"],
+                title=tweet.get("title"),
+                url=tweet.get("url"),
+                date=tweet.get("date") or datetime.now().date(),
+                metadata=tweet.get("metadata", {}),
+                tags=request.tags
+            ))
+            tweet["id"] = content.id
         return tweets
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error ingesting Twitter content: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error ingesting Twitter content: {str(e)}")
@@ -165,83 +213,188 @@ async def ingest_email_content(
             tags=request.tags
         )
         
-        # TODO: Save to database
-        # For now, return mock response
-        return {
-            "id": 1,
-            "source": content_create.source,
-            "raw_content": content_create.raw_content[:100] + "...",  # Truncate for response
-            "clean_content": content_create.clean_content[:100] + "...",
-            "title": content_create.title,
-            "url": content_create.url,
-            "date": content_create.date,
-            "metadata": content_create.metadata,
-            "created_at": datetime.now(),
-            "updated_at": datetime.now(),
-            "tags": [{"id": 1, "name": tag, "created_at": datetime.now()} for tag in request.tags]
-        }
+        # Save to database
+        content = await create_content(db, content_create)
+        return _ingestion_response(content, content_create)
     except Exception as e:
         logger.error(f"Error ingesting email content: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error ingesting email content: {str(e)}")
         
-@router.post("/pdf", response_model=Content)
+def _upload_form(default_source: str) -> Dict[str, Any]:
+    """OpenAPI description of an upload form that the endpoint reads from the request stream itself."""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": ["file"],
+                        "properties": {
+                            "file": {"type": "string", "format": "binary"},
+                            "source": {"type": "string", "default": default_source},
+                            "tags": {"type": "string", "default": "", "description": "Comma separated"},
+                        },
+                    }
+                }
+            },
+        }
+    }
+
+def _next_batch(items, size: int, stop: threading.Event) -> List[Dict[str, Any]]:
+    """Pull up to size items from an iterator (run in a worker thread); returns early once stop is set."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size or stop.is_set():
+            break
+    return batch
+
+@router.post("/mailbox", response_model=MailboxImportResponse, openapi_extra=_upload_form("Email"))
+async def ingest_mailbox(
+    request: Request,
+    db: AsyncSession = Depends(get_db_session)
+):
+    """
+    Import every message of an uploaded mbox file, EML message or zip archive of either.
+
+    The upload is read from the request stream (see app/ingestion/uploads.py); bodies
+    over EMAIL_IMPORT_MAX_BYTES are refused with 413. Messages are then parsed as a
+    stream in a worker thread and written in batches of EMAIL_IMPORT_BATCH_SIZE, one
+    transaction per batch. Messages that cannot be parsed are skipped and reported.
+    """
+    from app.ingestion.email_parser import MailboxParser
+    imported = 0
+    try:
+        async with receive_upload(request, max_bytes=EMAIL_IMPORT_MAX_BYTES) as upload:
+            parser = MailboxParser(source=upload.fields.get("source") or "Email")
+            tags = upload.fields.get("tags", "")
+            tag_list = [tag.strip() for tag in tags.split(",")] if tags else []
+            messages = parser.parse(upload.file, filename=upload.filename)
+            stop = threading.Event()
+            # Parsing is CPU-bound and runs in a worker thread, one batch ahead of the writes
+            next_batch = asyncio.ensure_future(asyncio.to_thread(_next_batch, messages, EMAIL_IMPORT_BATCH_SIZE, stop))
+            try:
+                while True:
+                    batch = await next_batch
+                    if not batch:
+                        break
+                    next_batch = asyncio.ensure_future(asyncio.to_thread(_next_batch, messages, EMAIL_IMPORT_BATCH_SIZE, stop))
+                    await create_contents(db, [
+                        ContentCreate(
+                            source=message["source"],
+                            raw_content=message["raw_content"],
+                            clean_content=message["clean_content"],
+                            title=message.get("title"),
+                            url=message.get("url"),
+                            date=message.get("date") or datetime.now().date(),
+                            metadata=message.get("metadata", {}),
+                            tags=tag_list
+                        )
+                        for message in batch
+                    ])
+                    await db.commit()
+                    # Committed rows are not needed any more; keep the session small
+                    db.expunge_all()
+                    imported += len(batch)
+            finally:
+                # Cancelling next_batch would not stop its thread, which would then read
+                # the upload after it is closed: tell the thread to stop and wait for it
+                stop.set()
+                if not next_batch.done():
+                    await asyncio.wait([next_batch])
+                if not next_batch.cancelled():
+                    next_batch.exception()
+                messages.close()
+        logger.info(f"Imported {imported} messages from {upload.filename} ({parser.failed} failed)")
+        return MailboxImportResponse(imported=imported, failed=parser.failed, errors=parser.errors)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except Exception as e:
+        # Database errors quote the whole batch; keep the message readable
+        message = _truncate(str(e), 500)
+        logger.error(f"Error importing mailbox after {imported} messages: {message}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error importing mailbox after {imported} messages: {message}"
+        )
+
+@router.post("/pdf", response_model=Content, openapi_extra=_upload_form("PDF"))
 async def ingest_pdf_content(
-    file: UploadFile = File(...),
-    source: str = Form("PDF"),
-    tags: str = Form(""),
+    request: Request,
     db: AsyncSession = Depends(get_db_session)
 ):
     """
     Ingest content from a PDF file.
+
+    The upload is streamed and hashed as it arrives (see app/ingestion/uploads.py);
+    bodies over UPLOAD_MAX_BYTES are refused with 413. The SHA-256 and size of the
+    file are stored in the metadata.
     """
     try:
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-            # Copy the uploaded file to the temporary file
-            shutil.copyfileobj(file.file, temp_file)
-            temp_file_path = temp_file.name
-            
-        # Process the PDF
-        pdf_processor = PDFProcessor()
-        content_data = pdf_processor.process_pdf(temp_file_path)
+        async with receive_upload(request) as upload:
+            # Process the PDF; parsing is CPU-bound and runs in a worker thread
+            from app.ingestion.pdf_processor import PDFProcessor
+            pdf_processor = PDFProcessor()
+            content_data = await asyncio.to_thread(pdf_processor.process_pdf, upload.file, file_name=upload.filename)
         
         # Parse tags
+        tags = upload.fields.get("tags", "")
         tag_list = []
         if tags:
             tag_list = [tag.strip() for tag in tags.split(",")]
+
+        metadata = content_data.get("metadata", {})
+        metadata.update({"sha256": upload.sha256, "file_size": upload.size})
             
         # Create ContentCreate object
         content_create = ContentCreate(
-            source=source,
+            source=upload.fields.get("source") or "PDF",
             raw_content=content_data["raw_content"],
             clean_content=content_data["clean_content"],
             title=content_data.get("title"),
-            url=file.filename,  # Use original filename as URL
+            url=upload.filename,  # Use original filename as URL
             date=datetime.now().date() if not content_data.get("date") else content_data.get("date"),
-            metadata=content_data.get("metadata", {}),
+            metadata=metadata,
             tags=tag_list
         )
         
-        # TODO: Save to database
-        # For now, return mock response
-        response = {
-            "id": 1,
-            "source": content_create.source,
-            "raw_content": content_create.raw_content[:100] + "...",  # Truncate for response
-            "clean_content": content_create.clean_content[:100] + "...",
-            "title": content_create.title,
-            "url": content_create.url,
-            "date": content_create.date,
-            "metadata": content_create.metadata,
-            "created_at": datetime.now(),
-            "updated_at": datetime.now(),
-            "tags": [{"id": 1, "name": tag, "created_at": datetime.now()} for tag in tag_list]
-        }
-        
-        # Clean up temporary file
-        os.unlink(temp_file_path)
-        
-        return response
+        # Save to database
+        content = await create_content(db, content_create)
+        return _ingestion_response(content, content_create)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         logger.error(f"Error ingesting PDF content: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error ingesting PDF content: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error ingesting PDF content: {str(e)}")
+
+@router.post("/discover", response_model=Dict[str, Dict[str, int]])
+async def discover_urls(
+    source: Optional[str] = None,
+    db: AsyncSession = Depends(get_db_session)
+):
+    """
+    Poll the feeds and sitemaps of web sources now and queue new article URLs.
+
+    Covers every active source with feeds in its config, or only the named one.
+    The queued URLs are scraped by the discovery loop (DISCOVERY_ENABLED) or
+    ``python -m app.ingestion.discovery crawl``.
+    """
+    try:
+        from app.ingestion.discovery import discover
+        return await discover(db, source)
+    except Exception as e:
+        logger.error(f"Error discovering URLs: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error discovering URLs: {str(e)}")
+
+@router.get("/frontier", response_model=Dict[str, int])
+async def get_frontier_stats(db: AsyncSession = Depends(get_db_session)):
+    """
+    Count discovered URLs by crawl status (queued, claimed, done, failed).
+    """
+    try:
+        from app.ingestion.discovery import frontier_stats
+        return await frontier_stats(db)
+    except Exception as e:
+        logger.error(f"Error getting frontier stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error getting frontier stats: {str(e)}")
@@ -1,10 +1,14 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
+from datetime import date
 import logging
 
 # Import database session
-from app.db.database import get_db_session
+from app.db.database import get_read_db_session
+from app.db.stats import content_stats
+from app.db.crud import get_summaries
+from app.db import reads
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # Setup logging
@@ -36,7 +40,9 @@ AVAILABLE_TOOLS = {
                 "keyword": {"type": "string", "description": "Search keyword"},
                 "start_date": {"type": "string", "description": "YYYY-MM-DD"},
                 "end_date": {"type": "string", "description": "YYYY-MM-DD"},
-                "source": {"type": "string", "description": "Filter by source (optional)"}
+                "source": {"type": "string", "description": "Filter by source (optional)"},
+                "tag": {"type": "string", "description": "Filter by tag (optional)"},
+                "limit": {"type": "integer", "description": "Number of results to return (default 10, max 100)"}
             },
             "required": ["keyword"]
         }
@@ -51,7 +57,36 @@ AVAILABLE_TOOLS = {
                 "tag": {"type": "string", "description": "Filter by tag (optional)"},
                 "start_date": {"type": "string", "description": "YYYY-MM-DD (optional)"},
                 "end_date": {"type": "string", "description": "YYYY-MM-DD (optional)"},
-                "limit": {"type": "integer", "description": "Number of results to return"}
+                "limit": {"type": "integer", "description": "Number of results to return (default 10, max 100)"}
+            }
+        }
+    },
+    "summarize_content": {
+        "name": "summarize_content",
+        "description": "Get precomputed extractive summaries of content by id, or a digest of the newest content in a date range.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "ids": {"type": "array", "items": {"type": "integer"}, "description": "Content ids (optional)"},
+                "start_date": {"type": "string", "description": "YYYY-MM-DD (optional, used without ids)"},
+                "end_date": {"type": "string", "description": "YYYY-MM-DD (optional, used without ids)"},
+                "source": {"type": "string", "description": "Filter by source (optional, used without ids)"},
+                "tag": {"type": "string", "description": "Filter by tag (optional, used without ids)"},
+                "limit": {"type": "integer", "description": "Number of documents for a date range (default 20, max 100)"},
+                "digest_sentences": {"type": "integer", "description": "Sentences in the multi-document digest (default 5)"}
+            }
+        }
+    },
+    "content_stats": {
+        "name": "content_stats",
+        "description": "Count content by source, day and tag, e.g. to see what is new.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "start_date": {"type": "string", "description": "YYYY-MM-DD (optional)"},
+                "end_date": {"type": "string", "description": "YYYY-MM-DD (optional)"},
+                "source": {"type": "string", "description": "Filter by source (optional)"},
+                "top_tags": {"type": "integer", "description": "Number of most used tags to return (default 10)"}
             }
         }
     }
@@ -65,7 +100,7 @@ async def get_tools():
 
 # Handle MCP call endpoint
 @router.post("/call", response_model=MCPResponse)
-async def handle_mcp_call(request: MCPRequest, db: AsyncSession = Depends(get_db_session)):
+async def handle_mcp_call(request: MCPRequest, db: AsyncSession = Depends(get_read_db_session)):
     """Handle an MCP tool call."""
     logger.info(f"Received MCP call: {request.method} with params: {request.params}")
     
@@ -79,6 +114,10 @@ async def handle_mcp_call(request: MCPRequest, db: AsyncSession = Depends(get_db
             result = await search_content_tool(request.params, db)
         elif request.method == "list_content":
             result = await list_content_tool(request.params, db)
+        elif request.method == "summarize_content":
+            result = await summarize_content_tool(request.params, db)
+        elif request.method == "content_stats":
+            result = await content_stats_tool(request.params, db)
         else:
             return MCPResponse(id=request.id, error=f"Method not implemented: {request.method}")
         
@@ -88,53 +127,93 @@ async def handle_mcp_call(request: MCPRequest, db: AsyncSession = Depends(get_db
         return MCPResponse(id=request.id, error=str(e))
 
 # Tool implementations
+def _date_param(params: Dict[str, Any], name: str) -> Optional[date]:
+    value = params.get(name)
+    return date.fromisoformat(value) if value else None
+
 async def search_content_tool(params: Dict[str, Any], db: AsyncSession):
     """
     Implement the search_content tool.
-    
-    This is a stub implementation. In a real application, this would query the database.
+
+    Matches the keyword in titles and clean text, newest first, through the
+    column-projected read path (app/db/reads.py); clean text is not returned.
     """
-    # TODO: Implement actual database query
     keyword = params.get("keyword", "")
-    source = params.get("source")
-    start_date = params.get("start_date")
-    end_date = params.get("end_date")
-    
-    # Mock response for now
+    items = await reads.search_content(
+        db,
+        keyword,
+        source=params.get("source"),
+        tag=params.get("tag"),
+        start_date=_date_param(params, "start_date"),
+        end_date=_date_param(params, "end_date"),
+        limit=min(int(params.get("limit", 10)), 100),
+        include_clean=False,
+    )
     return {
         "query": keyword,
-        "results": [
-            {
-                "id": 1,
-                "title": f"Article related to {keyword}",
-                "source": "WSJ",
-                "date": "2023-11-01"
-            }
-        ],
-        "total": 1
+        "results": [reads.tool_item(item) for item in items],
+        "total": len(items),
     }
 
 async def list_content_tool(params: Dict[str, Any], db: AsyncSession):
     """
     Implement the list_content tool.
-    
-    This is a stub implementation. In a real application, this would query the database.
+
+    Lists the newest content matching the filters, with tag names and summaries.
     """
-    # TODO: Implement actual database query
-    source = params.get("source")
-    tag = params.get("tag")
-    limit = params.get("limit", 10)
-    
-    # Mock response for now
+    items = await reads.list_content(
+        db,
+        source=params.get("source"),
+        tag=params.get("tag"),
+        start_date=_date_param(params, "start_date"),
+        end_date=_date_param(params, "end_date"),
+        limit=min(int(params.get("limit", 10)), 100),
+        include_clean=False,
+    )
     return {
-        "results": [
-            {
-                "id": 1,
-                "title": "Sample Article",
-                "source": source or "WSJ",
-                "date": "2023-11-01",
-                "tags": [tag] if tag else ["economics"]
-            }
-        ],
-        "total": 1
-    } 
\ No newline at end of file
+        "results": [reads.tool_item(item) for item in items],
+        "total": len(items),
+    }
+
+async def content_stats_tool(params: Dict[str, Any], db: AsyncSession):
+    """
+    Implement the content_stats tool.
+
+    Reads the incrementally maintained counters (app/db/stats.py), so the cost depends
+    on the number of sources, days and tags rather than on the amount of content.
+    """
+    return await content_stats(
+        db,
+        start_date=_date_param(params, "start_date"),
+        end_date=_date_param(params, "end_date"),
+        source=params.get("source"),
+        top_tags=int(params.get("top_tags", 10)),
+    )
+
+async def summarize_content_tool(params: Dict[str, Any], db: AsyncSession):
+    """
+    Implement the summarize_content tool.
+
+    Summaries are computed at ingestion (app/ingestion/summarizer.py) and only read
+    here. With more than one document the response also has a digest: the most
+    central sentences across their summaries, without near-duplicates.
+    """
+    from app.ingestion.summarizer import digest
+
+    ids = params.get("ids") or ([params["id"]] if params.get("id") is not None else [])
+    items = await get_summaries(
+        db,
+        content_ids=[int(content_id) for content_id in ids][:100],
+        start_date=_date_param(params, "start_date"),
+        end_date=_date_param(params, "end_date"),
+        source=params.get("source"),
+        tag=params.get("tag"),
+        limit=min(int(params.get("limit", 20)), 100),
+    )
+    result = {
+        "results": [{**item, "date": item["date"].isoformat()} for item in items],
+        "total": len(items),
+    }
+    if len(items) > 1:
+        result["digest"] = digest([item["summary"] for item in items], int(params.get("digest_sentences", 5)))
+    return result
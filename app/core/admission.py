@@ -0,0 +1,247 @@
+"""
+Admission control for the request types that compete for a worker.
+
+Requests are sorted into classes by method and path (ADMISSION_RULES): ``mcp`` for
+MCP tool calls and content reads, and one class per kind of ingestion (``scrape``,
+``pdf``, ``email``, ``twitter``, ``bulk``, ``discovery``). Other requests (health,
+admin, single-entry writes) are not counted.
+
+- At most ADMISSION_CAPACITY counted requests run at once in a worker.
+- ADMISSION_MCP_RESERVED of those slots are kept for MCP. Ingestion classes
+  together use at most capacity minus reserved, and each class also has its own
+  limit (ADMISSION_INGEST_LIMITS).
+- MCP requests wait for a slot in a queue of up to ADMISSION_MCP_QUEUE, for at most
+  ADMISSION_QUEUE_TIMEOUT_SECONDS. Ingestion requests wait only if
+  ADMISSION_INGEST_QUEUE allows it (by default they never wait).
+- A request that cannot be admitted gets 429 with a Retry-After of about one
+  typical request of its class. Freed slots go to waiting MCP requests first.
+
+State and counters are per worker process; ``GET /api/admin/admission`` returns them.
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# Settings are read at import; load .env first when imported on its own
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+ADMISSION_CAPACITY = int(os.getenv("ADMISSION_CAPACITY", "64"))
+ADMISSION_MCP_RESERVED = int(os.getenv("ADMISSION_MCP_RESERVED", "16"))
+ADMISSION_MCP_QUEUE = int(os.getenv("ADMISSION_MCP_QUEUE", "128"))
+ADMISSION_INGEST_QUEUE = int(os.getenv("ADMISSION_INGEST_QUEUE", "0"))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "5"))
+# Concurrent requests per ingestion class, e.g. "scrape=8,pdf=4"; unlisted classes keep the defaults
+DEFAULT_INGEST_LIMITS = {"scrape": 8, "pdf": 4, "email": 4, "twitter": 2, "bulk": 2, "discovery": 1}
+
+# (method or "*", path prefix, class); the first match wins
+ADMISSION_RULES: List[Tuple[str, str, str]] = [
+    ("GET", "/api/content/export", "bulk"),
+    ("POST", "/api/content/bulk", "bulk"),
+    ("GET", "/api/content", "mcp"),
+    ("*", "/api/mcp", "mcp"),
+    ("POST", "/api/ingestion/web-scrape", "scrape"),
+    ("POST", "/api/ingestion/pdf", "pdf"),
+    ("POST", "/api/ingestion/email", "email"),
+    ("POST", "/api/ingestion/mailbox", "email"),
+    ("POST", "/api/ingestion/twitter", "twitter"),
+    ("POST", "/api/ingestion/discover", "discovery"),
+]
+
+def parse_limits(value: str) -> Dict[str, int]:
+    """Parse "name=limit,..." over DEFAULT_INGEST_LIMITS."""
+    limits = dict(DEFAULT_INGEST_LIMITS)
+    for item in value.split(","):
+        if "=" in item:
+            name, limit = item.split("=", 1)
+            limits[name.strip()] = int(limit)
+    return limits
+
+class Rejected(Exception):
+    """The request was not admitted"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class RequestClass:
+    """Budget, queue and counters of one class of requests"""
+
+    def __init__(self, name: str, limit: int, queue: int, ingest: bool):
+        self.name = name
+        self.limit = limit
+        self.queue = queue
+        self.ingest = ingest
+        self.active = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.rejected = 0
+        self.max_queued = 0
+        # Moving average of request durations, for Retry-After
+        self.mean_seconds = 1.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": len(self.waiters),
+            "queue_limit": self.queue,
+            "max_queued": self.max_queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "mean_seconds": round(self.mean_seconds, 3),
+        }
+
+class AdmissionController:
+    """Slots of one worker process, shared by AdmissionMiddleware and the admin endpoint."""
+
+    def __init__(
+        self,
+        capacity: int = ADMISSION_CAPACITY,
+        mcp_reserved: int = ADMISSION_MCP_RESERVED,
+        mcp_queue: int = ADMISSION_MCP_QUEUE,
+        ingest_limits: Optional[Dict[str, int]] = None,
+        ingest_queue: int = ADMISSION_INGEST_QUEUE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    ):
+        self.capacity = capacity
+        self.mcp_reserved = min(mcp_reserved, capacity)
+        self.queue_timeout = queue_timeout
+        if ingest_limits is None:
+            ingest_limits = parse_limits(os.getenv("ADMISSION_INGEST_LIMITS", ""))
+        # MCP first: freed slots are handed out in this order
+        self.classes: Dict[str, RequestClass] = {"mcp": RequestClass("mcp", capacity, mcp_queue, ingest=False)}
+        for name, limit in ingest_limits.items():
+            self.classes[name] = RequestClass(name, limit, ingest_queue, ingest=True)
+        self.active = 0
+        self.ingest_active = 0
+
+    def classify(self, method: str, path: str) -> Optional[RequestClass]:
+        for rule_method, prefix, name in ADMISSION_RULES:
+            if (rule_method == "*" or rule_method == method) and path.startswith(prefix):
+                return self.classes.get(name)
+        return None
+
+    def _can_admit(self, request_class: RequestClass) -> bool:
+        if self.active >= self.capacity or request_class.active >= request_class.limit:
+            return False
+        return not request_class.ingest or self.ingest_active < self.capacity - self.mcp_reserved
+
+    def _admit(self, request_class: RequestClass):
+        request_class.active += 1
+        request_class.admitted += 1
+        self.active += 1
+        if request_class.ingest:
+            self.ingest_active += 1
+
+    def _reject(self, request_class: RequestClass) -> Rejected:
+        request_class.rejected += 1
+        return Rejected(min(max(math.ceil(request_class.mean_seconds), 1), 60))
+
+    async def acquire(self, request_class: RequestClass):
+        """
+        Take a slot for a request of request_class, waiting in its queue if allowed.
+
+        Raises:
+            Rejected: If the class is over budget and its queue is full or the wait timed out
+        """
+        if not request_class.waiters and self._can_admit(request_class):
+            self._admit(request_class)
+            return
+        if len(request_class.waiters) >= request_class.queue:
+            raise self._reject(request_class)
+
+        waiter = asyncio.get_running_loop().create_future()
+        request_class.waiters.append(waiter)
+        request_class.max_queued = max(request_class.max_queued, len(request_class.waiters))
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done():
+                # The slot was handed over just as the wait ended
+                if isinstance(e, asyncio.CancelledError):
+                    self.release(request_class)
+                    raise
+                return
+            waiter.cancel()
+            request_class.waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise self._reject(request_class)
+
+    def release(self, request_class: RequestClass, seconds: Optional[float] = None):
+        """Give back a slot and hand freed slots to waiting requests, MCP first."""
+        request_class.active -= 1
+        self.active -= 1
+        if request_class.ingest:
+            self.ingest_active -= 1
+        if seconds is not None:
+            request_class.mean_seconds += (seconds - request_class.mean_seconds) * 0.1
+        for waiting in self.classes.values():
+            while waiting.waiters and self._can_admit(waiting):
+                # The slot is taken on the waiter's behalf before it wakes up
+                self._admit(waiting)
+                waiting.waiters.popleft().set_result(True)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "enabled": ADMISSION_ENABLED,
+            "capacity": self.capacity,
+            "mcp_reserved": self.mcp_reserved,
+            "active": self.active,
+            "ingest_active": self.ingest_active,
+            "queued": sum(len(request_class.waiters) for request_class in self.classes.values()),
+            "classes": {name: request_class.as_dict() for name, request_class in self.classes.items()},
+        }
+
+admission_controller = AdmissionController()
+
+class AdmissionMiddleware:
+    """ASGI middleware that admits counted requests through an AdmissionController."""
+
+    def __init__(self, app, controller: AdmissionController = admission_controller):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ADMISSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        request_class = self.controller.classify(scope["method"], scope["path"])
+        if request_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.controller.acquire(request_class)
+        except Rejected as e:
+            logger.debug(f"Rejected {scope['method']} {scope['path']} ({request_class.name}), retry after {e.retry_after}s")
+            await self._too_many_requests(send, request_class.name, e.retry_after)
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(request_class, time.perf_counter() - started)
+
+    async def _too_many_requests(self, send, name: str, retry_after: int):
+        body = json.dumps({"detail": f"Too many concurrent {name} requests, retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
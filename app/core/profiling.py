@@ -0,0 +1,272 @@
+"""
+On-demand per-request profiling.
+
+A request is profiled when it carries ``X-Profile: <ADMIN_TOKEN>``, or when profiling
+has been switched on (PROFILING_ENABLED or PUT /api/admin/profiling) and the request
+is picked by the sample rate. While a profiled request runs, a sampler thread records
+two statistical profiles:
+
+- wall: where the request is at each tick, including time suspended in ``await``
+  (database round-trips, browser calls) and time spent waiting for a busy event loop
+- cpu: only the ticks where the request's own code is running on the event loop thread
+
+Each profile is written as Brendan Gregg "folded" stacks (``*.wall.folded``,
+``*.cpu.folded``, ready for flamegraph.pl or speedscope) plus a ``*.json`` summary into
+PROFILING_DIR, keeping only the newest PROFILING_MAX_PROFILES profiles.
+
+When profiling is off and no ADMIN_TOKEN is configured, the middleware is a single
+attribute check per request.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from dotenv import load_dotenv
+
+# Settings are read at import; load .env first when imported on its own
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Frames from these files are idle event loop frames
+_IDLE_FILES = ("selectors.py",)
+_IDLE_FUNCTIONS = ("select", "poll", "_run_once")
+
+class ProfilingState:
+    """Runtime profiling settings, shared by the middleware and the admin endpoints."""
+
+    def __init__(self):
+        self.enabled = os.getenv("PROFILING_ENABLED", "False").lower() in ("1", "true", "yes")
+        self.sample_rate = float(os.getenv("PROFILING_SAMPLE_RATE", "0.01"))
+        self.token = os.getenv("ADMIN_TOKEN") or None
+        self.directory = os.getenv("PROFILING_DIR", os.path.join(tempfile.gettempdir(), "mcp-profiles"))
+        self.max_profiles = int(os.getenv("PROFILING_MAX_PROFILES", "50"))
+        self.interval = float(os.getenv("PROFILING_INTERVAL_MS", "5")) / 1000.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "directory": self.directory,
+            "max_profiles": self.max_profiles,
+            "interval_ms": self.interval * 1000.0,
+        }
+
+profiling_state = ProfilingState()
+
+def _frame_label(frame) -> str:
+    """Label a frame as 'function (file:line)' without characters that break folded stacks."""
+    code = frame.f_code
+    filename = code.co_filename
+    for marker in ("site-packages" + os.sep, os.getcwd() + os.sep):
+        index = filename.find(marker)
+        if index != -1:
+            filename = filename[index + len(marker):]
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+def _thread_stack(frame) -> List[Any]:
+    """Return the frames of a thread stack from the outermost to the innermost."""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+def _await_chain(coro) -> Tuple[List[Any], Any]:
+    """
+    Follow a coroutine's await chain.
+
+    Returns:
+        The frames from the outermost to the innermost coroutine, and the non-coroutine
+        object the innermost one is suspended on (e.g. a future), if any
+    """
+    frames = []
+    obj = coro
+    while obj is not None:
+        frame = getattr(obj, "cr_frame", None) or getattr(obj, "gi_frame", None) or getattr(obj, "ag_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        if hasattr(obj, "cr_await"):
+            awaited = obj.cr_await
+        else:
+            awaited = getattr(obj, "gi_yieldfrom", None)
+        if awaited is None or not any(hasattr(awaited, attr) for attr in ("cr_frame", "gi_frame", "ag_frame")):
+            return frames, awaited
+        obj = awaited
+    return frames, None
+
+class RequestSampler:
+    """Sample one asyncio task from a background thread at a fixed interval."""
+
+    def __init__(self, task: asyncio.Task, thread_id: int, interval: float):
+        self.task = task
+        self.thread_id = thread_id
+        self.interval = interval
+        self.wall: Counter = Counter()
+        self.cpu: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self._sample()
+            except Exception:
+                # Frames can disappear between reads; drop the tick
+                continue
+
+    def _sample(self):
+        coro = self.task.get_coro()
+        if coro is None or self.task.done():
+            return
+        self.samples += 1
+
+        if getattr(coro, "cr_running", False):
+            # The request is executing: take the real thread stack from the task's root coroutine down
+            frames = _thread_stack(sys._current_frames().get(self.thread_id))
+            root = getattr(coro, "cr_frame", None)
+            start = next((i for i, frame in enumerate(frames) if frame is root), 0)
+            stack = ";".join(_frame_label(frame) for frame in frames[start:])
+            self.wall[stack] += 1
+            self.cpu[stack] += 1
+            return
+
+        # The request is suspended: record its logical await stack
+        chain, awaited = _await_chain(coro)
+        labels = [_frame_label(frame) for frame in chain]
+        done = getattr(awaited, "done", None)
+        if callable(done) and done():
+            labels.append("[ready, waiting for event loop]")
+        elif self._loop_busy():
+            labels.append(f"[awaiting {type(awaited).__name__ if awaited is not None else 'io'}, loop busy]")
+        else:
+            labels.append(f"[awaiting {type(awaited).__name__ if awaited is not None else 'io'}]")
+        self.wall[";".join(labels)] += 1
+
+    def _loop_busy(self) -> bool:
+        """Whether the event loop thread is running other code rather than waiting for I/O."""
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return False
+        code = frame.f_code
+        return not (code.co_name in _IDLE_FUNCTIONS or code.co_filename.endswith(_IDLE_FILES))
+
+def _write_profile(directory: str, profile_id: str, sampler: RequestSampler, summary: Dict[str, Any], max_profiles: int):
+    """Write the folded stacks and summary, then trim the ring to max_profiles."""
+    os.makedirs(directory, exist_ok=True)
+    for kind, counts in (("wall", sampler.wall), ("cpu", sampler.cpu)):
+        with open(os.path.join(directory, f"{profile_id}.{kind}.folded"), "w") as f:
+            for stack, count in counts.most_common():
+                f.write(f"{stack} {count}\n")
+    with open(os.path.join(directory, f"{profile_id}.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+
+    # Profile ids start with a sortable timestamp, so the oldest sort first
+    profiles = sorted(name[:-len(".json")] for name in os.listdir(directory) if name.endswith(".json"))
+    for old_id in profiles[:max(0, len(profiles) - max_profiles)]:
+        for suffix in (".json", ".wall.folded", ".cpu.folded"):
+            try:
+                os.unlink(os.path.join(directory, old_id + suffix))
+            except FileNotFoundError:
+                pass
+
+def list_profiles(directory: str) -> List[Dict[str, Any]]:
+    """Return the summaries of stored profiles, newest first."""
+    if not os.path.isdir(directory):
+        return []
+    summaries = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                summaries.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return summaries
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles selected requests with RequestSampler."""
+
+    def __init__(self, app, state: ProfilingState = profiling_state):
+        self.app = app
+        self.state = state
+
+    async def __call__(self, scope, receive, send):
+        state = self.state
+        if scope["type"] != "http" or not (state.enabled or state.token):
+            await self.app(scope, receive, send)
+            return
+
+        forced = False
+        if state.token:
+            for name, value in scope.get("headers", []):
+                if name == b"x-profile":
+                    forced = value.decode("latin-1") == state.token
+                    break
+        if not forced and not (state.enabled and random.random() < state.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        await self._profile(scope, receive, send)
+
+    async def _profile(self, scope, receive, send):
+        state = self.state
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", scope.get("path", "")).strip("-")[:60] or "root"
+        profile_id = f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{scope.get('method', 'GET')}-{slug}"
+        status = {"code": None}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-profile-id", profile_id.encode("latin-1"))]
+            await send(message)
+
+        sampler = RequestSampler(asyncio.current_task(), threading.get_ident(), state.interval)
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            summary = {
+                "id": profile_id,
+                "method": scope.get("method"),
+                "path": scope.get("path"),
+                "status": status["code"],
+                "started_at": profile_id[:len("YYYYmmddTHHMMSSffffff")],
+                "wall_seconds": time.perf_counter() - wall_start,
+                # Includes other requests interleaved on the event loop thread
+                "loop_thread_cpu_seconds": time.thread_time() - cpu_start,
+                "samples": sampler.samples,
+                "interval_ms": state.interval * 1000.0,
+            }
+            try:
+                await asyncio.to_thread(
+                    _write_profile, state.directory, profile_id, sampler, summary, state.max_profiles
+                )
+            except OSError as e:
+                logger.error(f"Error writing profile {profile_id}: {str(e)}")
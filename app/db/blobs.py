@@ -0,0 +1,347 @@
+"""
+Content-addressed, zstd-compressed storage for raw content bodies.
+
+Bodies are keyed by the sha256 of their UTF-8 text, so identical bodies are stored once
+no matter how many ``content`` rows reference them. Two backends are available:
+
+- ``db`` (default): the ``content_blobs`` side table
+- ``disk``: one ``<hash>.zst`` file per body under BLOB_STORE_PATH
+
+A content row resolves its raw body as follows:
+
+- ``raw_hash`` set: the body is in the blob store
+- ``raw_hash`` NULL and ``raw_content`` set: legacy row not yet moved (see ``backfill``)
+- both NULL: the raw body is identical to ``clean_content`` and is not stored again
+
+Usage:
+    python -m app.db.blobs backfill [--batch-size 500]   # move legacy raw_content into blobs
+    python -m app.db.blobs stats                         # report storage savings
+    python -m app.db.blobs gc                            # delete unreferenced blobs (db backend)
+
+Inserting a blob that already exists touches it (``touched_at``), which also locks
+its row until the inserting transaction commits. ``collect_garbage`` only deletes
+blobs untouched for BLOB_GC_GRACE_SECONDS, so a blob reused by a content row that
+is not committed yet is never deleted under it.
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import zstandard
+from sqlalchemy import select, update, delete, func, exists, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Content as ContentModel, ContentBlob
+
+logger = logging.getLogger(__name__)
+
+BLOB_STORE = os.getenv("BLOB_STORE", "db")  # "db" or "disk"
+BLOB_STORE_PATH = os.getenv("BLOB_STORE_PATH", "data/blobs")
+BLOB_ZSTD_LEVEL = int(os.getenv("BLOB_ZSTD_LEVEL", "3"))
+# Blobs written or reused more recently than this are kept by garbage collection
+BLOB_GC_GRACE_SECONDS = int(os.getenv("BLOB_GC_GRACE_SECONDS", "3600"))
+
+# Batches larger than this are compressed in a worker thread
+_THREAD_THRESHOLD_BYTES = 256 * 1024
+
+CODEC = "zstd"
+
+def hash_text(text: str) -> str:
+    """Return the sha256 hex digest of a text's UTF-8 encoding."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def compress(data: bytes) -> bytes:
+    """Compress bytes with zstd."""
+    return zstandard.ZstdCompressor(level=BLOB_ZSTD_LEVEL).compress(data)
+
+def decompress(data: bytes, codec: str = CODEC) -> str:
+    """Decompress a blob back into text."""
+    if codec != CODEC:
+        raise ValueError(f"Unsupported blob codec: {codec}")
+    return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+
+def _encode(texts: Iterable[str]) -> Tuple[Dict[str, Dict], List[str]]:
+    """
+    Hash and compress texts, dropping duplicates within the batch.
+
+    Returns:
+        The blobs by hash, and the hash of each text in input order
+    """
+    blobs = {}
+    hashes = []
+    for text in texts:
+        raw = text.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        hashes.append(digest)
+        if digest not in blobs:
+            data = compress(raw)
+            blobs[digest] = {
+                "hash": digest,
+                "codec": CODEC,
+                "data": data,
+                "size": len(raw),
+                "compressed_size": len(data),
+            }
+    return blobs, hashes
+
+async def _encode_async(texts: List[str]) -> Tuple[Dict[str, Dict], List[str]]:
+    if sum(len(text) for text in texts) > _THREAD_THRESHOLD_BYTES:
+        return await asyncio.to_thread(_encode, texts)
+    return _encode(texts)
+
+class DatabaseBlobStore:
+    """Blob store backed by the content_blobs table, written in the caller's transaction."""
+
+    async def put_many(self, db: AsyncSession, texts: List[str]) -> List[str]:
+        """
+        Store texts and return their hashes, in input order.
+
+        Args:
+            db: Session whose transaction the blobs are written in
+            texts: Texts to store
+
+        Returns:
+            The sha256 hash of each text
+        """
+        blobs, hashes = await _encode_async(texts)
+        if blobs:
+            # executemany form: one cached statement, sent in insertmanyvalues batches.
+            # Touching existing blobs locks them until commit and keeps them from GC;
+            # sorted by hash so that concurrent writers lock them in the same order.
+            await db.execute(
+                insert(ContentBlob).on_conflict_do_update(index_elements=["hash"], set_={"touched_at": func.now()}),
+                [blobs[digest] for digest in sorted(blobs)],
+            )
+        return hashes
+
+    async def put(self, db: AsyncSession, text: str) -> str:
+        return (await self.put_many(db, [text]))[0]
+
+    async def get_many(self, db: AsyncSession, hashes: List[str]) -> Dict[str, str]:
+        """Return the stored texts for the given hashes; unknown hashes are left out."""
+        if not hashes:
+            return {}
+        result = await db.execute(
+            select(ContentBlob.hash, ContentBlob.codec, ContentBlob.data).where(ContentBlob.hash.in_(set(hashes)))
+        )
+        return {row.hash: decompress(row.data, row.codec) for row in result}
+
+    async def get(self, db: AsyncSession, digest: str) -> Optional[str]:
+        return (await self.get_many(db, [digest])).get(digest)
+
+class DiskBlobStore:
+    """Blob store keeping one compressed file per hash under a directory."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:4], f"{digest}.zst")
+
+    def _write(self, blobs: Dict[str, Dict]):
+        for digest, blob in blobs.items():
+            path = self._path(digest)
+            if os.path.exists(path):
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so readers never see a partial file
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(blob["data"])
+            os.replace(tmp_path, path)
+
+    def _read(self, hashes: List[str]) -> Dict[str, str]:
+        texts = {}
+        for digest in set(hashes):
+            try:
+                with open(self._path(digest), "rb") as f:
+                    texts[digest] = decompress(f.read())
+            except FileNotFoundError:
+                continue
+        return texts
+
+    async def put_many(self, db: AsyncSession, texts: List[str]) -> List[str]:
+        blobs, hashes = await _encode_async(texts)
+        await asyncio.to_thread(self._write, blobs)
+        return hashes
+
+    async def put(self, db: AsyncSession, text: str) -> str:
+        return (await self.put_many(db, [text]))[0]
+
+    async def get_many(self, db: AsyncSession, hashes: List[str]) -> Dict[str, str]:
+        if not hashes:
+            return {}
+        return await asyncio.to_thread(self._read, hashes)
+
+    async def get(self, db: AsyncSession, digest: str) -> Optional[str]:
+        return (await self.get_many(db, [digest])).get(digest)
+
+def _create_blob_store():
+    if BLOB_STORE == "db":
+        return DatabaseBlobStore()
+    if BLOB_STORE == "disk":
+        return DiskBlobStore(BLOB_STORE_PATH)
+    raise ValueError(f"Invalid BLOB_STORE '{BLOB_STORE}', expected 'db' or 'disk'")
+
+blob_store = _create_blob_store()
+
+async def store_raw_content(db: AsyncSession, raw_content: Optional[str], clean_content: Optional[str]) -> Optional[str]:
+    """
+    Store a raw body unless it is identical to the clean text.
+
+    Returns:
+        The blob hash to put in Content.raw_hash, or None when nothing was stored
+    """
+    if not raw_content or raw_content == clean_content:
+        return None
+    return await blob_store.put(db, raw_content)
+
+async def load_raw_contents(db: AsyncSession, rows: List) -> Dict[int, Optional[str]]:
+    """
+    Resolve the raw bodies of several content rows.
+
+    Args:
+        db: Database session
+        rows: Objects with id, date, raw_hash and clean_content attributes (ORM objects or rows)
+
+    Returns:
+        Mapping of content id to raw body
+    """
+    texts = await blob_store.get_many(db, [row.raw_hash for row in rows if row.raw_hash])
+
+    # Rows created before the blob store still carry raw_content inline
+    legacy_keys = [(row.id, row.date) for row in rows if not row.raw_hash]
+    legacy = {}
+    if legacy_keys:
+        # Matching on the full (id, date) key lets Postgres skip unrelated partitions
+        result = await db.execute(
+            select(ContentModel.id, ContentModel.raw_content)
+            .where(tuple_(ContentModel.id, ContentModel.date).in_(legacy_keys))
+        )
+        legacy = {row.id: row.raw_content for row in result}
+
+    raw = {}
+    for row in rows:
+        if row.raw_hash:
+            raw[row.id] = texts.get(row.raw_hash)
+        else:
+            raw[row.id] = legacy.get(row.id) if legacy.get(row.id) is not None else row.clean_content
+    return raw
+
+async def load_raw_content(db: AsyncSession, row) -> Optional[str]:
+    """Resolve the raw body of a single content row."""
+    return (await load_raw_contents(db, [row]))[row.id]
+
+async def backfill(db: AsyncSession, batch_size: int = 500) -> int:
+    """
+    Move inline raw_content of legacy rows into the blob store, one batch per transaction.
+
+    Returns:
+        Number of rows moved
+    """
+    moved = 0
+    while True:
+        result = await db.execute(
+            select(ContentModel.id, ContentModel.date, ContentModel.raw_content, ContentModel.clean_content)
+            .where(ContentModel.raw_content.isnot(None), ContentModel.raw_hash.is_(None))
+            .limit(batch_size)
+        )
+        rows = result.all()
+        if not rows:
+            break
+        # One blob write for the batch; bodies identical to the clean text are not stored
+        stored = [row for row in rows if row.raw_content and row.raw_content != row.clean_content]
+        hashes = dict(zip(
+            (row.id for row in stored),
+            await blob_store.put_many(db, [row.raw_content for row in stored]) if stored else [],
+        ))
+        # ORM bulk UPDATE by primary key: one executemany
+        await db.execute(update(ContentModel), [
+            {"id": row.id, "date": row.date, "raw_hash": hashes.get(row.id), "raw_content": None}
+            for row in rows
+        ])
+        await db.commit()
+        moved += len(rows)
+        logger.info(f"Moved raw content of {moved} rows into the blob store")
+    return moved
+
+async def storage_stats(db: AsyncSession) -> Dict[str, int]:
+    """
+    Report how much space the blob store saves (db backend).
+
+    Returns:
+        Logical raw bytes referenced by content rows, bytes physically stored, and counts
+    """
+    logical = await db.execute(
+        select(func.count(ContentModel.id), func.coalesce(func.sum(ContentBlob.size), 0))
+        .select_from(ContentModel)
+        .join(ContentBlob, ContentBlob.hash == ContentModel.raw_hash)
+    )
+    referencing_rows, logical_bytes = logical.one()
+    stored = await db.execute(
+        select(
+            func.count(ContentBlob.hash),
+            func.coalesce(func.sum(ContentBlob.size), 0),
+            func.coalesce(func.sum(ContentBlob.compressed_size), 0),
+        )
+    )
+    blobs, unique_bytes, compressed_bytes = stored.one()
+    return {
+        "referencing_rows": referencing_rows,
+        "blobs": blobs,
+        "logical_bytes": int(logical_bytes),
+        "unique_bytes": int(unique_bytes),
+        "stored_bytes": int(compressed_bytes),
+    }
+
+async def collect_garbage(db: AsyncSession, grace_seconds: int = BLOB_GC_GRACE_SECONDS) -> int:
+    """
+    Delete blobs no content row references (db backend).
+
+    Blobs touched in the last grace_seconds are kept: an insert that reused one may
+    not have committed its content row yet. A blob whose reusing insert is still
+    open is locked; the delete waits for it and then sees the new touched_at.
+
+    Returns:
+        Number of blobs deleted
+    """
+    result = await db.execute(
+        delete(ContentBlob).where(
+            ContentBlob.touched_at < func.now() - timedelta(seconds=grace_seconds),
+            ~exists().where(ContentModel.raw_hash == ContentBlob.hash),
+        )
+    )
+    return result.rowcount
+
+async def _main(command: str, batch_size: int):
+    from app.db.database import async_session, engine
+
+    try:
+        async with async_session() as db:
+            if command == "backfill":
+                print(f"Moved {await backfill(db, batch_size)} rows")
+            elif command == "stats":
+                stats = await storage_stats(db)
+                saved = 1 - stats["stored_bytes"] / stats["logical_bytes"] if stats["logical_bytes"] else 0.0
+                for key, value in stats.items():
+                    print(f"{key}: {value}")
+                print(f"saved: {saved:.1%}")
+            elif command == "gc":
+                deleted = await collect_garbage(db)
+                await db.commit()
+                print(f"Deleted {deleted} unreferenced blobs")
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Manage the raw content blob store")
+    parser.add_argument("command", choices=["backfill", "stats", "gc"])
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(_main(args.command, args.batch_size))
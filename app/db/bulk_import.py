@@ -0,0 +1,305 @@
+"""
+Bulk import of content from NDJSON.
+
+Each line of the input is one ContentCreate record. Lines are validated as they are
+read, and valid records are written in batches: rows are loaded with COPY into a
+temporary staging table and merged from there into ``content``, ``tags`` and
+``content_tags`` with a few set-based statements, one transaction per batch. Lines
+that fail are reported by line number and do not stop the import.
+"""
+import asyncio
+import contextlib
+import json
+import logging
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.blobs import blob_store
+from app.db.models import Content as ContentModel, Tag as TagModel
+from app.db.stats import record_content
+from app.ingestion.autotag import auto_tags
+from app.ingestion.summarizer import SUMMARY_ON_INGEST, summarize_texts
+from app.models.content import ContentCreate
+
+logger = logging.getLogger(__name__)
+
+# Records written per transaction
+CONTENT_IMPORT_BATCH_SIZE = int(os.getenv("CONTENT_IMPORT_BATCH_SIZE", "1000"))
+# Lines longer than this are rejected without being buffered
+CONTENT_IMPORT_MAX_LINE_BYTES = int(os.getenv("CONTENT_IMPORT_MAX_LINE_BYTES", str(10 * 1024 * 1024)))
+# Line errors listed in the report (all of them are counted)
+CONTENT_IMPORT_MAX_ERRORS = int(os.getenv("CONTENT_IMPORT_MAX_ERRORS", "100"))
+
+_STAGING_TABLE = "content_import_staging"
+_STAGING_COLUMNS = ["line", "source", "title", "url", "date", "raw_hash", "clean_content", "summary", "metadata", "tags"]
+
+# ids come from the content sequence up front so the merge can link tags without RETURNING
+_CREATE_STAGING = text(
+    f"CREATE TEMPORARY TABLE IF NOT EXISTS {_STAGING_TABLE} ("
+    " line INTEGER NOT NULL,"
+    " id INTEGER NOT NULL DEFAULT nextval('content_id_seq'),"
+    " source VARCHAR(50), title VARCHAR(255), url VARCHAR(512), date DATE NOT NULL,"
+    " raw_hash CHAR(64), clean_content TEXT, summary TEXT, metadata JSONB, tags TEXT[]"
+    ") ON COMMIT DELETE ROWS"
+)
+_MERGE_TAGS = text(
+    f"INSERT INTO tags (name) SELECT DISTINCT unnest(tags) FROM {_STAGING_TABLE} ORDER BY 1"
+    " ON CONFLICT (name) DO NOTHING"
+)
+_MERGE_CONTENT = text(
+    "INSERT INTO content (id, source, raw_hash, clean_content, summary, title, url, date, metadata)"
+    f" SELECT id, source, raw_hash, clean_content, summary, title, url, date, metadata FROM {_STAGING_TABLE} ORDER BY line"
+)
+_MERGE_CONTENT_TAGS = text(
+    "INSERT INTO content_tags (content_id, tag_id)"
+    f" SELECT DISTINCT s.id, t.id FROM {_STAGING_TABLE} s CROSS JOIN LATERAL unnest(s.tags) AS n(name)"
+    " JOIN tags t ON t.name = n.name"
+)
+_STAGED_ENTRIES = text(
+    "SELECT s.source, s.date, array_remove(array_agg(t.id), NULL) AS tag_ids"
+    f" FROM {_STAGING_TABLE} s LEFT JOIN LATERAL unnest(s.tags) AS n(name) ON true"
+    " LEFT JOIN tags t ON t.name = n.name GROUP BY s.id, s.source, s.date"
+)
+
+# Column lengths enforced by Postgres; checked per line so one long title cannot fail a batch
+_MAX_LENGTHS = {
+    "source": ContentModel.__table__.c.source.type.length,
+    "title": ContentModel.__table__.c.title.type.length,
+    "url": ContentModel.__table__.c.url.type.length,
+}
+_MAX_TAG_LENGTH = TagModel.__table__.c.name.type.length
+
+class ImportReport:
+    """Counts and line errors of one import"""
+
+    def __init__(self, max_errors: int = CONTENT_IMPORT_MAX_ERRORS):
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.max_errors = max_errors
+
+    def fail(self, line: int, error: str):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "error": error})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes], max_line_bytes: int = CONTENT_IMPORT_MAX_LINE_BYTES
+) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    Split a byte stream into numbered lines.
+
+    Only the current line is buffered. Lines longer than max_line_bytes are yielded
+    as None and their bytes are dropped as they arrive.
+
+    Args:
+        chunks: Byte chunks, e.g. Request.stream()
+        max_line_bytes: Longest accepted line
+
+    Yields:
+        (1-based line number, line bytes without the line break, or None if too long)
+    """
+    number = 0
+    buffer = b""
+    oversized = False
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end == -1:
+                break
+            number += 1
+            if oversized or len(buffer) + end - start > max_line_bytes:
+                yield number, None
+            else:
+                yield number, buffer + chunk[start:end]
+            buffer, oversized, start = b"", False, end + 1
+        if not oversized:
+            buffer += chunk[start:]
+            if len(buffer) > max_line_bytes:
+                buffer, oversized = b"", True
+    if buffer or oversized:
+        yield number + 1, None if oversized else buffer
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'record'}: {item['msg']}" for item in error.errors()
+    )
+
+def _has_nul(value: Any) -> bool:
+    """Whether a string, or any key or string in a JSON value, contains a NUL character."""
+    if isinstance(value, str):
+        return "\x00" in value
+    if isinstance(value, dict):
+        return any(_has_nul(key) or _has_nul(item) for key, item in value.items())
+    if isinstance(value, list):
+        return any(_has_nul(item) for item in value)
+    return False
+
+def validate_line(line: bytes) -> Tuple[Optional[ContentCreate], Optional[str]]:
+    """
+    Validate one NDJSON line as a ContentCreate record.
+
+    Besides the model itself this checks what Postgres would reject for the whole
+    batch: column lengths and NUL characters.
+
+    Returns:
+        (record, None) when valid, (None, error message) otherwise
+    """
+    try:
+        record = ContentCreate.model_validate_json(line)
+    except ValidationError as e:
+        return None, _format_validation_error(e)
+    # Postgres rejects NUL in text and JSONB; checked on the decoded values, since the
+    # line may contain an escaped backslash followed by "u0000"
+    if any(_has_nul(value) for value in (
+        record.source, record.raw_content, record.clean_content, record.summary,
+        record.title, record.url, record.tags, record.metadata,
+    )):
+        return None, "text fields cannot contain NUL characters"
+    for field, length in _MAX_LENGTHS.items():
+        value = getattr(record, field)
+        if value is not None and len(value) > length:
+            return None, f"{field}: longer than {length} characters"
+    record.tags = list(dict.fromkeys(tag.strip() for tag in record.tags or [] if tag and tag.strip()))
+    for tag in record.tags:
+        if len(tag) > _MAX_TAG_LENGTH:
+            return None, f"tags: {tag[:20]!r}... longer than {_MAX_TAG_LENGTH} characters"
+    return record, None
+
+async def write_batch(db: AsyncSession, batch: List[Tuple[int, ContentCreate]]) -> int:
+    """
+    COPY a batch of validated records into the staging table and merge it into content.
+
+    Runs in the session's current transaction; the caller commits. The staging table
+    is emptied on commit.
+
+    Args:
+        db: Database session (primary)
+        batch: (line number, record) pairs
+
+    Returns:
+        Number of content rows written
+    """
+    if not batch:
+        return 0
+    records = [record for _, record in batch]
+    for record, found in zip(records, await auto_tags(db, [r.clean_content for r in records])):
+        if found:
+            record.tags = list(dict.fromkeys([*record.tags, *found]))
+    if SUMMARY_ON_INGEST:
+        missing = [r for r in records if r.summary is None and r.clean_content]
+        for record, summary in zip(missing, await summarize_texts([r.clean_content for r in missing])):
+            record.summary = summary
+    # Bodies identical to the clean text are not stored (see app.db.blobs.store_raw_content)
+    stored = [bool(r.raw_content) and r.raw_content != r.clean_content for r in records]
+    to_store = [r.raw_content for r, is_stored in zip(records, stored) if is_stored]
+    hashes = iter(await blob_store.put_many(db, to_store) if to_store else [])
+
+    await db.execute(_CREATE_STAGING)
+    connection = await db.connection()
+    raw = (await connection.get_raw_connection()).driver_connection
+    await raw.copy_records_to_table(
+        _STAGING_TABLE,
+        columns=_STAGING_COLUMNS,
+        records=[
+            (
+                line,
+                record.source,
+                record.title,
+                record.url,
+                record.date,
+                next(hashes) if is_stored else None,
+                record.clean_content,
+                record.summary,
+                json.dumps(record.metadata) if record.metadata is not None else None,
+                record.tags,
+            )
+            for (line, record), is_stored in zip(batch, stored)
+        ],
+    )
+
+    await db.execute(_MERGE_TAGS)
+    await db.execute(_MERGE_CONTENT)
+    await db.execute(_MERGE_CONTENT_TAGS)
+    result = await db.execute(_STAGED_ENTRIES)
+    await record_content(db, [(row.source, row.date, list(row.tag_ids)) for row in result])
+    return len(batch)
+
+async def _commit_batch(db: AsyncSession, batch: List[Tuple[int, ContentCreate]], report: ImportReport):
+    try:
+        written = await write_batch(db, batch)
+        await db.commit()
+        report.imported += written
+    except Exception as e:
+        await db.rollback()
+        message = str(e).split("\n")[0][:300]
+        logger.error(f"Error writing import batch (lines {batch[0][0]}-{batch[-1][0]}): {message}")
+        for line, _ in batch:
+            report.fail(line, f"batch write failed: {message}")
+
+async def import_ndjson(
+    db: AsyncSession,
+    chunks: AsyncIterator[bytes],
+    batch_size: int = CONTENT_IMPORT_BATCH_SIZE,
+) -> ImportReport:
+    """
+    Import NDJSON ContentCreate records from a byte stream.
+
+    One batch is written while the next one is read and validated. Reading stops
+    while a full batch waits for the previous write, so a client cannot send faster
+    than the database absorbs it and memory stays at about two batches.
+
+    Args:
+        db: Database session (primary); each batch is committed
+        chunks: Byte chunks of the NDJSON body
+        batch_size: Records written per transaction
+
+    Returns:
+        ImportReport with imported/failed counts and line errors
+    """
+    report = ImportReport()
+    batch: List[Tuple[int, ContentCreate]] = []
+    writing: Optional[asyncio.Task] = None
+    try:
+        async for number, line in iter_lines(chunks):
+            if line is None:
+                report.fail(number, f"line longer than {CONTENT_IMPORT_MAX_LINE_BYTES} bytes")
+                continue
+            if not line.strip():
+                continue
+            record, error = validate_line(line)
+            if error:
+                report.fail(number, error)
+                continue
+            batch.append((number, record))
+            if len(batch) >= batch_size:
+                if writing:
+                    await writing
+                writing = asyncio.create_task(_commit_batch(db, batch, report))
+                batch = []
+        if writing:
+            await writing
+            writing = None
+        if batch:
+            await _commit_batch(db, batch, report)
+    finally:
+        if writing and not writing.done():
+            # The client went away; the uncommitted batch is rolled back with the session,
+            # which must not be closed while the cancelled COPY is still using it
+            writing.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await writing
+    return report
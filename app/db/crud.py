@@ -0,0 +1,394 @@
+from datetime import date
+
+from sqlalchemy import delete, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import List, Dict, Any, Optional
+import logging
+
+from app.db.blobs import blob_store, store_raw_content
+from app.db.stats import record_content
+from app.db.models import Content as ContentModel, Source as SourceModel, Tag as TagModel, content_tags
+from app.ingestion.autotag import auto_tags
+from app.db.partitions import date_range_filter
+from app.ingestion.summarizer import SUMMARY_ON_INGEST, summarize_texts
+from app.models.content import ContentCreate
+
+logger = logging.getLogger(__name__)
+
+async def get_or_create_tags(db: AsyncSession, names: List[str]) -> List[TagModel]:
+    """
+    Return the tags with the given names, creating missing ones.
+
+    Args:
+        db: Database session
+        names: Tag names (duplicates and blank names are ignored)
+
+    Returns:
+        List of Tag objects
+    """
+    names = sorted({name.strip() for name in names if name and name.strip()})
+    if not names:
+        return []
+
+    # Insert-or-ignore keeps concurrent ingestions from racing on the unique name
+    await db.execute(
+        insert(TagModel).values([{"name": name} for name in names]).on_conflict_do_nothing(index_elements=["name"])
+    )
+    result = await db.execute(select(TagModel).where(TagModel.name.in_(names)))
+    return list(result.scalars())
+
+async def _tag_lists(db: AsyncSession, contents: List[ContentCreate]) -> List[List[str]]:
+    """Return the tag names of each entry: caller tags first, then keyword tags found in the clean text."""
+    keyword_tags = await auto_tags(db, [c.clean_content for c in contents])
+    return [
+        list(dict.fromkeys(name.strip() for name in [*(c.tags or []), *found] if name and name.strip()))
+        for c, found in zip(contents, keyword_tags)
+    ]
+
+async def create_contents(db: AsyncSession, contents: List[ContentCreate]) -> List[ContentModel]:
+    """
+    Save several content entries with their tags in one round of statements.
+
+    Keyword tags are added to the caller's tags, missing summaries are computed (with
+    SUMMARY_ON_INGEST), tags are looked up once for the whole batch, raw bodies go to
+    the blob store in one write, and rows and tag links are inserted with one
+    statement each. The tag, source
+    and daily counters are updated in the same transaction.
+
+    Args:
+        db: Database session (primary)
+        contents: Content to save
+
+    Returns:
+        The new Content objects in input order, with ids and tags
+    """
+    if not contents:
+        return []
+    tag_lists = await _tag_lists(db, contents)
+    tags = {tag.name: tag for tag in await get_or_create_tags(db, [name for names in tag_lists for name in names])}
+
+    # Bodies identical to the clean text are not stored (see app.db.blobs.store_raw_content)
+    stored = [bool(c.raw_content) and c.raw_content != c.clean_content for c in contents]
+    to_store = [c.raw_content for c, is_stored in zip(contents, stored) if is_stored]
+    hashes = iter(await blob_store.put_many(db, to_store) if to_store else [])
+
+    summaries = [c.summary for c in contents]
+    if SUMMARY_ON_INGEST:
+        missing = [i for i, c in enumerate(contents) if c.summary is None and c.clean_content]
+        for i, summary in zip(missing, await summarize_texts([contents[i].clean_content for i in missing])):
+            summaries[i] = summary
+
+    # ORM bulk insert: one cached INSERT ... RETURNING sent in batches, objects in input order
+    result = await db.scalars(
+        insert(ContentModel).returning(ContentModel, sort_by_parameter_order=True),
+        [
+            {
+                "source": content.source,
+                "raw_hash": next(hashes) if is_stored else None,
+                "clean_content": content.clean_content,
+                "summary": summary,
+                "title": content.title,
+                "url": content.url,
+                "date": content.date,
+                "metadata_": content.metadata,
+            }
+            for content, is_stored, summary in zip(contents, stored, summaries)
+        ],
+    )
+    rows = list(result)
+
+    links = []
+    for row, names in zip(rows, tag_lists):
+        row_tags = [tags[name] for name in names if name in tags]
+        # The rows were not loaded through the relationship, so set it as already persisted
+        set_committed_value(row, "tags", row_tags)
+        links.extend({"content_id": row.id, "tag_id": tag.id} for tag in row_tags)
+    if links:
+        await db.execute(content_tags.insert(), links)
+
+    await record_content(db, [(row.source, row.date, [tag.id for tag in row.tags]) for row in rows])
+    return rows
+
+async def create_content(db: AsyncSession, content: ContentCreate) -> ContentModel:
+    """
+    Save a content entry with its tags, storing the raw body in the blob store.
+
+    The tag, source and daily counters are updated in the same transaction.
+
+    Args:
+        db: Database session (primary)
+        content: Content to save
+
+    Returns:
+        The new Content object, flushed so it has an id
+    """
+    return (await create_contents(db, [content]))[0]
+
+async def get_content(db: AsyncSession, content_id: int, content_date: Optional[date] = None) -> Optional[ContentModel]:
+    """
+    Return a content entry with its tags loaded, or None.
+
+    Args:
+        db: Database session
+        content_id: Content id
+        content_date: The entry's date, if known; limits the lookup to one partition
+
+    Returns:
+        Content object or None
+    """
+    query = select(ContentModel).options(selectinload(ContentModel.tags)).where(ContentModel.id == content_id)
+    if content_date:
+        query = query.where(ContentModel.date == content_date)
+    result = await db.execute(query)
+    return result.scalar_one_or_none()
+
+async def update_content(
+    db: AsyncSession, content_id: int, content: ContentCreate, content_date: Optional[date] = None
+) -> Optional[ContentModel]:
+    """
+    Replace a content entry's fields and tags, as create_content would have saved them.
+
+    A new date moves the row to its partition. The counters are moved from the old
+    source, date and tags to the new ones in the same transaction. The previous raw
+    body stays in the blob store until garbage collection.
+
+    Args:
+        db: Database session (primary)
+        content_id: Content id
+        content: New content
+        content_date: The entry's current date, if known; limits the lookup to one partition
+
+    Returns:
+        The updated Content object, or None if there is no such entry
+    """
+    row = await get_content(db, content_id, content_date)
+    if row is None:
+        return None
+    await record_content(db, [(row.source, row.date, [tag.id for tag in row.tags])], sign=-1)
+
+    names = (await _tag_lists(db, [content]))[0]
+    tags = {tag.name: tag for tag in await get_or_create_tags(db, names)}
+    row_tags = [tags[name] for name in names if name in tags]
+    summary = content.summary
+    if summary is None and SUMMARY_ON_INGEST and content.clean_content:
+        summary = (await summarize_texts([content.clean_content]))[0]
+
+    row.source = content.source
+    row.raw_hash = await store_raw_content(db, content.raw_content, content.clean_content)
+    row.raw_content = None
+    row.clean_content = content.clean_content
+    row.summary = summary
+    row.title = content.title
+    row.url = content.url
+    row.date = content.date
+    row.metadata_ = content.metadata
+    await db.flush()
+
+    await db.execute(delete(content_tags).where(content_tags.c.content_id == row.id))
+    if row_tags:
+        await db.execute(content_tags.insert(), [{"content_id": row.id, "tag_id": tag.id} for tag in row_tags])
+    set_committed_value(row, "tags", row_tags)
+
+    await record_content(db, [(row.source, row.date, [tag.id for tag in row_tags])])
+    return row
+
+async def update_extracted_contents(db: AsyncSession, changes: List[Dict[str, Any]]) -> int:
+    """
+    Write newly extracted text over existing content entries, as re-extraction does.
+
+    The keyword tags are recomputed: tags the old text matched are dropped unless the
+    new text still matches them, and the new matches are added; other tags are kept.
+    Summaries are recomputed with SUMMARY_ON_INGEST, and cleared otherwise (they are
+    then computed when read). Rows with a new date move to its partition, and the
+    counters follow the date and tag changes. The caller commits.
+
+    Args:
+        db: Database session (primary)
+        changes: One dictionary per entry with id, source, date (current), new_date,
+            title, raw_content and clean_content (new and old_clean_content)
+
+    Returns:
+        Number of entries updated
+    """
+    if not changes:
+        return 0
+    ids = [change["id"] for change in changes]
+    current: Dict[int, List[int]] = {content_id: [] for content_id in ids}
+    for content_id, tag_id in (await db.execute(
+        select(content_tags.c.content_id, content_tags.c.tag_id).where(content_tags.c.content_id.in_(ids))
+    )).all():
+        current[content_id].append(tag_id)
+
+    old_keywords = await auto_tags(db, [change["old_clean_content"] for change in changes])
+    new_keywords = await auto_tags(db, [change["clean_content"] for change in changes])
+    tags = {
+        tag.name: tag.id
+        for tag in await get_or_create_tags(db, [name for names in old_keywords + new_keywords for name in names])
+    }
+    tag_lists = []
+    for change, old_names, new_names in zip(changes, old_keywords, new_keywords):
+        dropped = {tags[name] for name in old_names if name not in new_names and name in tags}
+        kept = [tag_id for tag_id in current[change["id"]] if tag_id not in dropped]
+        tag_lists.append(list(dict.fromkeys([*kept, *(tags[name] for name in new_names if name in tags)])))
+
+    # Bodies identical to the clean text are not stored (see app.db.blobs.store_raw_content)
+    stored = [bool(c["raw_content"]) and c["raw_content"] != c["clean_content"] for c in changes]
+    to_store = [c["raw_content"] for c, is_stored in zip(changes, stored) if is_stored]
+    hashes = iter(await blob_store.put_many(db, to_store) if to_store else [])
+    summaries: List[Optional[str]] = [None] * len(changes)
+    if SUMMARY_ON_INGEST:
+        summaries = await summarize_texts([change["clean_content"] for change in changes])
+
+    for change, is_stored, summary in zip(changes, stored, summaries):
+        await db.execute(
+            update(ContentModel)
+            .where(ContentModel.id == change["id"], ContentModel.date == change["date"])
+            .values(
+                title=change["title"],
+                clean_content=change["clean_content"],
+                raw_hash=next(hashes) if is_stored else None,
+                raw_content=None,
+                summary=summary,
+                date=change["new_date"],
+            )
+        )
+
+    retagged = [(change, tag_ids) for change, tag_ids in zip(changes, tag_lists) if tag_ids != current[change["id"]]]
+    if retagged:
+        await db.execute(delete(content_tags).where(content_tags.c.content_id.in_([c["id"] for c, _ in retagged])))
+        links = [{"content_id": change["id"], "tag_id": tag_id} for change, tag_ids in retagged for tag_id in tag_ids]
+        if links:
+            await db.execute(content_tags.insert(), links)
+
+    moved = [
+        (change, tag_ids) for change, tag_ids in zip(changes, tag_lists)
+        if change["new_date"] != change["date"] or tag_ids != current[change["id"]]
+    ]
+    if moved:
+        await record_content(db, [(c["source"], c["date"], current[c["id"]]) for c, _ in moved], sign=-1)
+        await record_content(db, [(c["source"], c["new_date"], tag_ids) for c, tag_ids in moved])
+    return len(changes)
+
+async def delete_content(db: AsyncSession, content_id: int, content_date: Optional[date] = None) -> bool:
+    """
+    Delete a content entry with its tag links, and remove it from the counters.
+
+    Its raw body stays in the blob store until garbage collection.
+
+    Args:
+        db: Database session (primary)
+        content_id: Content id
+        content_date: The entry's date, if known; limits the lookup to one partition
+
+    Returns:
+        True if the entry existed
+    """
+    row = await get_content(db, content_id, content_date)
+    if row is None:
+        return False
+    await record_content(db, [(row.source, row.date, [tag.id for tag in row.tags])], sign=-1)
+    await db.execute(delete(content_tags).where(content_tags.c.content_id == row.id))
+    await db.execute(delete(ContentModel).where(ContentModel.id == row.id, ContentModel.date == row.date))
+    db.expunge(row)
+    return True
+
+async def get_source(db: AsyncSession, name: str) -> Optional[SourceModel]:
+    """
+    Return the source configuration with this name, or None.
+
+    Args:
+        db: Database session
+        name: Source name, as stored on content rows
+
+    Returns:
+        Source object or None
+    """
+    result = await db.execute(select(SourceModel).where(SourceModel.name == name))
+    return result.scalar_one_or_none()
+
+async def get_summaries(
+    db: AsyncSession,
+    content_ids: Optional[List[int]] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    source: Optional[str] = None,
+    tag: Optional[str] = None,
+    limit: int = 20,
+) -> List[Dict[str, Any]]:
+    """
+    Return stored summaries of the given content ids, or of the newest entries in a window.
+
+    Only rows without a stored summary yet (not backfilled) fetch clean_content, and
+    are summarized on the fly without being saved.
+
+    Args:
+        db: Database session
+        content_ids: Content ids; the filters below are ignored when given
+        start_date: First day of the window
+        end_date: Last day of the window
+        source: Only this source
+        tag: Only content with this tag
+        limit: Maximum number of entries for a window
+
+    Returns:
+        List of dictionaries with id, source, title, url, date and summary
+    """
+    query = select(
+        ContentModel.id, ContentModel.source, ContentModel.title, ContentModel.url, ContentModel.date, ContentModel.summary
+    )
+    if content_ids:
+        query = query.where(ContentModel.id.in_(content_ids))
+    else:
+        query = query.where(*date_range_filter(start_date, end_date))
+        if source:
+            query = query.where(ContentModel.source == source)
+        if tag:
+            query = query.where(ContentModel.id.in_(
+                select(content_tags.c.content_id).join(TagModel, TagModel.id == content_tags.c.tag_id).where(TagModel.name == tag)
+            ))
+        query = query.order_by(ContentModel.date.desc(), ContentModel.id.desc()).limit(limit)
+    items = [dict(row._mapping) for row in await db.execute(query)]
+    if content_ids:
+        order = {content_id: index for index, content_id in enumerate(content_ids)}
+        items.sort(key=lambda item: order[item["id"]])
+
+    missing = [item for item in items if item["summary"] is None]
+    if missing:
+        result = await db.execute(
+            select(ContentModel.id, ContentModel.clean_content).where(
+                tuple_(ContentModel.id, ContentModel.date).in_([(item["id"], item["date"]) for item in missing])
+            )
+        )
+        texts = dict(result.all())
+        for item, summary in zip(missing, await summarize_texts([texts.get(item["id"]) for item in missing])):
+            item["summary"] = summary or ""
+    return items
+
+def content_to_dict(row: ContentModel, raw_content: Optional[str]) -> Dict[str, Any]:
+    """
+    Convert a Content object with loaded tags into the Content response shape.
+
+    Args:
+        row: Content object
+        raw_content: Raw body to include (resolved separately, see app.db.blobs)
+
+    Returns:
+        Dictionary matching app.models.content.Content
+    """
+    return {
+        "id": row.id,
+        "source": row.source,
+        "raw_content": raw_content or "",
+        "clean_content": row.clean_content,
+        "summary": row.summary,
+        "title": row.title,
+        "url": row.url,
+        "date": row.date,
+        "metadata": row.metadata_,
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+        "tags": [{"id": tag.id, "name": tag.name, "created_at": tag.created_at} for tag in row.tags],
+    }
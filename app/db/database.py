@@ -3,35 +3,89 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 import os
+import orjson
 from dotenv import load_dotenv
 
 # Load environment variables if not already loaded
 load_dotenv()
 
-# Get database URL from environment variable
+# Get database URLs from environment variables
 DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")  # Optional read replica
 
-# Create async engine
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True,  # Set to False in production
-    future=True,
-)
+# Engine and pool configuration
+DB_ECHO = os.getenv("DB_ECHO", "False").lower() in ("1", "true", "yes")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))  # Seconds to wait for a connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # Seconds before a connection is replaced
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() in ("1", "true", "yes")
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))  # asyncpg prepared statements per connection
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+DB_READ_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_READ_STATEMENT_TIMEOUT_MS", "10000"))
+
+def _create_engine(url: str, statement_timeout_ms: int):
+    """
+    Create an async engine with the configured pool and asyncpg settings.
+
+    Args:
+        url: Database URL
+        statement_timeout_ms: Server-side statement timeout in milliseconds (0 disables it)
+
+    Returns:
+        Configured AsyncEngine
+    """
+    return create_async_engine(
+        url,
+        echo=DB_ECHO,
+        future=True,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        # JSON/JSONB columns (metadata, source config) are decoded by asyncpg with this
+        json_deserializer=orjson.loads,
+        connect_args={
+            # Cache of prepared statements kept by asyncpg on each connection
+            "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+            # SQLAlchemy's own cache of prepared statements for the asyncpg dialect
+            "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+            "server_settings": {
+                "statement_timeout": str(statement_timeout_ms),
+            },
+        },
+    )
+
+# Create async engine for the primary (all writes go here)
+engine = _create_engine(DATABASE_URL, DB_STATEMENT_TIMEOUT_MS)
+
+# Create async engine for the read replica, falling back to the primary
+if DATABASE_READ_URL:
+    read_engine = _create_engine(DATABASE_READ_URL, DB_READ_STATEMENT_TIMEOUT_MS)
+else:
+    read_engine = engine
 
-# Create session factory
+# Create session factories
 async_session = sessionmaker(
     engine,
     class_=AsyncSession,
     expire_on_commit=False,
 )
 
+async_read_session = sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
 # Create base class for ORM models
 Base = declarative_base()
 
 # Helper function to get a database session
 async def get_db_session():
     """
-    Dependency function to get a database session.
+    Dependency function to get a database session on the primary.
     Yields an async session and ensures it's closed properly after use.
     """
     async with async_session() as session:
@@ -42,4 +96,23 @@ async def get_db_session():
             await session.rollback()
             raise
         finally:
-            await session.close() 
\ No newline at end of file
+            await session.close()
+
+async def get_read_db_session():
+    """
+    Dependency function to get a read-only database session.
+    Uses the read replica when DATABASE_READ_URL is set, otherwise the primary.
+    Nothing is committed; the transaction is rolled back when the request ends.
+    """
+    async with async_read_session() as session:
+        try:
+            yield session
+        finally:
+            await session.rollback()
+            await session.close()
+
+async def dispose_engines():
+    """Dispose the primary and read replica connection pools."""
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
@@ -0,0 +1,280 @@
+"""
+Streaming export of content as NDJSON, Parquet or Arrow.
+
+Rows are read through a server-side cursor in batches of CONTENT_EXPORT_BATCH_SIZE
+and encoded one batch at a time, so memory stays constant however many rows match.
+Parquet output gets one row group per batch; Arrow output is an IPC stream with one
+record batch per batch. NDJSON lines use the ContentCreate field names, so an export
+with raw bodies can be fed back to ``POST /api/content/bulk``.
+
+pyarrow is only needed for Parquet and Arrow output and is imported on first use.
+
+Usage:
+    python -m app.db.export --format parquet --output corpus.parquet [--source WSJ]
+        [--tag markets] [--start-date 2024-01-01] [--end-date 2024-12-31] [--include-raw]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.blobs import load_raw_contents
+from app.db.models import Content as ContentModel, Tag as TagModel, content_tags
+from app.db.partitions import date_range_filter
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched from the cursor and encoded at a time (and rows per Parquet row group)
+CONTENT_EXPORT_BATCH_SIZE = int(os.getenv("CONTENT_EXPORT_BATCH_SIZE", "5000"))
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+_COLUMNS = ["id", "source", "title", "url", "date", "created_at", "updated_at", "clean_content", "summary", "metadata", "tags"]
+
+def export_query(
+    source: Optional[str] = None,
+    tag: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+):
+    """
+    Build the export SELECT: content columns plus tag names, oldest first.
+
+    Tags are aggregated per row in a correlated subquery, so rows come out one per
+    content entry without a GROUP BY over the whole result.
+    """
+    tag_names = (
+        select(func.array_agg(TagModel.name))
+        .select_from(content_tags.join(TagModel, TagModel.id == content_tags.c.tag_id))
+        .where(content_tags.c.content_id == ContentModel.id)
+        .scalar_subquery()
+    )
+    query = select(
+        ContentModel.id,
+        ContentModel.source,
+        ContentModel.title,
+        ContentModel.url,
+        ContentModel.date,
+        ContentModel.created_at,
+        ContentModel.updated_at,
+        ContentModel.clean_content,
+        ContentModel.summary,
+        ContentModel.metadata_.label("metadata"),
+        ContentModel.raw_hash,
+        tag_names.label("tags"),
+    ).where(*date_range_filter(start_date, end_date))
+    if source:
+        query = query.where(ContentModel.source == source)
+    if tag:
+        query = query.where(
+            ContentModel.id.in_(
+                select(content_tags.c.content_id)
+                .join(TagModel, TagModel.id == content_tags.c.tag_id)
+                .where(TagModel.name == tag)
+            )
+        )
+    return query.order_by(ContentModel.date, ContentModel.id)
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+class _NdjsonEncoder:
+    def __init__(self, include_raw: bool):
+        self.columns = _COLUMNS + (["raw_content"] if include_raw else [])
+
+    def encode(self, records: List[Dict[str, Any]]) -> bytes:
+        lines = [
+            json.dumps({column: record[column] for column in self.columns}, default=_json_default, ensure_ascii=False)
+            for record in records
+        ]
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    def finish(self) -> bytes:
+        return b""
+
+class _BufferSink:
+    """Write-only file object whose contents are handed out as they are written"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+class _ArrowEncoder:
+    def __init__(self, format: str, include_raw: bool):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        fields = [
+            pa.field("id", pa.int64()),
+            pa.field("source", pa.string()),
+            pa.field("title", pa.string()),
+            pa.field("url", pa.string()),
+            pa.field("date", pa.date32()),
+            pa.field("created_at", pa.timestamp("us")),
+            pa.field("updated_at", pa.timestamp("us")),
+            pa.field("clean_content", pa.string()),
+            pa.field("summary", pa.string()),
+            pa.field("metadata", pa.string()),  # JSON text
+            pa.field("tags", pa.list_(pa.string())),
+        ]
+        if include_raw:
+            fields.append(pa.field("raw_content", pa.string()))
+        self.schema = pa.schema(fields)
+        self.sink = _BufferSink()
+        output = pa.PythonFile(self.sink, mode="w")
+        if format == "parquet":
+            self.writer = pq.ParquetWriter(output, self.schema, compression="zstd")
+            self.write = self.writer.write_table
+        else:
+            self.writer = pa.ipc.new_stream(output, self.schema)
+            self.write = self.writer.write_table
+
+    def encode(self, records: List[Dict[str, Any]]) -> bytes:
+        columns = {name: [record[name] for record in records] for name in self.schema.names}
+        columns["metadata"] = [json.dumps(value) if value is not None else None for value in columns["metadata"]]
+        # One table per batch: one Parquet row group / one Arrow record batch
+        self.write(self.pa.table(columns, schema=self.schema))
+        return self.sink.drain()
+
+    def finish(self) -> bytes:
+        self.writer.close()
+        return self.sink.drain()
+
+def _create_encoder(format: str, include_raw: bool):
+    if format == "ndjson":
+        return _NdjsonEncoder(include_raw)
+    if format in ("parquet", "arrow"):
+        return _ArrowEncoder(format, include_raw)
+    raise ValueError(f"Unknown export format: {format}")
+
+def check_format(format: str):
+    """
+    Raise ValueError for an unknown format, or RuntimeError when its writer is not installed.
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {format} (expected one of {', '.join(EXPORT_FORMATS)})")
+    if format != "ndjson":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise RuntimeError(f"{format} export requires pyarrow")
+
+async def export_content(
+    db: AsyncSession,
+    format: str = "ndjson",
+    source: Optional[str] = None,
+    tag: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    include_raw: bool = False,
+    batch_size: int = CONTENT_EXPORT_BATCH_SIZE,
+) -> AsyncIterator[bytes]:
+    """
+    Stream matching content rows encoded as format.
+
+    Args:
+        db: Database session; the cursor lives in its transaction
+        format: ndjson, parquet or arrow
+        source: Only export this source
+        tag: Only export content with this tag
+        start_date: First day to include
+        end_date: Last day to include
+        include_raw: Also resolve raw bodies from the blob store (one lookup per batch)
+        batch_size: Rows per cursor fetch and per encoded chunk
+
+    Yields:
+        Encoded output, one chunk per batch
+    """
+    check_format(format)
+    encoder = _create_encoder(format, include_raw)
+    query = export_query(source, tag, start_date, end_date)
+    exported = 0
+    result = await db.stream(query, execution_options={"yield_per": batch_size})
+    async for rows in result.partitions():
+        records = [dict(row._mapping) for row in rows]
+        for record in records:
+            # array_agg over no tags is NULL
+            record["tags"] = record["tags"] or []
+        if include_raw:
+            raw = await load_raw_contents(db, rows)
+            for record in records:
+                record["raw_content"] = raw[record["id"]]
+        # Encoding is CPU-bound; keep the event loop free while it runs
+        chunk = await asyncio.to_thread(encoder.encode, records)
+        exported += len(records)
+        if chunk:
+            yield chunk
+    chunk = encoder.finish()
+    if chunk:
+        yield chunk
+    logger.info(f"Exported {exported} content rows as {format}")
+
+async def _main(args):
+    from app.db.database import async_read_session, dispose_engines
+
+    output = open(args.output, "wb") if args.output != "-" else sys.stdout.buffer
+    try:
+        async with async_read_session() as db:
+            async for chunk in export_content(
+                db,
+                format=args.format,
+                source=args.source,
+                tag=args.tag,
+                start_date=date.fromisoformat(args.start_date) if args.start_date else None,
+                end_date=date.fromisoformat(args.end_date) if args.end_date else None,
+                include_raw=args.include_raw,
+                batch_size=args.batch_size,
+            ):
+                output.write(chunk)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+        await dispose_engines()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Export content as NDJSON, Parquet or Arrow")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="ndjson")
+    parser.add_argument("--output", default="-", help="Output file (default: stdout)")
+    parser.add_argument("--source")
+    parser.add_argument("--tag")
+    parser.add_argument("--start-date", help="ISO date")
+    parser.add_argument("--end-date", help="ISO date")
+    parser.add_argument("--include-raw", action="store_true", help="Include raw bodies from the blob store")
+    parser.add_argument("--batch-size", type=int, default=CONTENT_EXPORT_BATCH_SIZE)
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,96 @@
+"""
+Minimal SQL migration runner.
+
+Migrations are the ``NNNN_name.sql`` files in app/db/migrations, applied in order.
+Each file runs in its own transaction and is recorded in ``schema_migrations``.
+
+Usage:
+    python -m app.db.migrate            # apply pending migrations
+    python -m app.db.migrate --status   # list applied and pending migrations
+"""
+import argparse
+import asyncio
+import logging
+import os
+from typing import List, Tuple
+
+from app.db.database import engine
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+
+def list_migrations() -> List[Tuple[str, str]]:
+    """Return (version, path) for every migration file, in order."""
+    migrations = []
+    for name in sorted(os.listdir(MIGRATIONS_DIR)):
+        if name.endswith(".sql"):
+            migrations.append((name[:-len(".sql")], os.path.join(MIGRATIONS_DIR, name)))
+    return migrations
+
+async def _applied_versions(driver_conn) -> set:
+    await driver_conn.execute(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        " version VARCHAR(255) PRIMARY KEY,"
+        " applied_at TIMESTAMP DEFAULT now())"
+    )
+    rows = await driver_conn.fetch("SELECT version FROM schema_migrations")
+    return {row["version"] for row in rows}
+
+async def apply_migrations(db_engine=engine) -> List[str]:
+    """
+    Apply all pending migrations.
+
+    Args:
+        db_engine: Async engine of the primary database
+
+    Returns:
+        Versions that were applied
+    """
+    applied = []
+    async with db_engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        # Files contain several statements, which needs asyncpg's simple query protocol
+        driver_conn = raw.driver_connection
+        # Serialize concurrent runners (e.g. several workers starting at once)
+        await driver_conn.execute("SELECT pg_advisory_lock(72470001)")
+        try:
+            done = await _applied_versions(driver_conn)
+            for version, path in list_migrations():
+                if version in done:
+                    continue
+                with open(path) as f:
+                    sql = f.read()
+                logger.info(f"Applying migration {version}")
+                async with driver_conn.transaction():
+                    await driver_conn.execute(sql)
+                    await driver_conn.execute("INSERT INTO schema_migrations (version) VALUES ($1)", version)
+                applied.append(version)
+        finally:
+            await driver_conn.execute("SELECT pg_advisory_unlock(72470001)")
+    return applied
+
+async def migration_status(db_engine=engine) -> List[Tuple[str, bool]]:
+    """Return (version, applied) for every migration file."""
+    async with db_engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        done = await _applied_versions(raw.driver_connection)
+    return [(version, version in done) for version, _ in list_migrations()]
+
+async def _main(status: bool):
+    try:
+        if status:
+            for version, is_applied in await migration_status():
+                print(f"{'applied' if is_applied else 'pending'}  {version}")
+        else:
+            applied = await apply_migrations()
+            print(f"Applied {len(applied)} migration(s)" + (f": {', '.join(applied)}" if applied else ""))
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Apply database migrations")
+    parser.add_argument("--status", action="store_true", help="List applied and pending migrations")
+    args = parser.parse_args()
+    asyncio.run(_main(args.status))
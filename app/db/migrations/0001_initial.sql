@@ -0,0 +1,44 @@
+-- Baseline schema matching app/db/models.py before migrations were introduced.
+-- IF NOT EXISTS keeps it safe on databases created with Base.metadata.create_all.
+
+CREATE TABLE IF NOT EXISTS content (
+    id SERIAL PRIMARY KEY,
+    source VARCHAR(50),
+    raw_content TEXT,
+    clean_content TEXT,
+    title VARCHAR(255),
+    url VARCHAR(512),
+    date DATE,
+    metadata JSONB,
+    created_at TIMESTAMP DEFAULT now(),
+    updated_at TIMESTAMP DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS ix_content_id ON content (id);
+CREATE INDEX IF NOT EXISTS ix_content_source ON content (source);
+CREATE INDEX IF NOT EXISTS ix_content_date ON content (date);
+
+CREATE TABLE IF NOT EXISTS tags (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(50),
+    created_at TIMESTAMP DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS ix_tags_id ON tags (id);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_tags_name ON tags (name);
+
+CREATE TABLE IF NOT EXISTS content_tags (
+    content_id INTEGER NOT NULL REFERENCES content (id),
+    tag_id INTEGER NOT NULL REFERENCES tags (id),
+    PRIMARY KEY (content_id, tag_id)
+);
+
+CREATE TABLE IF NOT EXISTS sources (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(50),
+    type VARCHAR(20),
+    config JSONB,
+    is_active INTEGER,
+    created_at TIMESTAMP DEFAULT now(),
+    updated_at TIMESTAMP DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS ix_sources_id ON sources (id);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_sources_name ON sources (name);
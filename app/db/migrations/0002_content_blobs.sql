@@ -0,0 +1,17 @@
+-- Content-addressed, compressed storage for raw bodies.
+-- content.raw_content is kept (nullable) for rows that have not been moved yet;
+-- run `python -m app.db.blobs backfill` to move them into content_blobs.
+
+CREATE TABLE IF NOT EXISTS content_blobs (
+    hash CHAR(64) PRIMARY KEY,          -- sha256 of the uncompressed UTF-8 text
+    codec VARCHAR(10) NOT NULL,         -- compression codec of data
+    data BYTEA NOT NULL,
+    size INTEGER NOT NULL,              -- uncompressed size in bytes
+    compressed_size INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT now()
+);
+-- Already compressed, so skip TOAST compression and store out of line
+ALTER TABLE content_blobs ALTER COLUMN data SET STORAGE EXTERNAL;
+
+ALTER TABLE content ADD COLUMN IF NOT EXISTS raw_hash CHAR(64);
+CREATE INDEX IF NOT EXISTS ix_content_raw_hash ON content (raw_hash);
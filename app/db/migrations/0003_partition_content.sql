@@ -0,0 +1,89 @@
+-- Rebuild content as a table range-partitioned by month on date.
+--
+-- Postgres requires the partition key in every unique constraint, so the primary key
+-- becomes (id, date) and content_tags can no longer reference content(id) with a
+-- foreign key; app/db/crud.py and app/db/partitions.py keep content_tags consistent.
+-- Rows without a date get the date they were created.
+
+UPDATE content SET date = COALESCE(created_at::date, CURRENT_DATE) WHERE date IS NULL;
+
+ALTER TABLE content_tags DROP CONSTRAINT IF EXISTS content_tags_content_id_fkey;
+CREATE INDEX IF NOT EXISTS ix_content_tags_tag_id ON content_tags (tag_id, content_id);
+
+ALTER TABLE content RENAME TO content_unpartitioned;
+ALTER TABLE content_unpartitioned RENAME CONSTRAINT content_pkey TO content_unpartitioned_pkey;
+DROP INDEX IF EXISTS ix_content_id;
+DROP INDEX IF EXISTS ix_content_source;
+DROP INDEX IF EXISTS ix_content_date;
+DROP INDEX IF EXISTS ix_content_raw_hash;
+
+CREATE TABLE content (
+    id INTEGER NOT NULL DEFAULT nextval('content_id_seq'),
+    source VARCHAR(50),
+    raw_content TEXT,
+    raw_hash CHAR(64),
+    clean_content TEXT,
+    title VARCHAR(255),
+    url VARCHAR(512),
+    date DATE NOT NULL,
+    metadata JSONB,
+    created_at TIMESTAMP DEFAULT now(),
+    updated_at TIMESTAMP DEFAULT now(),
+    CONSTRAINT content_pkey PRIMARY KEY (id, date)
+) PARTITION BY RANGE (date);
+
+-- Catches dates outside the created partitions; create_content_partition moves them out
+CREATE TABLE content_default PARTITION OF content DEFAULT;
+
+-- Indexes are created on every partition. BRIN indexes stay tiny because rows
+-- arrive roughly in date order, and serve range filters and aggregates. BRIN cannot
+-- return rows in order, so newest-first pages use the (date, id) btree.
+CREATE INDEX ix_content_date_brin ON content USING brin (date) WITH (pages_per_range = 32);
+CREATE INDEX ix_content_created_at_brin ON content USING brin (created_at) WITH (pages_per_range = 32);
+CREATE INDEX ix_content_date_id ON content (date DESC, id DESC);
+CREATE INDEX ix_content_source ON content (source);
+CREATE INDEX ix_content_raw_hash ON content (raw_hash);
+
+-- Create (or return) the monthly partition containing month_start
+CREATE OR REPLACE FUNCTION create_content_partition(month_start DATE) RETURNS TEXT AS $$
+DECLARE
+    start_date DATE := date_trunc('month', month_start)::date;
+    end_date DATE := (date_trunc('month', month_start) + INTERVAL '1 month')::date;
+    partition_name TEXT := 'content_' || to_char(start_date, 'YYYY_MM');
+BEGIN
+    -- Serialize concurrent callers (several workers run maintenance at startup)
+    PERFORM pg_advisory_xact_lock(hashtext('create_content_partition'));
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN partition_name;
+    END IF;
+
+    EXECUTE format('CREATE TABLE %I (LIKE content INCLUDING DEFAULTS)', partition_name);
+    -- Rows that landed in the default partition for this month move to the new one
+    EXECUTE format(
+        'WITH moved AS (DELETE FROM content_default WHERE date >= %L AND date < %L RETURNING *) '
+        'INSERT INTO %I SELECT * FROM moved',
+        start_date, end_date, partition_name
+    );
+    EXECUTE format(
+        'ALTER TABLE content ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        partition_name, start_date, end_date
+    );
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Partitions for every month with existing data and the next three months
+SELECT create_content_partition(month_start::date)
+FROM (
+    SELECT DISTINCT date_trunc('month', date) AS month_start FROM content_unpartitioned
+    UNION
+    SELECT date_trunc('month', CURRENT_DATE) + make_interval(months => n) FROM generate_series(0, 3) AS n
+) AS months;
+
+INSERT INTO content (id, source, raw_content, raw_hash, clean_content, title, url, date, metadata, created_at, updated_at)
+SELECT id, source, raw_content, raw_hash, clean_content, title, url, date, metadata, created_at, updated_at
+FROM content_unpartitioned;
+
+ALTER SEQUENCE content_id_seq OWNED BY content.id;
+DROP TABLE content_unpartitioned;
+ANALYZE content;
@@ -0,0 +1,35 @@
+-- Counters maintained alongside content writes (see app/db/stats.py), so tag, source
+-- and per-day totals are read in O(groups) instead of aggregating content.
+
+CREATE TABLE IF NOT EXISTS tag_stats (
+    tag_id INTEGER PRIMARY KEY REFERENCES tags (id) ON DELETE CASCADE,
+    content_count BIGINT NOT NULL DEFAULT 0,
+    last_content_date DATE,
+    updated_at TIMESTAMP DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS source_stats (
+    source VARCHAR(50) PRIMARY KEY,
+    content_count BIGINT NOT NULL DEFAULT 0,
+    last_content_date DATE,
+    updated_at TIMESTAMP DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS daily_stats (
+    day DATE NOT NULL,
+    source VARCHAR(50) NOT NULL,
+    content_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, source)
+);
+
+-- Seed the counters from existing content
+INSERT INTO source_stats (source, content_count, last_content_date)
+SELECT COALESCE(source, ''), count(*), max(date) FROM content GROUP BY COALESCE(source, '');
+
+INSERT INTO daily_stats (day, source, content_count)
+SELECT date, COALESCE(source, ''), count(*) FROM content GROUP BY date, COALESCE(source, '');
+
+INSERT INTO tag_stats (tag_id, content_count, last_content_date)
+SELECT ct.tag_id, count(*), max(c.date)
+FROM content_tags ct JOIN content c ON c.id = ct.content_id
+GROUP BY ct.tag_id;
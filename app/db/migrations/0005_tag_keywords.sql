@@ -0,0 +1,33 @@
+-- Keyword dictionary for automatic tagging (see app/ingestion/autotag.py). Content
+-- whose clean text contains a keyword as whole words gets the keyword's tag.
+
+CREATE TABLE IF NOT EXISTS tag_keywords (
+    id SERIAL PRIMARY KEY,
+    tag_id INTEGER NOT NULL REFERENCES tags (id) ON DELETE CASCADE,
+    keyword VARCHAR(200) NOT NULL,
+    created_at TIMESTAMP DEFAULT now(),
+    CONSTRAINT uq_tag_keywords_tag_keyword UNIQUE (tag_id, keyword)
+);
+
+-- Bumped by any change to the dictionary, so workers rebuild their automaton only
+-- when it changed instead of re-reading every keyword
+CREATE TABLE IF NOT EXISTS tag_keywords_version (
+    id BOOLEAN PRIMARY KEY DEFAULT true CHECK (id),
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT now()
+);
+INSERT INTO tag_keywords_version (id, version) VALUES (true, 0) ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_tag_keywords_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE tag_keywords_version SET version = version + 1, updated_at = now();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tag_keywords_changed ON tag_keywords;
+CREATE TRIGGER tag_keywords_changed
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON tag_keywords
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_tag_keywords_version();
+
+-- Deleting a tag removes its keywords through the cascade, which fires the trigger too
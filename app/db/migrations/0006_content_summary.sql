@@ -0,0 +1,6 @@
+-- Extractive summary of clean_content (see app/ingestion/summarizer.py). NULL until
+-- computed at ingestion or by `python -m app.ingestion.summarizer backfill`.
+-- Adding a nullable column without a default is a catalog-only change, also on the
+-- partitions, and create_content_partition copies it through LIKE content.
+
+ALTER TABLE content ADD COLUMN IF NOT EXISTS summary TEXT;
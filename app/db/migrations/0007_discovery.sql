@@ -0,0 +1,39 @@
+-- Feed and sitemap discovery (see app/ingestion/discovery.py).
+
+-- Validators of every fetched feed and sitemap, sent back as If-None-Match /
+-- If-Modified-Since so unchanged documents cost a 304
+CREATE TABLE IF NOT EXISTS discovery_feeds (
+    url TEXT PRIMARY KEY,
+    source_id INTEGER NOT NULL REFERENCES sources (id) ON DELETE CASCADE,
+    -- Sitemap index listing this sitemap; children are polled even when their index is unchanged
+    parent_url TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at TIMESTAMP,
+    last_status INTEGER,
+    urls_found INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_discovery_feeds_parent_url ON discovery_feeds (parent_url) WHERE parent_url IS NOT NULL;
+
+-- Every canonical article URL ever discovered: the seen-set and the crawl frontier.
+-- url_hash is the first 8 bytes of the BLAKE2b digest of the canonical URL, so the
+-- duplicate check is a primary key probe and workers keep no seen URLs in memory.
+CREATE TABLE IF NOT EXISTS frontier_urls (
+    url_hash BIGINT PRIMARY KEY,
+    url TEXT NOT NULL,
+    source_id INTEGER NOT NULL REFERENCES sources (id) ON DELETE CASCADE,
+    priority INTEGER NOT NULL DEFAULT 0,
+    published_at TIMESTAMP,
+    status VARCHAR(10) NOT NULL DEFAULT 'queued',  -- queued, claimed, done, failed
+    attempts INTEGER NOT NULL DEFAULT 0,
+    discovered_at TIMESTAMP NOT NULL DEFAULT now(),
+    claimed_at TIMESTAMP,
+    content_id INTEGER,
+    error TEXT
+);
+
+-- Only queued rows are indexed for claiming, in claim order
+CREATE INDEX IF NOT EXISTS ix_frontier_urls_queue
+    ON frontier_urls (priority DESC, published_at DESC NULLS LAST, discovered_at)
+    WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS ix_frontier_urls_claimed ON frontier_urls (claimed_at) WHERE status = 'claimed';
@@ -0,0 +1,5 @@
+-- When a blob was last written or reused by an insert (see app/db/blobs.py).
+-- Garbage collection skips recently touched blobs, so a body reused by a content
+-- row that is not committed yet is not deleted under it.
+
+ALTER TABLE content_blobs ADD COLUMN IF NOT EXISTS touched_at TIMESTAMP DEFAULT now();
@@ -1,34 +1,77 @@
-from sqlalchemy import Column, Integer, String, Text, Date, TIMESTAMP, ARRAY, ForeignKey, Table
-from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Date, TIMESTAMP, ARRAY, ForeignKey, Table, CHAR, LargeBinary, Index, BigInteger, Boolean, UniqueConstraint
+from sqlalchemy.sql import func, text
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.dialects.postgresql import JSONB
 from .database import Base
 
-# Association table for many-to-many relationship between content and tags
+# Association table for many-to-many relationship between content and tags.
+# content_id has no foreign key: content is partitioned and its primary key is (id, date).
 content_tags = Table(
     'content_tags',
     Base.metadata,
-    Column('content_id', Integer, ForeignKey('content.id'), primary_key=True),
-    Column('tag_id', Integer, ForeignKey('tags.id'), primary_key=True)
+    Column('content_id', Integer, primary_key=True),
+    Column('tag_id', Integer, ForeignKey('tags.id'), primary_key=True),
+    Index('ix_content_tags_tag_id', 'tag_id', 'content_id'),
 )
 
 class Content(Base):
-    """Content model for storing all types of content (articles, tweets, etc.)"""
+    """
+    Content model for storing all types of content (articles, tweets, etc.)
+
+    The table is range-partitioned by month on date (see app/db/partitions.py), so
+    queries should bound date whenever they can to let Postgres skip partitions.
+    """
     __tablename__ = "content"
+    __table_args__ = (
+        Index("ix_content_date_brin", "date", postgresql_using="brin", postgresql_with={"pages_per_range": 32}),
+        Index("ix_content_created_at_brin", "created_at", postgresql_using="brin", postgresql_with={"pages_per_range": 32}),
+        # Newest-first pages (BRIN cannot return rows in order)
+        Index("ix_content_date_id", text("date DESC"), text("id DESC")),
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    # The partition key has to be part of the primary key
+    id = Column(Integer, primary_key=True, autoincrement=True)
     source = Column(String(50), index=True)  # WSJ, Twitter, etc.
-    raw_content = Column(Text)
+    # Raw bodies live in the blob store (see app/db/blobs.py); raw_content is only
+    # set on rows written before it and is never loaded unless asked for
+    raw_content = deferred(Column(Text, nullable=True))
+    raw_hash = Column(CHAR(64), nullable=True, index=True)
     clean_content = Column(Text)
+    # Extractive summary of clean_content (see app/ingestion/summarizer.py)
+    summary = Column(Text, nullable=True)
     title = Column(String(255), nullable=True)
     url = Column(String(512), nullable=True)
-    date = Column(Date, index=True)
-    metadata = Column(JSONB, nullable=True)  # For additional source-specific data
+    date = Column(Date, primary_key=True)
+    # For additional source-specific data ("metadata" is reserved by the declarative API)
+    metadata_ = Column("metadata", JSONB, nullable=True)
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
     
     # Relationships
-    tags = relationship("Tag", secondary=content_tags, back_populates="content_items")
+    tags = relationship(
+        "Tag",
+        secondary=content_tags,
+        primaryjoin="Content.id == foreign(content_tags.c.content_id)",
+        secondaryjoin="Tag.id == foreign(content_tags.c.tag_id)",
+        back_populates="content_items",
+    )
+
+    # Fetch server-generated timestamps on insert instead of expiring them
+    __mapper_args__ = {"eager_defaults": True}
+
+class ContentBlob(Base):
+    """Compressed raw content body, keyed by the sha256 of its text"""
+    __tablename__ = "content_blobs"
+
+    hash = Column(CHAR(64), primary_key=True)
+    codec = Column(String(10), nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    size = Column(Integer, nullable=False)  # Uncompressed size in bytes
+    compressed_size = Column(Integer, nullable=False)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    # Last insert that wrote or reused the blob; garbage collection skips recent ones
+    touched_at = Column(TIMESTAMP, server_default=func.now())
 
 class Tag(Base):
     """Tags for categorizing content"""
@@ -39,7 +82,59 @@ class Tag(Base):
     created_at = Column(TIMESTAMP, server_default=func.now())
     
     # Relationships
-    content_items = relationship("Content", secondary=content_tags, back_populates="tags")
+    content_items = relationship(
+        "Content",
+        secondary=content_tags,
+        primaryjoin="Tag.id == foreign(content_tags.c.tag_id)",
+        secondaryjoin="Content.id == foreign(content_tags.c.content_id)",
+        back_populates="tags",
+    )
+
+    __mapper_args__ = {"eager_defaults": True}
+
+class TagStats(Base):
+    """Number of content entries per tag, maintained by app/db/stats.py"""
+    __tablename__ = "tag_stats"
+
+    tag_id = Column(Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True)
+    content_count = Column(BigInteger, nullable=False, default=0)
+    last_content_date = Column(Date, nullable=True)
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+class TagKeyword(Base):
+    """Keyword that tags content automatically (see app/ingestion/autotag.py)"""
+    __tablename__ = "tag_keywords"
+    __table_args__ = (UniqueConstraint("tag_id", "keyword", name="uq_tag_keywords_tag_keyword"),)
+
+    id = Column(Integer, primary_key=True)
+    tag_id = Column(Integer, ForeignKey("tags.id", ondelete="CASCADE"), nullable=False)
+    keyword = Column(String(200), nullable=False)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+class TagKeywordsVersion(Base):
+    """Single row counting changes to tag_keywords; bumped by a trigger"""
+    __tablename__ = "tag_keywords_version"
+
+    id = Column(Boolean, primary_key=True, default=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(TIMESTAMP, server_default=func.now())
+
+class SourceStats(Base):
+    """Number of content entries per source, maintained by app/db/stats.py"""
+    __tablename__ = "source_stats"
+
+    source = Column(String(50), primary_key=True)
+    content_count = Column(BigInteger, nullable=False, default=0)
+    last_content_date = Column(Date, nullable=True)
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+class DailyStats(Base):
+    """Number of content entries per day and source, maintained by app/db/stats.py"""
+    __tablename__ = "daily_stats"
+
+    day = Column(Date, primary_key=True)
+    source = Column(String(50), primary_key=True)
+    content_count = Column(BigInteger, nullable=False, default=0)
 
 class Source(Base):
     """Source configuration for data ingestion"""
@@ -51,4 +146,42 @@ class Source(Base):
     config = Column(JSONB)  # Configuration for the source
     is_active = Column(Integer, default=1)
     created_at = Column(TIMESTAMP, server_default=func.now())
-    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now()) 
\ No newline at end of file
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+class DiscoveryFeed(Base):
+    """Conditional GET state of a feed or sitemap (see app/ingestion/discovery.py)"""
+    __tablename__ = "discovery_feeds"
+
+    url = Column(Text, primary_key=True)
+    source_id = Column(Integer, ForeignKey("sources.id", ondelete="CASCADE"), nullable=False)
+    # Sitemap index listing this sitemap
+    parent_url = Column(Text, nullable=True, index=True)
+    etag = Column(Text, nullable=True)
+    last_modified = Column(Text, nullable=True)
+    fetched_at = Column(TIMESTAMP, nullable=True)
+    last_status = Column(Integer, nullable=True)
+    urls_found = Column(Integer, nullable=False, default=0)
+
+class FrontierUrl(Base):
+    """Discovered article URL: the seen-set and the crawl queue (see app/ingestion/discovery.py)"""
+    __tablename__ = "frontier_urls"
+    __table_args__ = (
+        Index(
+            "ix_frontier_urls_queue", text("priority DESC"), text("published_at DESC NULLS LAST"), "discovered_at",
+            postgresql_where=text("status = 'queued'"),
+        ),
+        Index("ix_frontier_urls_claimed", "claimed_at", postgresql_where=text("status = 'claimed'")),
+    )
+
+    # First 8 bytes of the BLAKE2b digest of the canonical URL
+    url_hash = Column(BigInteger, primary_key=True, autoincrement=False)
+    url = Column(Text, nullable=False)
+    source_id = Column(Integer, ForeignKey("sources.id", ondelete="CASCADE"), nullable=False)
+    priority = Column(Integer, nullable=False, default=0)
+    published_at = Column(TIMESTAMP, nullable=True)
+    status = Column(String(10), nullable=False, default="queued")  # queued, claimed, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    discovered_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+    claimed_at = Column(TIMESTAMP, nullable=True)
+    content_id = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
@@ -0,0 +1,189 @@
+"""
+Monthly range partitions of the content table.
+
+Migration 0003 partitions ``content`` by ``date`` into ``content_YYYY_MM`` tables plus
+``content_default`` for dates outside any partition. This module keeps partitions
+created ahead of time, drops expired ones and provides the date filter that query
+paths use so Postgres can prune partitions.
+
+Usage:
+    python -m app.db.partitions list
+    python -m app.db.partitions ensure [--months-ahead 3]
+    python -m app.db.partitions drop-before 2022-01-01
+"""
+import argparse
+import asyncio
+import logging
+import os
+import re
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+from app.db.database import engine
+from app.db.models import Content as ContentModel
+from app.db.stats import subtract_relation
+
+logger = logging.getLogger(__name__)
+
+CONTENT_PARTITION_MONTHS_AHEAD = int(os.getenv("CONTENT_PARTITION_MONTHS_AHEAD", "3"))
+CONTENT_RETENTION_MONTHS = int(os.getenv("CONTENT_RETENTION_MONTHS", "0"))  # 0 keeps everything
+CONTENT_PARTITION_MAINTENANCE = os.getenv("CONTENT_PARTITION_MAINTENANCE", "true").lower() == "true"
+CONTENT_PARTITION_INTERVAL_SECONDS = int(os.getenv("CONTENT_PARTITION_INTERVAL_SECONDS", "21600"))
+
+_PARTITION_NAME = re.compile(r"^content_(\d{4})_(\d{2})$")
+
+def month_start(day: date) -> date:
+    """Return the first day of the month containing day."""
+    return day.replace(day=1)
+
+def add_months(day: date, months: int) -> date:
+    """Return the first day of the month that is months after the one containing day."""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def date_range_filter(start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[Any]:
+    """
+    Build WHERE conditions for an inclusive date window on content.
+
+    Conditions compare the bare date column so the planner can prune partitions;
+    wrapping it in a function or cast would make it scan all of them.
+
+    Args:
+        start_date: First day to include
+        end_date: Last day to include
+
+    Returns:
+        List of SQLAlchemy conditions (empty when neither bound is given)
+    """
+    conditions = []
+    if start_date:
+        conditions.append(ContentModel.date >= start_date)
+    if end_date:
+        conditions.append(ContentModel.date <= end_date)
+    return conditions
+
+async def list_partitions(db_engine=engine) -> List[Dict[str, Any]]:
+    """
+    Return the partitions of content with their month, row estimate and size.
+
+    The default partition has month None.
+    """
+    async with db_engine.connect() as conn:
+        result = await conn.execute(text(
+            "SELECT c.relname AS name, c.reltuples::bigint AS rows, pg_total_relation_size(c.oid) AS bytes"
+            " FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid"
+            " WHERE i.inhparent = 'content'::regclass ORDER BY c.relname"
+        ))
+        partitions = []
+        for row in result:
+            match = _PARTITION_NAME.match(row.name)
+            partitions.append({
+                "name": row.name,
+                "month": date(int(match.group(1)), int(match.group(2)), 1) if match else None,
+                "rows": max(int(row.rows), 0),
+                "bytes": int(row.bytes),
+            })
+    return partitions
+
+async def ensure_partitions(db_engine=engine, months_ahead: int = CONTENT_PARTITION_MONTHS_AHEAD) -> List[str]:
+    """
+    Create the partitions for the current month and the next months_ahead months.
+
+    Existing partitions are left alone. Rows already sitting in the default partition
+    for a new month are moved into it (see create_content_partition in migration 0003).
+
+    Returns:
+        Names of the partitions covering those months
+    """
+    first = month_start(date.today())
+    names = []
+    async with db_engine.begin() as conn:
+        for offset in range(months_ahead + 1):
+            result = await conn.execute(
+                text("SELECT create_content_partition(:month)"), {"month": add_months(first, offset)}
+            )
+            names.append(result.scalar_one())
+    return names
+
+async def drop_partitions_before(cutoff: date, db_engine=engine) -> List[str]:
+    """
+    Drop the monthly partitions that end on or before cutoff.
+
+    Dropping a partition is a metadata operation, unlike a DELETE over the same rows.
+    Tag links and counters (app/db/stats.py) of the dropped rows are updated too;
+    their blobs are left for ``python -m app.db.blobs gc``. Old rows in the default
+    partition are deleted.
+
+    Args:
+        cutoff: Rows dated before the first day of cutoff's month are removed
+        db_engine: Async engine of the primary database
+
+    Returns:
+        Names of the dropped partitions
+    """
+    cutoff = month_start(cutoff)
+    dropped = []
+    for partition in await list_partitions(db_engine):
+        if partition["month"] is None or add_months(partition["month"], 1) > cutoff:
+            continue
+        name = partition["name"]
+        async with db_engine.begin() as conn:
+            await subtract_relation(conn, name)
+            await conn.execute(text(f'DELETE FROM content_tags WHERE content_id IN (SELECT id FROM "{name}")'))
+            await conn.execute(text(f'ALTER TABLE content DETACH PARTITION "{name}"'))
+            await conn.execute(text(f'DROP TABLE "{name}"'))
+        logger.info(f"Dropped content partition {name}")
+        dropped.append(name)
+
+    async with db_engine.begin() as conn:
+        await subtract_relation(conn, "content_default", cutoff)
+        await conn.execute(
+            text("DELETE FROM content_tags WHERE content_id IN (SELECT id FROM content_default WHERE date < :cutoff)"),
+            {"cutoff": cutoff},
+        )
+        await conn.execute(text("DELETE FROM content_default WHERE date < :cutoff"), {"cutoff": cutoff})
+    return dropped
+
+async def maintain_partitions(db_engine=engine):
+    """Create upcoming partitions and, if CONTENT_RETENTION_MONTHS is set, drop expired ones."""
+    await ensure_partitions(db_engine)
+    if CONTENT_RETENTION_MONTHS > 0:
+        await drop_partitions_before(add_months(date.today(), -CONTENT_RETENTION_MONTHS), db_engine)
+
+async def partition_maintenance_loop(db_engine=engine, interval: int = CONTENT_PARTITION_INTERVAL_SECONDS):
+    """Run maintain_partitions every interval seconds until cancelled."""
+    while True:
+        try:
+            await maintain_partitions(db_engine)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error maintaining content partitions: {str(e)}")
+        await asyncio.sleep(interval)
+
+async def _main(args):
+    try:
+        if args.command == "ensure":
+            names = await ensure_partitions(months_ahead=args.months_ahead)
+            print(f"Partitions ready: {', '.join(names)}")
+        elif args.command == "drop-before":
+            dropped = await drop_partitions_before(date.fromisoformat(args.cutoff))
+            print(f"Dropped {len(dropped)} partition(s)" + (f": {', '.join(dropped)}" if dropped else ""))
+        else:
+            for partition in await list_partitions():
+                print(f"{partition['name']:<20} {partition['rows']:>12} rows {partition['bytes']:>14} bytes")
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Manage monthly partitions of the content table")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="List partitions with row estimates and sizes")
+    ensure_parser = subparsers.add_parser("ensure", help="Create partitions for upcoming months")
+    ensure_parser.add_argument("--months-ahead", type=int, default=CONTENT_PARTITION_MONTHS_AHEAD)
+    drop_parser = subparsers.add_parser("drop-before", help="Drop partitions of months before a date")
+    drop_parser.add_argument("cutoff", help="ISO date; months before the one containing it are dropped")
+    asyncio.run(_main(parser.parse_args()))
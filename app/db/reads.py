@@ -0,0 +1,179 @@
+"""
+Read path for content listings, search and lookups.
+
+Queries select only the columns a response needs with Core ``select()`` (no ORM
+objects, identity map or lazy loads), and each row's tags come from a correlated
+``array_agg`` subquery in the same statement instead of one query per row. Rows are
+turned into plain dictionaries in the Content response shape and encoded with orjson
+by ``dumps``, without going through pydantic.
+
+``benchmarks/bench_reads.py`` compares this with the ORM path (``selectinload`` plus
+pydantic serialization).
+"""
+import logging
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import orjson
+from sqlalchemy import func, or_, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.blobs import load_raw_content
+from app.db.models import Content as ContentModel, Tag as TagModel, content_tags
+from app.db.partitions import date_range_filter
+
+logger = logging.getLogger(__name__)
+
+def tags_array():
+    """Correlated subquery with a content row's tags as an array of (id, name, created_at) records."""
+    return (
+        select(func.array_agg(aggregate_order_by(
+            func.row(TagModel.id, TagModel.name, TagModel.created_at),
+            TagModel.name,
+        )))
+        .select_from(content_tags.join(TagModel, TagModel.id == content_tags.c.tag_id))
+        .where(content_tags.c.content_id == ContentModel.id)
+        .scalar_subquery()
+    )
+
+def _content_columns(include_clean: bool = True) -> List[Any]:
+    columns = [
+        ContentModel.id,
+        ContentModel.source,
+        ContentModel.title,
+        ContentModel.url,
+        ContentModel.date,
+        ContentModel.summary,
+        ContentModel.metadata_.label("metadata"),
+        ContentModel.created_at,
+        ContentModel.updated_at,
+        tags_array().label("tags"),
+    ]
+    if include_clean:
+        columns.append(ContentModel.clean_content)
+    return columns
+
+def _filtered(query, source: Optional[str], tag: Optional[str], start_date: Optional[date], end_date: Optional[date]):
+    query = query.where(*date_range_filter(start_date, end_date))
+    if source:
+        query = query.where(ContentModel.source == source)
+    if tag:
+        query = query.where(ContentModel.id.in_(
+            select(content_tags.c.content_id)
+            .join(TagModel, TagModel.id == content_tags.c.tag_id)
+            .where(TagModel.name == tag)
+        ))
+    return query
+
+def _row_to_dict(row, raw_content: Optional[str] = None) -> Dict[str, Any]:
+    item = dict(row._mapping)
+    # asyncpg returns the records as tuples; array_agg over no tags is NULL
+    item["tags"] = [{"id": id, "name": name, "created_at": created_at} for id, name, created_at in item["tags"] or ()]
+    item["raw_content"] = raw_content or ""
+    item.setdefault("clean_content", None)
+    return item
+
+async def list_content(
+    db: AsyncSession,
+    source: Optional[str] = None,
+    tag: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    limit: int = 10,
+    offset: int = 0,
+    include_clean: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Return a page of content with tags, newest first.
+
+    Raw bodies are never loaded for listings; raw_content is empty.
+
+    Args:
+        db: Database session
+        source: Only this source
+        tag: Only content with this tag
+        start_date: First day to include (bounding the window lets Postgres skip partitions)
+        end_date: Last day to include
+        limit: Page size
+        offset: Rows to skip
+        include_clean: Also return clean_content
+
+    Returns:
+        Dictionaries in the Content response shape
+    """
+    query = _filtered(select(*_content_columns(include_clean)), source, tag, start_date, end_date)
+    query = query.order_by(ContentModel.date.desc(), ContentModel.id.desc()).limit(limit).offset(offset)
+    return [_row_to_dict(row) for row in await db.execute(query)]
+
+def _like_pattern(keyword: str) -> str:
+    escaped = keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+async def search_content(
+    db: AsyncSession,
+    keyword: str,
+    source: Optional[str] = None,
+    tag: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    limit: int = 10,
+    offset: int = 0,
+    include_clean: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Return content whose title or clean text contains keyword (case-insensitive), newest first.
+
+    There is no text index, so matching scans the rows in the date window; searches
+    should give start_date/end_date on large tables.
+
+    Args:
+        db: Database session
+        keyword: Text to look for
+        Other arguments as for list_content
+
+    Returns:
+        Dictionaries in the Content response shape
+    """
+    pattern = _like_pattern(keyword)
+    query = _filtered(select(*_content_columns(include_clean)), source, tag, start_date, end_date).where(or_(
+        ContentModel.title.ilike(pattern, escape="\\"),
+        ContentModel.clean_content.ilike(pattern, escape="\\"),
+    ))
+    query = query.order_by(ContentModel.date.desc(), ContentModel.id.desc()).limit(limit).offset(offset)
+    return [_row_to_dict(row) for row in await db.execute(query)]
+
+async def get_content(db: AsyncSession, content_id: int, content_date: Optional[date] = None) -> Optional[Dict[str, Any]]:
+    """
+    Return one content entry with tags and its raw body, or None.
+
+    Args:
+        db: Database session
+        content_id: Content id
+        content_date: The entry's date, if known; limits the lookup to one partition
+    """
+    query = select(*_content_columns(), ContentModel.raw_hash).where(ContentModel.id == content_id)
+    if content_date:
+        query = query.where(ContentModel.date == content_date)
+    row = (await db.execute(query)).first()
+    if row is None:
+        return None
+    item = _row_to_dict(row, await load_raw_content(db, row))
+    del item["raw_hash"]
+    return item
+
+def tool_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact form of a content dictionary for MCP tool results (tag names, ISO date)."""
+    return {
+        "id": item["id"],
+        "title": item["title"],
+        "source": item["source"],
+        "url": item["url"],
+        "date": item["date"].isoformat(),
+        "summary": item["summary"],
+        "tags": [tag["name"] for tag in item["tags"]],
+    }
+
+def dumps(value: Any) -> bytes:
+    """Encode rows from this module as JSON (dates and datetimes in ISO format)."""
+    return orjson.dumps(value)
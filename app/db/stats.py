@@ -0,0 +1,215 @@
+"""
+Incrementally maintained content counters.
+
+``tag_stats``, ``source_stats`` and ``daily_stats`` are updated in the same transaction
+as the content rows they count, so tag listings and the content_stats MCP tool read
+one row per group instead of aggregating ``content``. Counter rows stay locked until
+the writing transaction commits; keys are always upserted in sorted order so
+concurrent writers queue instead of deadlocking.
+"""
+import logging
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.db.models import DailyStats, SourceStats, Tag as TagModel, TagStats
+
+logger = logging.getLogger(__name__)
+
+# (source, date, tag ids) of one content entry
+StatsEntry = Tuple[Optional[str], date, List[int]]
+
+# Days reported by content_stats when no date window is given
+DEFAULT_STATS_DAYS = 30
+
+def _upsert_counts(model, key_columns: List[str], rows: List[Dict[str, Any]], with_last_date: bool):
+    statement = insert(model).values(rows)
+    updates = {"content_count": model.content_count + statement.excluded.content_count}
+    if with_last_date:
+        # greatest() ignores NULL, so decrements (last_content_date NULL) leave it alone
+        updates["last_content_date"] = func.greatest(model.last_content_date, statement.excluded.last_content_date)
+        updates["updated_at"] = func.now()
+    return statement.on_conflict_do_update(index_elements=key_columns, set_=updates)
+
+async def record_content(db: AsyncSession, entries: Iterable[StatsEntry], sign: int = 1):
+    """
+    Add content entries to (or, with sign=-1, remove them from) the counters.
+
+    Args:
+        db: Session whose transaction wrote the content rows
+        entries: (source, date, tag ids) per content entry
+        sign: 1 for new entries, -1 for deleted ones
+    """
+    sources: Dict[str, List] = {}
+    days: Dict[Tuple[date, str], int] = {}
+    links: List[Tuple[int, date]] = []
+    for source, day, tag_ids in entries:
+        source = source or ""
+        last = day if sign > 0 else None
+        counts = sources.setdefault(source, [0, None])
+        counts[0] += sign
+        counts[1] = max(filter(None, [counts[1], last]), default=None)
+        days[(day, source)] = days.get((day, source), 0) + sign
+        links.extend((tag_id, day) for tag_id in set(tag_ids))
+    if not sources:
+        return
+
+    # Sorted keys give every writer the same lock order
+    await db.execute(_upsert_counts(SourceStats, ["source"], [
+        {"source": source, "content_count": count, "last_content_date": last}
+        for source, (count, last) in sorted(sources.items())
+    ], with_last_date=True))
+    await db.execute(_upsert_counts(DailyStats, ["day", "source"], [
+        {"day": day, "source": source, "content_count": count}
+        for (day, source), count in sorted(days.items())
+    ], with_last_date=False))
+    await record_tag_links(db, links, sign)
+
+async def record_tag_links(db: AsyncSession, links: Iterable[Tuple[int, date]], sign: int = 1):
+    """
+    Count tag links added to (or, with sign=-1, removed from) existing content.
+
+    Only tag_stats changes; use record_content for new or deleted content rows.
+
+    Args:
+        db: Session whose transaction wrote the links
+        links: (tag id, content date) per link
+        sign: 1 for new links, -1 for deleted ones
+    """
+    tags: Dict[int, List] = {}
+    for tag_id, day in links:
+        last = day if sign > 0 else None
+        counts = tags.setdefault(tag_id, [0, None])
+        counts[0] += sign
+        counts[1] = max(filter(None, [counts[1], last]), default=None)
+    if tags:
+        await db.execute(_upsert_counts(TagStats, ["tag_id"], [
+            {"tag_id": tag_id, "content_count": count, "last_content_date": last}
+            for tag_id, (count, last) in sorted(tags.items())
+        ], with_last_date=True))
+
+async def subtract_relation(conn: AsyncConnection, relation: str, cutoff: Optional[date] = None):
+    """
+    Remove the rows of a content partition from the counters before it is dropped.
+
+    Args:
+        conn: Connection in the transaction that drops the rows
+        relation: Partition table name (e.g. content_2023_01 or content_default)
+        cutoff: Only count rows dated before this day
+    """
+    condition = "WHERE c.date < :cutoff" if cutoff else ""
+    params = {"cutoff": cutoff} if cutoff else {}
+    await conn.execute(text(
+        f'WITH gone AS (SELECT COALESCE(c.source, \'\') AS source, count(*) AS n FROM "{relation}" c {condition} GROUP BY 1) '
+        "UPDATE source_stats s SET content_count = s.content_count - gone.n, updated_at = now() "
+        "FROM gone WHERE s.source = gone.source"
+    ), params)
+    await conn.execute(text(
+        f'WITH gone AS (SELECT c.date AS day, COALESCE(c.source, \'\') AS source, count(*) AS n FROM "{relation}" c {condition} GROUP BY 1, 2) '
+        "UPDATE daily_stats d SET content_count = d.content_count - gone.n "
+        "FROM gone WHERE d.day = gone.day AND d.source = gone.source"
+    ), params)
+    await conn.execute(text("DELETE FROM daily_stats WHERE content_count <= 0"))
+    await conn.execute(text(
+        f'WITH gone AS (SELECT ct.tag_id, count(*) AS n FROM content_tags ct JOIN "{relation}" c ON c.id = ct.content_id {condition} GROUP BY 1) '
+        "UPDATE tag_stats t SET content_count = t.content_count - gone.n, updated_at = now() "
+        "FROM gone WHERE t.tag_id = gone.tag_id"
+    ), params)
+
+async def list_tag_counts(db: AsyncSession) -> List[Dict[str, Any]]:
+    """Return every tag with its content count, most used first."""
+    result = await db.execute(
+        select(
+            TagModel.id,
+            TagModel.name,
+            TagModel.created_at,
+            func.coalesce(TagStats.content_count, 0).label("content_count"),
+            TagStats.last_content_date,
+        )
+        .outerjoin(TagStats, TagStats.tag_id == TagModel.id)
+        .order_by(func.coalesce(TagStats.content_count, 0).desc(), TagModel.name)
+    )
+    return [dict(row._mapping) for row in result]
+
+async def content_stats(
+    db: AsyncSession,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    source: Optional[str] = None,
+    top_tags: int = 10,
+) -> Dict[str, Any]:
+    """
+    Summarize content counts by source, day and tag from the counters.
+
+    Source totals cover the date window when one is given and all time otherwise.
+    Daily counts cover the window, or the last DEFAULT_STATS_DAYS days. Tag counts are
+    all time.
+
+    Args:
+        db: Database session
+        start_date: First day of the window
+        end_date: Last day of the window
+        source: Only count this source
+        top_tags: Number of most used tags to return
+
+    Returns:
+        Dictionary with total, by_source, by_day and top_tags
+    """
+    windowed = start_date is not None or end_date is not None
+    if windowed:
+        query = select(
+            DailyStats.source,
+            func.sum(DailyStats.content_count).label("content_count"),
+            func.max(DailyStats.day).label("last_content_date"),
+        )
+        if start_date:
+            query = query.where(DailyStats.day >= start_date)
+        if end_date:
+            query = query.where(DailyStats.day <= end_date)
+        if source is not None:
+            query = query.where(DailyStats.source == source)
+        query = query.group_by(DailyStats.source)
+    else:
+        query = select(SourceStats.source, SourceStats.content_count, SourceStats.last_content_date)
+        if source is not None:
+            query = query.where(SourceStats.source == source)
+    by_source = [
+        {"source": row.source, "count": int(row.content_count), "last_date": row.last_content_date}
+        for row in await db.execute(query)
+        if row.content_count > 0
+    ]
+    by_source.sort(key=lambda item: (-item["count"], item["source"]))
+
+    day_end = end_date or date.today()
+    day_start = start_date or day_end - timedelta(days=DEFAULT_STATS_DAYS - 1)
+    query = (
+        select(DailyStats.day, func.sum(DailyStats.content_count).label("content_count"))
+        .where(DailyStats.day >= day_start, DailyStats.day <= day_end)
+        .group_by(DailyStats.day)
+        .order_by(DailyStats.day)
+    )
+    if source is not None:
+        query = query.where(DailyStats.source == source)
+    by_day = [{"date": row.day, "count": int(row.content_count)} for row in await db.execute(query)]
+
+    result = await db.execute(
+        select(TagModel.name, TagStats.content_count, TagStats.last_content_date)
+        .join(TagStats, TagStats.tag_id == TagModel.id)
+        .where(TagStats.content_count > 0)
+        .order_by(TagStats.content_count.desc(), TagModel.name)
+        .limit(top_tags)
+    )
+    tags = [
+        {"tag": row.name, "count": int(row.content_count), "last_date": row.last_content_date}
+        for row in result
+    ]
+
+    return {
+        "total": sum(item["count"] for item in by_source),
+        "by_source": by_source,
+        "by_day": by_day,
+        "top_tags": tags,
+    }
@@ -0,0 +1,316 @@
+"""
+Automatic tagging of content by keyword.
+
+The keyword dictionary (``tag_keywords``, migration 0005) maps keywords and phrases
+to tags. It is compiled into an Aho-Corasick automaton over word tokens, so every
+keyword is found in one linear pass over a document's tokens however many keywords
+there are, and keywords only ever match whole words (case-insensitively).
+
+Each worker keeps its automaton in memory and checks ``tag_keywords_version``, which
+a trigger bumps on every change to the dictionary, at most every
+AUTOTAG_REFRESH_SECONDS. The automaton is only rebuilt when the version changed.
+
+Usage:
+    python -m app.ingestion.autotag list
+    python -m app.ingestion.autotag load keywords.csv [--replace]   # rows of tag,keyword
+    python -m app.ingestion.autotag backfill [--source WSJ] [--start-date 2024-01-01] [--end-date 2024-12-31]
+"""
+import argparse
+import asyncio
+import csv
+import logging
+import os
+import re
+import time
+from collections import deque
+from datetime import date
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Content as ContentModel, Tag as TagModel, TagKeyword, TagKeywordsVersion, content_tags
+from app.db.partitions import date_range_filter
+from app.db.stats import record_tag_links
+
+logger = logging.getLogger(__name__)
+
+AUTOTAG_ENABLED = os.getenv("AUTOTAG_ENABLED", "true").lower() == "true"
+# Seconds between checks of the dictionary version
+AUTOTAG_REFRESH_SECONDS = float(os.getenv("AUTOTAG_REFRESH_SECONDS", "30"))
+# Batches with more text than this are scanned in a worker thread
+_THREAD_THRESHOLD = 64 * 1024
+
+_TOKEN = re.compile(r"\w+")
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lower-cased word tokens, the unit keywords are matched on."""
+    return _TOKEN.findall(text.casefold())
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over word tokens.
+
+    States form a trie of keyword token sequences; failure links point to the longest
+    proper suffix that is also a trie path, so matching never backs up in the text.
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, int]]):
+        """
+        Args:
+            keywords: (keyword, tag id) pairs; a keyword may map to several tags
+        """
+        goto: List[Dict[str, int]] = [{}]
+        own: List[Set[int]] = [set()]
+        self.keyword_count = 0
+        for keyword, tag_id in keywords:
+            tokens = tokenize(keyword)
+            if not tokens:
+                continue
+            state = 0
+            for token in tokens:
+                child = goto[state].get(token)
+                if child is None:
+                    child = len(goto)
+                    goto[state][token] = child
+                    goto.append({})
+                    own.append(set())
+                state = child
+            own[state].add(tag_id)
+            self.keyword_count += 1
+
+        # Breadth-first, so a state's failure target is finished before the state itself
+        fail = [0] * len(goto)
+        output: List[FrozenSet[int]] = [frozenset()] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            output[state] = frozenset(own[state] | output[fail[state]])
+            for token, child in goto[state].items():
+                target = fail[state]
+                while target and token not in goto[target]:
+                    target = fail[target]
+                fail[child] = goto[target].get(token, 0)
+                queue.append(child)
+
+        self._goto = goto
+        self._fail = fail
+        self._output = output
+
+    def __len__(self) -> int:
+        return self.keyword_count
+
+    def match(self, text: Optional[str]) -> Set[int]:
+        """Return the tag ids of every keyword occurring in text."""
+        found: Set[int] = set()
+        if not text:
+            return found
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for token in tokenize(text):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+    def match_many(self, texts: List[Optional[str]]) -> List[Set[int]]:
+        return [self.match(text) for text in texts]
+
+class AutoTagger:
+    """Per-worker cache of the compiled keyword dictionary"""
+
+    def __init__(self):
+        self.automaton: Optional[KeywordAutomaton] = None
+        self.tag_names: Dict[int, str] = {}
+        self.version: Optional[int] = None
+        self.checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def refresh(self, db: AsyncSession, force: bool = False) -> Optional[KeywordAutomaton]:
+        """
+        Return the automaton, rebuilding it if the dictionary changed since it was built.
+
+        Returns:
+            The automaton, or None when the dictionary is empty
+        """
+        if not force and self.version is not None and time.monotonic() - self.checked_at < AUTOTAG_REFRESH_SECONDS:
+            return self.automaton
+        async with self._lock:
+            version = (await db.execute(select(TagKeywordsVersion.version))).scalar() or 0
+            if force or version != self.version:
+                result = await db.execute(
+                    select(TagKeyword.keyword, TagKeyword.tag_id, TagModel.name)
+                    .join(TagModel, TagModel.id == TagKeyword.tag_id)
+                )
+                rows = result.all()
+                started = time.perf_counter()
+                automaton = await asyncio.to_thread(KeywordAutomaton, [(row.keyword, row.tag_id) for row in rows])
+                self.automaton = automaton if len(automaton) else None
+                self.tag_names = {row.tag_id: row.name for row in rows}
+                self.version = version
+                logger.info(
+                    f"Built keyword automaton v{version}: {len(automaton)} keywords, "
+                    f"{len(self.tag_names)} tags in {time.perf_counter() - started:.3f}s"
+                )
+            self.checked_at = time.monotonic()
+        return self.automaton
+
+    async def match_ids(self, db: AsyncSession, texts: List[Optional[str]]) -> List[Set[int]]:
+        """Return the matching tag ids for each text."""
+        automaton = await self.refresh(db)
+        if automaton is None:
+            return [set() for _ in texts]
+        if sum(len(text or "") for text in texts) > _THREAD_THRESHOLD:
+            return await asyncio.to_thread(automaton.match_many, texts)
+        return automaton.match_many(texts)
+
+    async def match_names(self, db: AsyncSession, texts: List[Optional[str]]) -> List[List[str]]:
+        """Return the matching tag names for each text, sorted."""
+        return [sorted(self.tag_names[tag_id] for tag_id in ids) for ids in await self.match_ids(db, texts)]
+
+auto_tagger = AutoTagger()
+
+async def auto_tags(db: AsyncSession, texts: List[Optional[str]]) -> List[List[str]]:
+    """
+    Return the keyword tags of each text, or empty lists when AUTOTAG_ENABLED is off.
+
+    Args:
+        db: Database session (used to check and load the dictionary)
+        texts: Clean content of each entry
+
+    Returns:
+        Tag names per text
+    """
+    if not AUTOTAG_ENABLED or not texts:
+        return [[] for _ in texts]
+    return await auto_tagger.match_names(db, texts)
+
+async def load_keywords(db: AsyncSession, pairs: List[Tuple[str, str]], replace: bool = False) -> int:
+    """
+    Add (tag, keyword) pairs to the dictionary, creating missing tags.
+
+    Args:
+        db: Database session (primary); the caller commits
+        pairs: (tag name, keyword) pairs
+        replace: Also remove keywords of the listed tags that are not in pairs
+
+    Returns:
+        Number of keywords added
+    """
+    from app.db.crud import get_or_create_tags
+
+    tags = {tag.name: tag.id for tag in await get_or_create_tags(db, [tag for tag, _ in pairs])}
+    wanted = sorted({(tags[tag.strip()], keyword.strip()) for tag, keyword in pairs if tag.strip() in tags and keyword.strip()})
+    if replace and tags:
+        statement = delete(TagKeyword).where(TagKeyword.tag_id.in_(list(tags.values())))
+        if wanted:
+            statement = statement.where(tuple_(TagKeyword.tag_id, TagKeyword.keyword).not_in(wanted))
+        await db.execute(statement)
+    if not wanted:
+        return 0
+    result = await db.execute(
+        insert(TagKeyword).on_conflict_do_nothing(index_elements=["tag_id", "keyword"]).returning(TagKeyword.id),
+        [{"tag_id": tag_id, "keyword": keyword} for tag_id, keyword in wanted],
+    )
+    return len(result.all())
+
+async def backfill(
+    db: AsyncSession,
+    source: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    batch_size: int = 1000,
+) -> Tuple[int, int]:
+    """
+    Apply the keyword dictionary to existing content, one batch per transaction.
+
+    Rows are walked in (date, id) order with keyset pagination. Only missing tag links
+    are added, so the backfill can be re-run after the dictionary changes.
+
+    Returns:
+        (rows scanned, tag links added)
+    """
+    automaton = await auto_tagger.refresh(db, force=True)
+    if automaton is None:
+        return 0, 0
+    scanned = added = 0
+    last = None
+    while True:
+        query = (
+            select(ContentModel.id, ContentModel.date, ContentModel.clean_content)
+            .where(*date_range_filter(start_date, end_date))
+            .order_by(ContentModel.date, ContentModel.id)
+            .limit(batch_size)
+        )
+        if source:
+            query = query.where(ContentModel.source == source)
+        if last:
+            query = query.where(tuple_(ContentModel.date, ContentModel.id) > last)
+        rows = (await db.execute(query)).all()
+        if not rows:
+            break
+        last = (rows[-1].date, rows[-1].id)
+        matches = await asyncio.to_thread(automaton.match_many, [row.clean_content for row in rows])
+        links = [{"content_id": row.id, "tag_id": tag_id} for row, ids in zip(rows, matches) for tag_id in sorted(ids)]
+        if links:
+            result = await db.execute(
+                insert(content_tags).on_conflict_do_nothing().returning(content_tags.c.content_id, content_tags.c.tag_id),
+                links,
+            )
+            dates = {row.id: row.date for row in rows}
+            new_links = [(link.tag_id, dates[link.content_id]) for link in result]
+            await record_tag_links(db, new_links)
+            added += len(new_links)
+        await db.commit()
+        scanned += len(rows)
+        logger.info(f"Auto-tagged {scanned} rows, {added} links added")
+    return scanned, added
+
+async def _main(args):
+    from app.db.database import async_session, engine
+
+    try:
+        async with async_session() as db:
+            if args.command == "load":
+                with open(args.file, newline="", encoding="utf-8") as f:
+                    pairs = [(row[0], row[1]) for row in csv.reader(f) if len(row) >= 2]
+                added = await load_keywords(db, pairs, replace=args.replace)
+                await db.commit()
+                print(f"Added {added} keywords")
+            elif args.command == "backfill":
+                scanned, added = await backfill(
+                    db,
+                    source=args.source,
+                    start_date=date.fromisoformat(args.start_date) if args.start_date else None,
+                    end_date=date.fromisoformat(args.end_date) if args.end_date else None,
+                    batch_size=args.batch_size,
+                )
+                print(f"Scanned {scanned} rows, added {added} tag links")
+            else:
+                result = await db.execute(
+                    select(TagModel.name, TagKeyword.keyword)
+                    .join(TagKeyword, TagKeyword.tag_id == TagModel.id)
+                    .order_by(TagModel.name, TagKeyword.keyword)
+                )
+                for row in result:
+                    print(f"{row.name}\t{row.keyword}")
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Manage keyword auto-tagging")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="List keywords by tag")
+    load_parser = subparsers.add_parser("load", help="Add keywords from a CSV file of tag,keyword rows")
+    load_parser.add_argument("file")
+    load_parser.add_argument("--replace", action="store_true", help="Remove other keywords of the listed tags")
+    backfill_parser = subparsers.add_parser("backfill", help="Tag existing content")
+    backfill_parser.add_argument("--source")
+    backfill_parser.add_argument("--start-date", help="ISO date")
+    backfill_parser.add_argument("--end-date", help="ISO date")
+    backfill_parser.add_argument("--batch-size", type=int, default=1000)
+    asyncio.run(_main(parser.parse_args()))
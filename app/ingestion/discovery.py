@@ -0,0 +1,630 @@
+"""
+Article discovery from RSS/Atom feeds and sitemaps, and the crawl frontier.
+
+Web sources list their feeds and sitemaps in their config:
+
+    {"feeds": ["https://example.com/rss.xml", "https://example.com/sitemap.xml"],
+     "selectors": {"title_selector": "h1", "content_selector": "article", "date_selector": "time"},
+     "tags": ["news"], "priority": 10, "url_pattern": "/\\d{4}/\\d{2}/", "max_age_days": 7,
+     "rate_limit": {"requests_per_second": 0.5, "burst": 2}}
+
+``discover`` fetches each feed with a conditional GET (ETag / Last-Modified from
+``discovery_feeds``), follows sitemap indexes, and parses the XML incrementally as it
+arrives. Found URLs are canonicalized and inserted into ``frontier_urls`` keyed by a
+64-bit hash of the canonical URL; the primary key is the seen-set, so a URL is queued
+once however often feeds repeat it, and workers hold no seen URLs in memory.
+
+``crawl`` claims the best queued URLs (source priority, then newest first) with
+``FOR UPDATE SKIP LOCKED``, so several workers can crawl at once, scrapes them with
+``WebScraper.scrape_url`` (spaced per host by the politeness limiter) and stores the
+content. Failed URLs are retried up to DISCOVERY_MAX_ATTEMPTS times.
+
+Usage:
+    python -m app.ingestion.discovery discover [--source WSJ]
+    python -m app.ingestion.discovery crawl [--limit 50]
+    python -m app.ingestion.discovery stats
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import xml.etree.ElementTree as ET
+import zlib
+from collections import deque
+from datetime import date, datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote_plus, urljoin, urlsplit, urlunsplit
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import DiscoveryFeed, FrontierUrl, Source as SourceModel
+from app.ingestion.politeness import parse_retry_after, politeness_limiter, source_rate
+
+logger = logging.getLogger(__name__)
+
+DISCOVERY_ENABLED = os.getenv("DISCOVERY_ENABLED", "false").lower() == "true"
+# Seconds between feed polls of the discovery loop
+DISCOVERY_INTERVAL_SECONDS = int(os.getenv("DISCOVERY_INTERVAL_SECONDS", "900"))
+# URLs claimed and scraped per crawl batch
+DISCOVERY_CRAWL_BATCH = int(os.getenv("DISCOVERY_CRAWL_BATCH", "20"))
+DISCOVERY_SCRAPE_CONCURRENCY = int(os.getenv("DISCOVERY_SCRAPE_CONCURRENCY", "4"))
+DISCOVERY_MAX_ATTEMPTS = int(os.getenv("DISCOVERY_MAX_ATTEMPTS", "3"))
+# Claims older than this are assumed lost with their worker and queued again
+DISCOVERY_CLAIM_TIMEOUT_SECONDS = int(os.getenv("DISCOVERY_CLAIM_TIMEOUT_SECONDS", "900"))
+# Sitemaps may be up to 50 MB uncompressed; anything past this is ignored
+DISCOVERY_MAX_FEED_BYTES = int(os.getenv("DISCOVERY_MAX_FEED_BYTES", str(50 * 1024 * 1024)))
+# Child sitemaps followed per source and run
+DISCOVERY_MAX_SITEMAPS = int(os.getenv("DISCOVERY_MAX_SITEMAPS", "100"))
+DISCOVERY_TIMEOUT_SECONDS = float(os.getenv("DISCOVERY_TIMEOUT_SECONDS", "30"))
+DISCOVERY_USER_AGENT = os.getenv("DISCOVERY_USER_AGENT", "MCP-Server/0.1 (+feed discovery)")
+
+# content.url is VARCHAR(512)
+_MAX_URL_LENGTH = 512
+_INSERT_CHUNK = 1000
+
+# Query parameters that only track the click, never select the document
+_TRACKING_PARAM = re.compile(r"^(utm_\w+|fbclid|gclid|dclid|msclkid|yclid|mc_cid|mc_eid|igshid|_ga|_hsenc|_hsmi|ref_src)$", re.IGNORECASE)
+_PERCENT_ESCAPE = re.compile(r"%([0-9A-Fa-f]{2})")
+_UNRESERVED = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~")
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_ABSOLUTE_URL = re.compile(r"https?://", re.IGNORECASE)
+
+def _normalize_escapes(value: str, safe: str) -> str:
+    # Decode escaped unreserved characters, upper-case the remaining escapes and
+    # escape anything else that is not allowed as is
+    value = _PERCENT_ESCAPE.sub(
+        lambda m: chr(int(m.group(1), 16)) if chr(int(m.group(1), 16)) in _UNRESERVED else "%" + m.group(1).upper(),
+        value,
+    )
+    return quote(value, safe=safe + "%")
+
+def _remove_dot_segments(path: str) -> str:
+    output: List[str] = []
+    segments = path.split("/")
+    for index, segment in enumerate(segments):
+        if segment == ".":
+            if index == len(segments) - 1:
+                output.append("")
+        elif segment == "..":
+            if len(output) > 1:
+                output.pop()
+            if index == len(segments) - 1:
+                output.append("")
+        else:
+            output.append(segment)
+    return "/".join(output)
+
+def canonicalize_url(url: Optional[str], base: Optional[str] = None) -> Optional[str]:
+    """
+    Return the canonical form of an http(s) URL, or None if it is not one.
+
+    Relative URLs are resolved against base. The scheme and host are lower-cased
+    (internationalized hosts IDNA-encoded), default ports, user info and fragments
+    dropped, dot segments removed, percent escapes normalized, tracking parameters
+    (utm_*, fbclid, ...) removed and the remaining query parameters sorted.
+    """
+    if not url:
+        return None
+    url = url.strip()
+    if base and not _ABSOLUTE_URL.match(url):
+        url = urljoin(base, url)
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    if scheme not in _DEFAULT_PORTS or not host:
+        return None
+    try:
+        host = host.encode("idna").decode("ascii")
+    except UnicodeError:
+        return None
+    if ":" in host:
+        host = f"[{host}]"
+    netloc = host if port is None or port == _DEFAULT_PORTS[scheme] else f"{host}:{port}"
+    path = _normalize_escapes(_remove_dot_segments(parts.path), "/:@!$&'()*+,;=") or "/"
+    # Pairs are kept as written (a bare "?print" must not become "?print="), only re-escaped
+    pairs = [_normalize_escapes(pair, "/:@!$'()*+,;=?") for pair in parts.query.split("&") if pair]
+    query = "&".join(sorted(
+        (pair for pair in pairs if not _TRACKING_PARAM.match(unquote_plus(pair.partition("=")[0]))),
+        key=lambda pair: pair.partition("="),
+    ))
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+def url_hash(canonical_url: str) -> int:
+    """Return the signed 64-bit key of a canonical URL in frontier_urls."""
+    return int.from_bytes(hashlib.blake2b(canonical_url.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse an RFC 822 (RSS) or W3C/ISO 8601 (Atom, sitemaps) date as naive UTC."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def _local_name(tag: Any) -> str:
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+def _child_text(element: ET.Element, *names: str) -> Optional[str]:
+    for child in element.iter():
+        if child is not element and _local_name(child.tag) in names and child.text and child.text.strip():
+            return child.text.strip()
+    return None
+
+class FeedParser:
+    """
+    Incremental parser for RSS 2.0/1.0, Atom, sitemaps and sitemap indexes.
+
+    Bytes are fed as they are downloaded (gzip-compressed sitemaps are inflated on the
+    fly). Each item is handled when its end tag arrives and then removed from the
+    tree, so memory does not grow with the number of entries.
+    """
+
+    # Entry element of each document type, by root element
+    _ENTRY_TAGS = {"rss": "item", "RDF": "item", "feed": "entry", "urlset": "url", "sitemapindex": "sitemap"}
+
+    def __init__(self, base_url: str, max_bytes: int = DISCOVERY_MAX_FEED_BYTES):
+        self.base_url = base_url
+        self.max_bytes = max_bytes
+        self.kind: Optional[str] = None
+        # (canonical URL, published or last modified)
+        self.entries: List[Tuple[str, Optional[datetime]]] = []
+        # Child sitemaps listed by a sitemap index
+        self.sitemaps: List[str] = []
+        self.truncated = False
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._stack: List[ET.Element] = []
+        self._inflate = None
+        self._started = False
+        self._size = 0
+
+    def feed(self, data: bytes):
+        if self.truncated or not data:
+            return
+        if not self._started:
+            self._started = True
+            if data[:2] == b"\x1f\x8b":
+                self._inflate = zlib.decompressobj(wbits=31)
+        if self._inflate is not None:
+            data = self._inflate.decompress(data, max(self.max_bytes - self._size, 0) + 1)
+        if self._size + len(data) > self.max_bytes:
+            data = data[:self.max_bytes - self._size]
+            self.truncated = True
+            logger.warning(f"Feed {self.base_url} is larger than {self.max_bytes} bytes, ignoring the rest")
+        self._size += len(data)
+        self._parser.feed(data)
+        self._drain()
+
+    def close(self):
+        if not self.truncated:
+            self._parser.close()
+            self._drain()
+
+    def _drain(self):
+        for event, element in self._parser.read_events():
+            if event == "start":
+                if self.kind is None:
+                    self.kind = _local_name(element.tag)
+                self._stack.append(element)
+                continue
+            self._stack.pop()
+            name = _local_name(element.tag)
+            if name != self._ENTRY_TAGS.get(self.kind):
+                continue
+            self._handle(name, element)
+            # Entries are always the last child of their parent when they end
+            if self._stack and len(self._stack[-1]) and self._stack[-1][-1] is element:
+                del self._stack[-1][-1]
+
+    def _handle(self, name: str, element: ET.Element):
+        if name == "entry":
+            link = None
+            for child in element:
+                if _local_name(child.tag) == "link" and child.get("rel", "alternate") == "alternate" and child.get("href"):
+                    link = child.get("href")
+                    break
+            published = _child_text(element, "published", "updated")
+        elif name == "item":
+            link = _child_text(element, "link")
+            if not link:
+                for child in element:
+                    if _local_name(child.tag) == "guid" and child.get("isPermaLink", "true") != "false":
+                        link = (child.text or "").strip()
+            published = _child_text(element, "pubDate", "date", "published", "updated")
+        else:
+            link = _child_text(element, "loc")
+            published = _child_text(element, "publication_date", "lastmod")
+        url = canonicalize_url(link, self.base_url)
+        if not url:
+            return
+        if name == "sitemap":
+            self.sitemaps.append(url)
+        else:
+            self.entries.append((url, _parse_timestamp(published)))
+
+async def fetch_feed(
+    client, db: AsyncSession, source_id: int, url: str, rate: Tuple[float, int], parent_url: Optional[str] = None
+) -> Tuple[Optional[int], Optional[FeedParser]]:
+    """
+    Fetch and parse one feed or sitemap with a conditional GET.
+
+    The validators of the previous response are sent back and the new ones stored.
+    The fetch waits for the host's politeness limiter; a 429/503 blocks the host for
+    its Retry-After and the feed is skipped until the next run.
+
+    Returns:
+        (HTTP status or None on network errors, the parsed feed or None unless it was fetched)
+    """
+    state = await db.get(DiscoveryFeed, url)
+    if state is None:
+        state = DiscoveryFeed(url=url, source_id=source_id, urls_found=0)
+        db.add(state)
+    state.parent_url = parent_url
+    headers = {}
+    if state.etag:
+        headers["If-None-Match"] = state.etag
+    if state.last_modified:
+        headers["If-Modified-Since"] = state.last_modified
+
+    await politeness_limiter.acquire(url, *rate)
+    parser = None
+    try:
+        async with client.stream("GET", url, headers=headers) as response:
+            state.last_status = response.status_code
+            if response.status_code == 200:
+                parser = FeedParser(str(response.url))
+                async for chunk in response.aiter_bytes():
+                    parser.feed(chunk)
+                    if parser.truncated:
+                        break
+                parser.close()
+                state.etag = response.headers.get("etag")
+                state.last_modified = response.headers.get("last-modified")
+            elif response.status_code in (429, 503):
+                delay = parse_retry_after(response.headers.get("retry-after"))
+                await politeness_limiter.block(url, delay if delay is not None else 60.0)
+            elif response.status_code != 304:
+                logger.warning(f"Feed {url} answered {response.status_code}")
+    except ET.ParseError as e:
+        logger.warning(f"Feed {url} is not valid XML: {str(e)}")
+        parser = None
+    except Exception as e:
+        logger.warning(f"Error fetching feed {url}: {str(e)}")
+        state.last_status = None
+    state.fetched_at = datetime.utcnow()
+    if parser is not None:
+        state.urls_found = len(parser.entries) + len(parser.sitemaps)
+    return state.last_status, parser
+
+async def enqueue_urls(
+    db: AsyncSession,
+    source_id: int,
+    entries: List[Tuple[str, Optional[datetime]]],
+    priority: int = 0,
+) -> int:
+    """
+    Add URLs that were never seen before to the frontier.
+
+    Args:
+        db: Database session; the caller commits
+        source_id: Source the URLs belong to
+        entries: (canonical URL, published) pairs
+        priority: Higher is crawled first
+
+    Returns:
+        Number of new URLs queued
+    """
+    rows = {}
+    for url, published in entries:
+        if len(url) <= _MAX_URL_LENGTH:
+            rows.setdefault(url_hash(url), {
+                "url_hash": url_hash(url), "url": url, "source_id": source_id,
+                "priority": priority, "published_at": published,
+            })
+    queued = 0
+    values = list(rows.values())
+    for start in range(0, len(values), _INSERT_CHUNK):
+        result = await db.execute(
+            insert(FrontierUrl).on_conflict_do_nothing(index_elements=["url_hash"]).returning(FrontierUrl.url_hash),
+            values[start:start + _INSERT_CHUNK],
+        )
+        queued += len(result.all())
+    return queued
+
+def _http_client():
+    import httpx
+
+    return httpx.AsyncClient(
+        follow_redirects=True,
+        timeout=DISCOVERY_TIMEOUT_SECONDS,
+        headers={"User-Agent": DISCOVERY_USER_AGENT},
+    )
+
+async def discover_source(db: AsyncSession, source: SourceModel, client=None) -> Dict[str, int]:
+    """
+    Poll a source's feeds and sitemaps and queue the article URLs not seen before.
+
+    Each feed is committed on its own, so a failing feed does not lose the others.
+
+    Returns:
+        Counts of feeds fetched, feeds not modified, URLs found and URLs queued
+    """
+    config = source.config or {}
+    rate = source_rate(config)
+    priority = int(config.get("priority", 0))
+    pattern = re.compile(config["url_pattern"]) if config.get("url_pattern") else None
+    cutoff = datetime.utcnow() - timedelta(days=config["max_age_days"]) if config.get("max_age_days") else None
+    counts = {"feeds": 0, "not_modified": 0, "found": 0, "queued": 0}
+
+    own_client = client is None
+    client = client or _http_client()
+    try:
+        # (feed URL, sitemap index listing it)
+        pending = deque((url, None) for url in (canonicalize_url(feed) for feed in config.get("feeds", [])) if url)
+        visited = set()
+        while pending:
+            feed_url, parent_url = pending.popleft()
+            if feed_url in visited:
+                continue
+            visited.add(feed_url)
+            status, parser = await fetch_feed(client, db, source.id, feed_url, rate, parent_url)
+            counts["feeds"] += 1
+            if parser is None:
+                if status == 304:
+                    counts["not_modified"] += 1
+                    # An unchanged index still has children that change
+                    children = await db.execute(select(DiscoveryFeed.url).where(DiscoveryFeed.parent_url == feed_url))
+                    pending.extend((url, feed_url) for url in children.scalars())
+                await db.commit()
+                continue
+            if parser.kind == "sitemapindex":
+                # Sitemaps the index no longer lists are not polled any more
+                await db.execute(
+                    update(DiscoveryFeed)
+                    .where(DiscoveryFeed.parent_url == feed_url, DiscoveryFeed.url.not_in(parser.sitemaps or [""]))
+                    .values(parent_url=None)
+                )
+            for sitemap in parser.sitemaps:
+                if len(visited) + len(pending) < DISCOVERY_MAX_SITEMAPS:
+                    pending.append((sitemap, feed_url))
+            entries = [
+                (url, published) for url, published in parser.entries
+                if (pattern is None or pattern.search(url)) and (cutoff is None or published is None or published >= cutoff)
+            ]
+            counts["found"] += len(entries)
+            counts["queued"] += await enqueue_urls(db, source.id, entries, priority)
+            await db.commit()
+    finally:
+        if own_client:
+            await client.aclose()
+    logger.info(f"Discovery for {source.name}: {counts}")
+    return counts
+
+async def discover(db: AsyncSession, source_name: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+    """
+    Run discover_source for every active source with feeds (or just the named one).
+
+    Returns:
+        Counts per source name
+    """
+    query = select(SourceModel).where(SourceModel.is_active == 1, SourceModel.config.has_key("feeds"))
+    if source_name:
+        query = query.where(SourceModel.name == source_name)
+    sources = (await db.execute(query)).scalars().all()
+    results = {}
+    async with _http_client() as client:
+        for source in sources:
+            try:
+                results[source.name] = await discover_source(db, source, client)
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"Error discovering URLs for {source.name}: {str(e)}")
+    return results
+
+async def claim_urls(db: AsyncSession, limit: int) -> List[Any]:
+    """
+    Claim up to limit queued URLs, best first, and commit the claim.
+
+    Claims left behind by a worker that died are queued again first.
+    """
+    await db.execute(
+        update(FrontierUrl)
+        .where(
+            FrontierUrl.status == "claimed",
+            FrontierUrl.claimed_at < func.now() - timedelta(seconds=DISCOVERY_CLAIM_TIMEOUT_SECONDS),
+        )
+        .values(status="queued")
+    )
+    best = (
+        select(FrontierUrl.url_hash)
+        .where(FrontierUrl.status == "queued")
+        .order_by(FrontierUrl.priority.desc(), FrontierUrl.published_at.desc().nulls_last(), FrontierUrl.discovered_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(
+        update(FrontierUrl)
+        .where(FrontierUrl.url_hash.in_(best.scalar_subquery()))
+        .values(status="claimed", claimed_at=func.now(), attempts=FrontierUrl.attempts + 1)
+        .returning(FrontierUrl.url_hash, FrontierUrl.url, FrontierUrl.source_id, FrontierUrl.published_at, FrontierUrl.attempts)
+    )
+    claimed = result.all()
+    await db.commit()
+    return claimed
+
+async def crawl(db: AsyncSession, limit: int = DISCOVERY_CRAWL_BATCH, scraper=None) -> Dict[str, int]:
+    """
+    Scrape one batch of frontier URLs and store their content.
+
+    Pages are fetched concurrently (DISCOVERY_SCRAPE_CONCURRENCY at a time, each host
+    still spaced by the politeness limiter) and written in one transaction, each
+    entry in its own savepoint. URLs of sources without an extraction profile are
+    marked failed without being fetched.
+
+    Returns:
+        Counts of URLs claimed, stored and failed
+    """
+    from app.db.crud import create_content
+    from app.ingestion.profiles import profile_cache
+    from app.ingestion.web_scraper import WebScraper
+    from app.models.content import ContentCreate
+
+    claimed = await claim_urls(db, limit)
+    counts = {"claimed": len(claimed), "stored": 0, "failed": 0}
+    if not claimed:
+        return counts
+    source_ids = {row.source_id for row in claimed}
+    sources = {
+        source.id: source
+        for source in (await db.execute(select(SourceModel).where(SourceModel.id.in_(source_ids)))).scalars()
+    }
+
+    # Resolved up front: the session cannot be used by the concurrent scrapes
+    profiles = {}
+    for row in claimed:
+        profile = await profile_cache.get(db, sources[row.source_id].name, row.url)
+        if profile is not None:
+            profiles[row.url_hash] = profile
+    # Without selectors a page would be rendered, found empty and retried for nothing
+    unprofiled = [row.url_hash for row in claimed if row.url_hash not in profiles]
+    if unprofiled:
+        await db.execute(
+            update(FrontierUrl)
+            .where(FrontierUrl.url_hash.in_(unprofiled))
+            .values(status="failed", error="No extraction profile for the source")
+        )
+        counts["failed"] += len(unprofiled)
+        logger.warning(f"Skipped {len(unprofiled)} URLs of sources without an extraction profile")
+    # Do not keep a transaction open while the pages render
+    await db.commit()
+    claimed = [row for row in claimed if row.url_hash in profiles]
+
+    own_scraper = scraper is None
+    scraper = scraper or WebScraper()
+    semaphore = asyncio.Semaphore(DISCOVERY_SCRAPE_CONCURRENCY)
+
+    async def scrape(row):
+        config = sources[row.source_id].config or {}
+        async with semaphore:
+            return await scraper.scrape_url(row.url, profiles[row.url_hash], source_rate(config))
+
+    try:
+        results = await asyncio.gather(*(scrape(row) for row in claimed), return_exceptions=True)
+    finally:
+        if own_scraper:
+            await scraper.close()
+
+    for row, result in zip(claimed, results):
+        error = None
+        content_id = None
+        if isinstance(result, BaseException):
+            error = str(result) or type(result).__name__
+        elif not result.get("clean_content"):
+            error = "No content found with the source's selectors"
+        else:
+            source = sources[row.source_id]
+            try:
+                async with db.begin_nested():
+                    content = await create_content(db, ContentCreate(
+                        source=source.name,
+                        raw_content=result["raw_content"],
+                        clean_content=result["clean_content"],
+                        title=result.get("title"),
+                        url=row.url,
+                        date=result.get("date") or (row.published_at.date() if row.published_at else date.today()),
+                        metadata=result.get("metadata", {}),
+                        tags=(source.config or {}).get("tags", []),
+                    ))
+                content_id = content.id
+            except Exception as e:
+                error = str(e)
+        if error is None:
+            values = {"status": "done", "content_id": content_id, "error": None}
+            counts["stored"] += 1
+        else:
+            # Queued again until the attempts run out
+            values = {"status": "queued" if row.attempts < DISCOVERY_MAX_ATTEMPTS else "failed", "error": error[:1000]}
+            counts["failed"] += 1
+            logger.warning(f"Error crawling {row.url} (attempt {row.attempts}): {error}")
+        await db.execute(update(FrontierUrl).where(FrontierUrl.url_hash == row.url_hash).values(**values))
+    learned = await profile_cache.save_learned(db, profiles.values())
+    await db.commit()
+    profile_cache.mark_saved(learned)
+    logger.info(f"Crawled {counts['claimed']} URLs: {counts['stored']} stored, {counts['failed']} failed")
+    return counts
+
+async def frontier_stats(db: AsyncSession) -> Dict[str, int]:
+    """Return the number of frontier URLs per status."""
+    result = await db.execute(select(FrontierUrl.status, func.count()).group_by(FrontierUrl.status))
+    return {status: count for status, count in result.all()}
+
+async def discovery_loop(interval: int = DISCOVERY_INTERVAL_SECONDS, idle_seconds: float = 30.0):
+    """Poll feeds every interval seconds and crawl the frontier in between, until cancelled."""
+    from app.db.database import async_session
+    from app.ingestion.web_scraper import WebScraper
+
+    scraper = WebScraper()
+    next_poll = 0.0
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            claimed = 0
+            try:
+                async with async_session() as db:
+                    if loop.time() >= next_poll:
+                        next_poll = loop.time() + interval
+                        await discover(db)
+                    claimed = (await crawl(db, scraper=scraper))["claimed"]
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in discovery loop: {str(e)}")
+            if not claimed:
+                await asyncio.sleep(idle_seconds)
+    finally:
+        await scraper.close()
+
+async def _main(args):
+    from app.db.database import async_session, engine
+
+    try:
+        async with async_session() as db:
+            if args.command == "discover":
+                for name, counts in (await discover(db, args.source)).items():
+                    print(f"{name}: {counts['feeds']} feeds ({counts['not_modified']} unchanged), "
+                          f"{counts['found']} URLs found, {counts['queued']} new")
+            elif args.command == "crawl":
+                counts = await crawl(db, limit=args.limit)
+                print(f"Claimed {counts['claimed']}, stored {counts['stored']}, failed {counts['failed']}")
+            else:
+                for status, count in sorted((await frontier_stats(db)).items()):
+                    print(f"{status:<8} {count:>12}")
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Discover article URLs from feeds and sitemaps and crawl them")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    discover_parser = subparsers.add_parser("discover", help="Poll feeds and sitemaps and queue new URLs")
+    discover_parser.add_argument("--source", help="Only this source")
+    crawl_parser = subparsers.add_parser("crawl", help="Scrape one batch of queued URLs")
+    crawl_parser.add_argument("--limit", type=int, default=DISCOVERY_CRAWL_BATCH)
+    subparsers.add_parser("stats", help="Count frontier URLs by status")
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,337 @@
+import io
+import logging
+import os
+import re
+import zipfile
+from datetime import datetime
+from email import policy
+from email.header import decode_header, make_header
+from email.message import Message
+from email.parser import BytesParser
+from email.utils import getaddresses, parsedate_to_datetime
+from html.parser import HTMLParser
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Read size for archive streams
+_READ_SIZE = 64 * 1024
+# Messages larger than this are skipped rather than held in memory
+EMAIL_MAX_MESSAGE_BYTES = int(os.getenv("EMAIL_MAX_MESSAGE_BYTES", str(25 * 1024 * 1024)))
+# mboxrd escapes body lines starting with "From " as ">From ", ">>From " and so on
+_ESCAPED_FROM = re.compile(rb"(?m)^>(>*From )")
+_MAX_ERRORS = 50
+
+class _HTMLTextExtractor(HTMLParser):
+    """Collect the visible text of an HTML document, one block element per line."""
+
+    BLOCK_TAGS = {
+        "address", "article", "blockquote", "br", "div", "footer", "h1", "h2", "h3", "h4", "h5", "h6",
+        "header", "hr", "li", "ol", "p", "pre", "section", "table", "td", "th", "tr", "ul",
+    }
+    SKIP_TAGS = {"head", "script", "style", "title", "noscript"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+def html_to_text(html: str) -> str:
+    """
+    Convert HTML to plain text with the standard library parser.
+
+    Args:
+        html: HTML document or fragment
+
+    Returns:
+        Visible text, one paragraph per line
+    """
+    extractor = _HTMLTextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return clean_text("".join(extractor.parts))
+
+def clean_text(text: str) -> str:
+    """Collapse runs of spaces, strip lines and keep at most one blank line between paragraphs."""
+    lines = [" ".join(line.split()) for line in text.splitlines()]
+    text = "\n".join(lines)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+def _decode_header(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    try:
+        return str(make_header(decode_header(value))).strip()
+    except Exception:
+        return str(value).strip()
+
+# compat32 keeps headers as plain strings (decoded by _decode_header when used);
+# policy.default parses every header into objects, several times slower
+_message_parser = BytesParser(policy=policy.compat32)
+
+def parse_message(data: bytes) -> Message:
+    """
+    Parse one MIME message from bytes with the standard library parser.
+
+    Args:
+        data: Message bytes, headers and body
+
+    Returns:
+        Message whose leaf parts can be decoded with get_payload(decode=True)
+    """
+    return _message_parser.parsebytes(data)
+
+def _decode_payload(part: Message) -> str:
+    payload = part.get_payload(decode=True) or b""
+    charset = part.get_content_charset() or "utf-8"
+    try:
+        return payload.decode(charset, errors="replace")
+    except LookupError:
+        return payload.decode("utf-8", errors="replace")
+
+class MailboxParser:
+    """
+    Parse mbox files, single EML messages and zip archives of either as a stream.
+
+    Messages are read and yielded one at a time, so memory use is bounded by
+    EMAIL_MAX_MESSAGE_BYTES rather than by the size of the archive. Messages that cannot be converted are
+    skipped and counted in ``failed``; the first few reasons are kept in ``errors``.
+    """
+
+    def __init__(self, source: str = "Email"):
+        """
+        Initialize the mailbox parser.
+
+        Args:
+            source: Source name for the parsed content
+        """
+        self.source = source
+        self.parsed = 0
+        self.failed = 0
+        self.errors: List[str] = []
+
+    def parse(self, fileobj: BinaryIO, filename: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Parse an uploaded archive and yield one content dictionary per message.
+
+        The format is detected from the first bytes: zip archives (of .eml/.mbox
+        members), mbox files (starting with a "From " line) or a single EML message.
+
+        Args:
+            fileobj: Binary file object; must be seekable for zip archives
+            filename: Original file name, used in error messages
+
+        Returns:
+            Iterator of dictionaries with the same keys as the other ingestion backends
+        """
+        head = fileobj.read(5)
+        stream = _with_head(head, fileobj)
+        if head.startswith(b"PK\x03\x04"):
+            fileobj.seek(0)
+            yield from self._parse_zip(fileobj)
+        elif head.startswith(b"From "):
+            yield from self._parse_mbox(stream, filename or "mbox")
+        else:
+            yield from self._parse_messages([self._read_message(stream)], filename or "message")
+
+    def _parse_zip(self, fileobj: BinaryIO) -> Iterator[Dict[str, Any]]:
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                with archive.open(info) as member:
+                    head = member.read(5)
+                    stream = _with_head(head, member)
+                    if head.startswith(b"From "):
+                        yield from self._parse_mbox(stream, info.filename)
+                    elif info.filename.lower().endswith(".eml"):
+                        yield from self._parse_messages([self._read_message(stream)], info.filename)
+
+    def _parse_mbox(self, stream, name: str) -> Iterator[Dict[str, Any]]:
+        yield from self._parse_messages(self._split_mbox(stream), name)
+
+    def _parse_messages(self, messages, name: str) -> Iterator[Dict[str, Any]]:
+        for index, message in enumerate(messages):
+            if message is None:
+                self._fail(f"{name} message {index + 1}: larger than {EMAIL_MAX_MESSAGE_BYTES} bytes")
+                continue
+            try:
+                content = self.message_to_content(message)
+            except Exception as e:
+                self._fail(f"{name} message {index + 1}: {str(e)}")
+                continue
+            self.parsed += 1
+            yield content
+
+    def _fail(self, reason: str):
+        self.failed += 1
+        logger.warning(f"Skipping email: {reason}")
+        if len(self.errors) < _MAX_ERRORS:
+            self.errors.append(reason)
+
+    def _read_message(self, stream) -> Optional[Message]:
+        data = stream.read(EMAIL_MAX_MESSAGE_BYTES + 1)
+        if len(data) > EMAIL_MAX_MESSAGE_BYTES:
+            return None
+        return parse_message(data)
+
+    def _split_mbox(self, stream) -> Iterator[Optional[Message]]:
+        """
+        Split an mbox stream on "From " separator lines and parse each message.
+
+        The stream is read in large chunks and searched with bytes.find, which is much
+        cheaper than iterating it line by line. Only the unfinished message is kept
+        between chunks.
+        """
+        # A leading line break lets a separator on the very first line be found too
+        buffer = b"\n"
+        body_start = None  # Offset of the current message, None before the first separator
+        scan = 0  # Offset from which to search for the next separator
+        oversized = False
+        while True:
+            chunk = stream.read(_READ_SIZE)
+            buffer += chunk
+            while True:
+                separator = buffer.find(b"\nFrom ", scan)
+                if separator == -1:
+                    scan = max(scan, len(buffer) - len(b"\nFrom "))
+                    break
+                line_end = buffer.find(b"\n", separator + 1)
+                if line_end == -1:
+                    # Separator line not complete yet
+                    scan = separator
+                    break
+                if body_start is not None:
+                    yield None if oversized else self._mbox_message(buffer[body_start:separator + 1])
+                body_start, scan, oversized = line_end + 1, line_end, False
+
+            if not chunk:
+                if body_start is not None:
+                    yield None if oversized else self._mbox_message(buffer[body_start:])
+                return
+
+            # Drop what has been consumed
+            cut = min(body_start, scan) if body_start is not None else scan
+            buffer, scan = buffer[cut:], scan - cut
+            if body_start is not None:
+                body_start -= cut
+                if len(buffer) - body_start > EMAIL_MAX_MESSAGE_BYTES:
+                    # Skip the rest of this message without holding it
+                    oversized = True
+                    buffer, scan, body_start = buffer[scan:], 0, 0
+
+    def _mbox_message(self, data: bytes) -> Message:
+        # The blank line before a "From " separator belongs to the separator
+        if data.endswith(b"\r\n\r\n"):
+            data = data[:-2]
+        elif data.endswith(b"\n\n"):
+            data = data[:-1]
+        return parse_message(_ESCAPED_FROM.sub(rb"\1", data))
+
+    def message_to_content(self, message: Message) -> Dict[str, Any]:
+        """
+        Convert a parsed message into a content dictionary.
+
+        The text/plain body is preferred; HTML-only messages are converted to text.
+        Attachments are not ingested, only listed in the metadata.
+
+        Args:
+            message: Parsed email message
+
+        Returns:
+            Dictionary containing extracted content and metadata
+        """
+        plain = None
+        html = None
+        attachments = []
+        for part in message.walk():
+            if part.is_multipart():
+                continue
+            filename = part.get_filename()
+            if filename or part.get("Content-Disposition", "").lower().startswith("attachment"):
+                attachments.append(_decode_header(filename) or part.get_content_type())
+                continue
+            content_type = part.get_content_type()
+            if content_type == "text/plain" and plain is None:
+                plain = _decode_payload(part)
+            elif content_type == "text/html" and html is None:
+                html = _decode_payload(part)
+
+        if plain is not None and plain.strip():
+            raw_content = plain
+            clean_content = clean_text(plain)
+        elif html is not None:
+            raw_content = html
+            clean_content = html_to_text(html)
+        else:
+            raise ValueError("message has no text body")
+
+        subject = _decode_header(message.get("Subject"))
+        sender = _decode_header(message.get("From"))
+        date = None
+        if message.get("Date"):
+            try:
+                date = parsedate_to_datetime(message["Date"]).date()
+            except (TypeError, ValueError):
+                date = None
+
+        return {
+            "title": subject or "(no subject)",
+            "raw_content": raw_content,
+            "clean_content": clean_content,
+            "date": date,
+            "url": None,
+            "source": self.source,
+            "metadata": {
+                "sender": sender,
+                "subject": subject,
+                "to": [address for _, address in getaddresses(message.get_all("To", []))],
+                "message_id": (message.get("Message-ID") or "").strip() or None,
+                "attachments": attachments,
+                "ingestion_date": datetime.now().isoformat(),
+            },
+        }
+
+class _Prefixed(io.RawIOBase):
+    """Binary stream that replays bytes already read from the head of another stream."""
+
+    def __init__(self, head: bytes, stream: BinaryIO):
+        self._head = head
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._head:
+            size = min(len(buffer), len(self._head))
+            buffer[:size] = self._head[:size]
+            self._head = self._head[size:]
+            return size
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+def _with_head(head: bytes, stream: BinaryIO) -> io.BufferedReader:
+    """Put bytes read for format detection back in front of a stream."""
+    return io.BufferedReader(_Prefixed(head, stream), buffer_size=_READ_SIZE)
@@ -0,0 +1,148 @@
+"""
+Field extraction from rendered HTML with a source's CSS selectors.
+
+Shared by WebScraper (pages just rendered) and the snapshot re-extraction job
+(app/ingestion/snapshots.py), which runs it in worker processes, so this module
+only needs BeautifulSoup and soupsieve.
+
+An ExtractionProfile compiles its selectors once and remembers the date format
+that last matched, trying it first on the next page. Profiles of web sources are
+built and cached per domain by app/ingestion/profiles.py.
+"""
+import logging
+import re
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import soupsieve
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+# Formats tried in order when parsing a scraped date
+DATE_FORMATS = [
+    "%B %d, %Y",           # January 1, 2023
+    "%d %B %Y",            # 1 January 2023
+    "%Y-%m-%d",            # 2023-01-01
+    "%m/%d/%Y",            # 01/01/2023
+    "%d/%m/%Y",            # 01/01/2023
+]
+
+# "browser": rendered by Playwright; "static": plain HTTP GET, for pages that need no JavaScript
+RENDER_MODES = ("browser", "static")
+
+# Fields read with "<field>_selector" from a selector config
+SELECTOR_FIELDS = ("title", "content", "date", "author")
+
+def extract_text(soup: BeautifulSoup, selector: Optional[str]) -> Optional[str]:
+    """Return the text of the first element matching a CSS selector, or None."""
+    if not selector:
+        return None
+
+    elements = soup.select(selector)
+    if not elements:
+        return None
+
+    return elements[0].get_text(strip=True)
+
+def clean_text(text: Optional[str]) -> Optional[str]:
+    """Clean text by removing extra whitespace and normalizing."""
+    if not text:
+        return None
+
+    # Remove extra whitespace
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+def parse_date(date_str: str) -> Optional[str]:
+    """Parse a date string in one of DATE_FORMATS into an ISO date."""
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+class ExtractionProfile:
+    """Compiled selectors, date format and render mode for the pages of one source and domain"""
+
+    def __init__(
+        self,
+        selectors: Dict[str, str],
+        date_format: Optional[str] = None,
+        render: str = "browser",
+        source: Optional[str] = None,
+        domain: Optional[str] = None,
+    ):
+        """
+        Args:
+            selectors: title_selector, content_selector, date_selector, author_selector
+                and wait_for (CSS selector to wait for before reading the page)
+            date_format: strptime format to try first for dates
+            render: One of RENDER_MODES
+            source: Source name, when the profile comes from a source's config
+            domain: Host the profile applies to
+
+        Raises:
+            ValueError: If render is unknown
+            soupsieve.SelectorSyntaxError: If a selector is invalid
+        """
+        if render not in RENDER_MODES:
+            raise ValueError(f"Invalid render mode '{render}', expected one of: {', '.join(RENDER_MODES)}")
+        self.selectors = selectors
+        self.compiled = {
+            field: soupsieve.compile(selectors[f"{field}_selector"])
+            for field in SELECTOR_FIELDS
+            if selectors.get(f"{field}_selector")
+        }
+        self.wait_for = selectors.get("wait_for")
+        self.date_format = date_format
+        self.render = render
+        self.source = source
+        self.domain = domain
+        # Set when a different format than date_format matched; saved by app/ingestion/profiles.py
+        self.learned_format: Optional[str] = None
+
+    def text(self, soup: BeautifulSoup, field: str) -> Optional[str]:
+        """Return the text of the first element matching field's selector, or None."""
+        selector = self.compiled.get(field)
+        if selector is None:
+            return None
+        element = selector.select_one(soup)
+        return element.get_text(strip=True) if element is not None else None
+
+    def parse_date(self, date_str: str) -> Optional[str]:
+        """Parse a date string, trying the profile's format before DATE_FORMATS."""
+        if self.date_format:
+            try:
+                return datetime.strptime(date_str, self.date_format).date().isoformat()
+            except ValueError:
+                pass
+        for fmt in DATE_FORMATS:
+            if fmt == self.date_format:
+                continue
+            try:
+                parsed = datetime.strptime(date_str, fmt).date().isoformat()
+            except ValueError:
+                continue
+            self.date_format = self.learned_format = fmt
+            return parsed
+        return None
+
+    def extract(self, html: str) -> Dict[str, Any]:
+        """
+        Extract the configured fields of a page.
+
+        Returns:
+            title, raw_content, clean_content, date (ISO date or None) and author
+        """
+        soup = BeautifulSoup(html, "html.parser")
+        content = self.text(soup, "content")
+        date_str = self.text(soup, "date")
+        return {
+            "title": self.text(soup, "title"),
+            "raw_content": content,
+            "clean_content": clean_text(content),
+            "date": self.parse_date(date_str) if date_str else None,
+            "author": self.text(soup, "author"),
+        }
@@ -1,7 +1,7 @@
 import logging
 import PyPDF2
 import re
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, BinaryIO, Union
 from datetime import datetime
 import os
 
@@ -12,73 +12,88 @@ class PDFProcessor:
         """Initialize the PDF processor."""
         pass
         
-    def process_pdf(self, file_path: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def process_pdf(
+        self,
+        file: Union[str, BinaryIO],
+        metadata: Optional[Dict[str, Any]] = None,
+        file_name: Optional[str] = None,
+    ) -> Dict[str, Any]:
         """
         Process a PDF file and extract text and metadata.
         
         Args:
-            file_path: Path to the PDF file
+            file: Path to the PDF file, or a seekable binary file object (e.g. an upload)
             metadata: Optional metadata to supplement extracted data
+            file_name: Name of the file; defaults to the base name of the path
             
         Returns:
             Dictionary containing extracted content and metadata
         """
-        if not os.path.isfile(file_path):
-            logger.error(f"PDF file not found: {file_path}")
-            raise FileNotFoundError(f"PDF file not found: {file_path}")
-            
+        if isinstance(file, str):
+            if not os.path.isfile(file):
+                logger.error(f"PDF file not found: {file}")
+                raise FileNotFoundError(f"PDF file not found: {file}")
+            with open(file, "rb") as stream:
+                return self._process_stream(stream, metadata, file_name or os.path.basename(file), file)
+        return self._process_stream(file, metadata, file_name or "upload.pdf", file_name)
+
+    def _process_stream(
+        self,
+        file: BinaryIO,
+        metadata: Optional[Dict[str, Any]],
+        file_name: str,
+        url: Optional[str],
+    ) -> Dict[str, Any]:
         try:
-            # Open the PDF file
-            with open(file_path, "rb") as file:
-                # Create a PDF reader object
-                reader = PyPDF2.PdfReader(file)
-                
-                # Get the number of pages
-                num_pages = len(reader.pages)
-                
-                # Extract document info
-                info = reader.metadata
-                
-                # Extract text from all pages
-                raw_text = ""
-                for page_num in range(num_pages):
-                    page = reader.pages[page_num]
-                    raw_text += page.extract_text() + "\n"
-                    
-                # Clean the text
-                clean_text = self._clean_text(raw_text)
-                
-                # Extract title
-                title = self._extract_title(info, clean_text, os.path.basename(file_path))
-                
-                # Extract date
-                date = self._extract_date(info)
-                
-                # Prepare metadata
-                meta = metadata or {}
-                meta.update({
-                    "pdf_info": {
-                        "num_pages": num_pages,
-                        "author": info.author if hasattr(info, "author") else None,
-                        "creator": info.creator if hasattr(info, "creator") else None,
-                        "producer": info.producer if hasattr(info, "producer") else None,
-                        "subject": info.subject if hasattr(info, "subject") else None,
-                    },
-                    "file_name": os.path.basename(file_path),
-                    "process_date": datetime.now().isoformat(),
-                })
+            # Create a PDF reader object
+            reader = PyPDF2.PdfReader(file)
+            
+            # Get the number of pages
+            num_pages = len(reader.pages)
+            
+            # Extract document info
+            info = reader.metadata
+            
+            # Extract text from all pages
+            raw_text = ""
+            for page_num in range(num_pages):
+                page = reader.pages[page_num]
+                raw_text += page.extract_text() + "\n"
                 
-                return {
-                    "title": title,
-                    "raw_content": raw_text,
-                    "clean_content": clean_text,
-                    "date": date,
-                    "url": file_path,
-                    "source": "PDF",
-                    "metadata": meta
-                }
+            # Clean the text
+            clean_text = self._clean_text(raw_text)
+            
+            # Extract title
+            title = self._extract_title(info, clean_text, file_name)
+            
+            # Extract date
+            date = self._extract_date(info)
+            
+            # Prepare metadata
+            meta = metadata or {}
+            meta.update({
+                "pdf_info": {
+                    "num_pages": num_pages,
+                    "author": info.author if hasattr(info, "author") else None,
+                    "creator": info.creator if hasattr(info, "creator") else None,
+                    "producer": info.producer if hasattr(info, "producer") else None,
+                    "subject": info.subject if hasattr(info, "subject") else None,
+                },
+                "file_name": file_name,
+                "process_date": datetime.now().isoformat(),
+            })
+            
+            return {
+                "title": title,
+                "raw_content": raw_text,
+                "clean_content": clean_text,
+                "date": date,
+                "url": url,
+                "source": "PDF",
+                "metadata": meta
+            }
         except Exception as e:
-            logger.error(f"Error processing PDF {file_path}: {str(e)}")
+            logger.error(f"Error processing PDF {file_name}: {str(e)}")
             raise
             
     def _clean_text(self, text: str) -> str:
@@ -0,0 +1,209 @@
+"""
+Per-host politeness limiter for scraping.
+
+Requests to a host are spaced by a token bucket (implemented as GCRA: one "theoretical
+arrival time" per host), so a host sees at most ``burst`` requests at once and
+``rate`` requests per second after that. Callers are never refused: ``acquire``
+reserves the next free slot and sleeps until it, so concurrent requests queue in
+arrival order. A ``Retry-After`` from the host blocks it until then for everyone.
+
+With REDIS_URL set the state lives in Redis and is updated by Lua scripts using the
+Redis clock, so all workers and scheduled jobs share one budget per host. Without
+Redis, or while it is unreachable, each process falls back to the same algorithm in
+memory.
+
+Rates come from the ``rate_limit`` entry of a Source's config, e.g.
+``{"rate_limit": {"requests_per_second": 0.5, "burst": 2}}``, and default to
+POLITENESS_DEFAULT_RATE / POLITENESS_DEFAULT_BURST.
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL")
+POLITENESS_ENABLED = os.getenv("POLITENESS_ENABLED", "true").lower() == "true"
+POLITENESS_DEFAULT_RATE = float(os.getenv("POLITENESS_DEFAULT_RATE", "1.0"))  # Requests per second per host
+POLITENESS_DEFAULT_BURST = int(os.getenv("POLITENESS_DEFAULT_BURST", "2"))
+# Longest Retry-After honored; longer values are capped so a job is not parked for days
+POLITENESS_MAX_RETRY_AFTER = float(os.getenv("POLITENESS_MAX_RETRY_AFTER", "600"))
+# Seconds before trying Redis again after it failed
+_REDIS_RETRY_SECONDS = 30.0
+_KEY_PREFIX = "politeness"
+
+# KEYS: slot key, block key. ARGV: interval (s), burst tolerance (s).
+# Returns the seconds to wait before the reserved slot, as a string (Lua numbers are
+# truncated to integers when returned).
+_ACQUIRE_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then tat = now end
+local blocked = tonumber(redis.call('GET', KEYS[2]))
+if blocked and blocked + tolerance > tat then tat = blocked + tolerance end
+local allowed = tat - tolerance
+if allowed < now then allowed = now end
+local ttl = math.ceil((tat + interval - now) * 1000) + 60000
+redis.call('SET', KEYS[1], string.format('%.6f', tat + interval), 'PX', ttl)
+return string.format('%.6f', allowed - now)
+"""
+
+# KEYS: block key. ARGV: seconds. Only ever extends an existing block.
+_BLOCK_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local blocked_until = now + tonumber(ARGV[1])
+local current = tonumber(redis.call('GET', KEYS[1]))
+if not current or current < blocked_until then
+    redis.call('SET', KEYS[1], string.format('%.6f', blocked_until), 'PX', math.ceil(tonumber(ARGV[1]) * 1000) + 1000)
+end
+return 1
+"""
+
+def host_of(url: str) -> str:
+    """Return the lower-cased host (with a non-default port) of a URL."""
+    return (urlsplit(url).netloc or "").lower()
+
+def source_rate(config: Optional[Dict[str, Any]]) -> Tuple[float, int]:
+    """
+    Return (requests per second, burst) from a Source config's rate_limit entry.
+    """
+    limits = (config or {}).get("rate_limit") or {}
+    rate = float(limits.get("requests_per_second", POLITENESS_DEFAULT_RATE))
+    burst = int(limits.get("burst", POLITENESS_DEFAULT_BURST))
+    return max(rate, 1e-6), max(burst, 1)
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header (delay in seconds or an HTTP date) into seconds from now.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        seconds = (when - datetime.now(timezone.utc)).total_seconds()
+    return min(max(seconds, 0.0), POLITENESS_MAX_RETRY_AFTER)
+
+class _LocalBuckets:
+    """The GCRA of _ACQUIRE_SCRIPT for one process"""
+
+    def __init__(self):
+        self.slots: Dict[str, float] = {}
+        self.blocked: Dict[str, float] = {}
+
+    def reserve(self, host: str, interval: float, tolerance: float) -> float:
+        now = time.monotonic()
+        tat = max(self.slots.get(host, now), now)
+        blocked = self.blocked.get(host)
+        if blocked is not None:
+            if blocked > now:
+                tat = max(tat, blocked + tolerance)
+            else:
+                del self.blocked[host]
+        self.slots[host] = tat + interval
+        # Hosts idle for a while hold no state
+        if len(self.slots) > 10000:
+            self.slots = {key: value for key, value in self.slots.items() if value > now}
+        return max(tat - tolerance, now) - now
+
+    def block(self, host: str, seconds: float):
+        until = time.monotonic() + seconds
+        self.blocked[host] = max(self.blocked.get(host, 0.0), until)
+
+class PolitenessLimiter:
+    """Per-host request spacing shared through Redis, with an in-process fallback"""
+
+    def __init__(self, redis_url: Optional[str] = REDIS_URL):
+        self.redis_url = redis_url
+        self._redis = None
+        self._acquire_script = None
+        self._block_script = None
+        self._redis_failed_at: Optional[float] = None
+        self._local = _LocalBuckets()
+
+    def _client(self):
+        if not self.redis_url:
+            return None
+        if self._redis_failed_at is not None and time.monotonic() - self._redis_failed_at < _REDIS_RETRY_SECONDS:
+            return None
+        if self._redis is None:
+            import redis.asyncio as redis
+
+            self._redis = redis.from_url(self.redis_url, socket_timeout=2, socket_connect_timeout=2)
+            self._acquire_script = self._redis.register_script(_ACQUIRE_SCRIPT)
+            self._block_script = self._redis.register_script(_BLOCK_SCRIPT)
+        return self._redis
+
+    def _redis_error(self, e: Exception):
+        if self._redis_failed_at is None:
+            logger.warning(f"Politeness limiter falling back to in-process buckets: {str(e)}")
+        self._redis_failed_at = time.monotonic()
+
+    @staticmethod
+    def _keys(host: str) -> Tuple[str, str]:
+        # The hash tag keeps both keys of a host in one Redis Cluster slot
+        return f"{_KEY_PREFIX}:{{{host}}}:slot", f"{_KEY_PREFIX}:{{{host}}}:blocked"
+
+    async def reserve(self, host: str, rate: float, burst: int) -> float:
+        """Reserve the next request slot for host and return the seconds until it."""
+        interval = 1.0 / rate
+        tolerance = (burst - 1) * interval
+        client = self._client()
+        if client is not None:
+            try:
+                wait = float(await self._acquire_script(keys=list(self._keys(host)), args=[interval, tolerance]))
+                if self._redis_failed_at is not None:
+                    logger.info("Politeness limiter using Redis again")
+                    self._redis_failed_at = None
+                return wait
+            except Exception as e:
+                self._redis_error(e)
+        return self._local.reserve(host, interval, tolerance)
+
+    async def acquire(self, url: str, rate: float = POLITENESS_DEFAULT_RATE, burst: int = POLITENESS_DEFAULT_BURST) -> float:
+        """
+        Wait for this request's turn at the URL's host.
+
+        Returns:
+            Seconds waited
+        """
+        if not POLITENESS_ENABLED:
+            return 0.0
+        host = host_of(url)
+        wait = await self.reserve(host, rate, burst)
+        if wait > 0:
+            logger.debug(f"Waiting {wait:.2f}s for {host}")
+            await asyncio.sleep(wait)
+        return wait
+
+    async def block(self, url: str, seconds: float):
+        """Hold all requests to the URL's host for seconds (e.g. from Retry-After)."""
+        host = host_of(url)
+        logger.info(f"Backing off {host} for {seconds:.0f}s")
+        client = self._client()
+        if client is not None:
+            try:
+                await self._block_script(keys=[self._keys(host)[1]], args=[seconds])
+                return
+            except Exception as e:
+                self._redis_error(e)
+        self._local.block(host, seconds)
+
+# Shared by every scraper in the process
+politeness_limiter = PolitenessLimiter()
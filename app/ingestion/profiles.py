@@ -0,0 +1,178 @@
+"""
+Per-domain extraction profiles of web sources.
+
+A web source's config holds source-wide extraction settings and, optionally, a
+profile per domain:
+
+    {
+        "selectors": {"title_selector": "h1", "content_selector": "article", "date_selector": "time"},
+        "date_format": "%B %d, %Y",
+        "render": "browser",
+        "profiles": {
+            "blog.example.com": {"selectors": {"content_selector": ".post"}, "render": "static"}
+        }
+    }
+
+The profile of a URL comes from its host, or the nearest parent domain listed in
+``profiles`` ("www." is ignored). Its selectors are merged over the source-wide
+ones, and date_format and render fall back to the source's.
+
+``profile_cache`` keeps each source's config and the compiled ExtractionProfile of
+every host in memory. A source is reloaded when it is updated through the ORM in
+this process, and otherwise after PROFILE_CACHE_TTL_SECONDS (changes made by
+other workers). When a page's date matches a different format than the profile's,
+the profile switches to it at once. ``save_learned`` writes it into the source's
+config as the domain's date_format, and ``mark_saved`` clears it once committed.
+"""
+import copy
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Source as SourceModel
+from app.ingestion.extraction import ExtractionProfile
+from app.ingestion.politeness import host_of
+
+logger = logging.getLogger(__name__)
+
+PROFILE_CACHE_TTL_SECONDS = float(os.getenv("PROFILE_CACHE_TTL_SECONDS", "300"))
+
+def _profile_domain(config: Dict[str, Any], host: str) -> Optional[str]:
+    """Return the key in config["profiles"] that applies to host, if any."""
+    profiles = config.get("profiles") or {}
+    if not profiles:
+        return None
+    host = host.split(":", 1)[0]
+    candidates = [host]
+    if host.startswith("www."):
+        candidates.append(host[len("www."):])
+    parts = candidates[-1].split(".")
+    candidates.extend(".".join(parts[i:]) for i in range(1, len(parts) - 1))
+    return next((domain for domain in candidates if domain in profiles), None)
+
+def profile_settings(config: Optional[Dict[str, Any]], host: str) -> Dict[str, Any]:
+    """
+    Resolve the extraction settings of a source config for a host.
+
+    Returns:
+        selectors (domain selectors merged over the source's), date_format and render
+    """
+    config = config or {}
+    domain = _profile_domain(config, host)
+    profile = (config.get("profiles") or {}).get(domain, {}) if domain else {}
+    return {
+        "selectors": {**(config.get("selectors") or {}), **(profile.get("selectors") or {})},
+        "date_format": profile.get("date_format") or config.get("date_format"),
+        "render": profile.get("render") or config.get("render") or "browser",
+    }
+
+class ProfileCache:
+    """Source configs and compiled per-host profiles of this process"""
+
+    def __init__(self, ttl: float = PROFILE_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        # source name -> (expiry on the monotonic clock, config or None for unknown sources)
+        self._configs: Dict[str, Tuple[float, Optional[Dict[str, Any]]]] = {}
+        self._profiles: Dict[Tuple[str, str], ExtractionProfile] = {}
+
+    def invalidate(self, source_name: Optional[str] = None):
+        """Drop one source (or all) so it is read again on next use."""
+        if source_name is None:
+            self._configs.clear()
+            self._profiles.clear()
+            return
+        self._configs.pop(source_name, None)
+        for key in [key for key in self._profiles if key[0] == source_name]:
+            del self._profiles[key]
+
+    async def _config(self, db: AsyncSession, source_name: str) -> Optional[Dict[str, Any]]:
+        entry = self._configs.get(source_name)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        from app.db.crud import get_source
+
+        source = await get_source(db, source_name)
+        config = (source.config or {}) if source is not None else None
+        if entry is not None and entry[1] != config:
+            self.invalidate(source_name)
+        self._configs[source_name] = (time.monotonic() + self.ttl, config)
+        return config
+
+    async def get(self, db: AsyncSession, source_name: str, url: str) -> Optional[ExtractionProfile]:
+        """
+        Return the profile of source_name for url's host.
+
+        Returns:
+            The compiled profile, or None if the source is unknown or has no selectors for the host
+        """
+        config = await self._config(db, source_name)
+        if config is None:
+            return None
+        host = host_of(url)
+        key = (source_name, host)
+        profile = self._profiles.get(key)
+        if profile is None:
+            settings = profile_settings(config, host)
+            if not settings["selectors"]:
+                return None
+            profile = ExtractionProfile(
+                settings["selectors"],
+                date_format=settings["date_format"],
+                render=settings["render"],
+                source=source_name,
+                domain=_profile_domain(config, host) or host.split(":", 1)[0],
+            )
+            self._profiles[key] = profile
+        return profile
+
+    async def save_learned(
+        self, db: AsyncSession, profiles: Iterable[ExtractionProfile]
+    ) -> List[Tuple[ExtractionProfile, str]]:
+        """
+        Write the date formats the given profiles learned into their sources' configs.
+
+        Only the profiles the caller used are passed in, so a rollback cannot lose
+        formats learned by other requests. The caller commits and then passes the
+        result to ``mark_saved``; until then the formats stay pending.
+
+        Returns:
+            The (profile, format) pairs written
+        """
+        from app.db.crud import get_source
+
+        saved = []
+        for profile in {id(profile): profile for profile in profiles}.values():
+            learned = profile.learned_format
+            if not learned or profile.source is None:
+                continue
+            source = await get_source(db, profile.source)
+            if source is None:
+                continue
+            # A new object, so the JSONB column is written and the update event fires
+            config = copy.deepcopy(source.config or {})
+            config.setdefault("profiles", {}).setdefault(profile.domain, {})["date_format"] = learned
+            source.config = config
+            saved.append((profile, learned))
+        if saved:
+            await db.flush()
+        return saved
+
+    def mark_saved(self, saved: List[Tuple[ExtractionProfile, str]]):
+        """Clear the formats ``save_learned`` wrote, once they are committed."""
+        for profile, learned in saved:
+            # A format learned again since the save stays pending
+            if profile.learned_format == learned:
+                profile.learned_format = None
+            logger.info(f"Learned date format {learned!r} for {profile.source} on {profile.domain}")
+
+profile_cache = ProfileCache()
+
+@event.listens_for(SourceModel, "after_insert")
+@event.listens_for(SourceModel, "after_update")
+@event.listens_for(SourceModel, "after_delete")
+def _source_changed(mapper, connection, target):
+    profile_cache.invalidate(target.name)
@@ -0,0 +1,173 @@
+"""
+Client side of the render workers (app/render_worker.py).
+
+RENDER_WORKER_URLS lists the workers, comma separated, as ``http://host:port`` or
+``unix:/path/to.sock``. Each job goes to the healthy worker with the least load (jobs
+this process has in flight plus the load the worker last reported). A worker that
+cannot be reached is taken out of rotation and probed again every
+RENDER_HEALTH_INTERVAL_SECONDS. A busy worker's 503 sends the job to the next one;
+when all of them are busy the job waits for capacity.
+
+httpx is imported on first use.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+RENDER_WORKER_URLS = [url.strip() for url in os.getenv("RENDER_WORKER_URLS", "").split(",") if url.strip()]
+RENDER_WORKER_TOKEN = os.getenv("RENDER_WORKER_TOKEN") or None
+RENDER_HEALTH_INTERVAL_SECONDS = float(os.getenv("RENDER_HEALTH_INTERVAL_SECONDS", "10"))
+# Client timeout of a render request; covers waiting in the worker's queue too
+RENDER_REQUEST_TIMEOUT_SECONDS = float(os.getenv("RENDER_REQUEST_TIMEOUT_SECONDS", "90"))
+
+class RenderUnavailable(Exception):
+    """No render worker could take the job"""
+
+class RenderWorkerClient:
+    """One render worker, its connection and what this process knows about its health"""
+
+    def __init__(self, url: str):
+        import httpx
+
+        self.url = url
+        headers = {"X-Render-Token": RENDER_WORKER_TOKEN} if RENDER_WORKER_TOKEN else {}
+        timeout = httpx.Timeout(RENDER_REQUEST_TIMEOUT_SECONDS, connect=5.0)
+        if url.startswith("unix:"):
+            self.client = httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(uds=url[len("unix:"):]),
+                base_url="http://render-worker",
+                headers=headers,
+                timeout=timeout,
+            )
+        else:
+            self.client = httpx.AsyncClient(base_url=url, headers=headers, timeout=timeout)
+        self.healthy = True
+        self.next_check = 0.0
+        self.in_flight = 0
+        # (active + queued) / capacity from the worker's last health report
+        self.reported_load = 0.0
+        self.capacity = 1
+
+    @property
+    def load(self) -> float:
+        return self.in_flight / self.capacity + self.reported_load
+
+    def mark_down(self, reason: str):
+        if self.healthy:
+            logger.warning(f"Render worker {self.url} out of rotation: {reason}")
+        self.healthy = False
+        self.next_check = time.monotonic() + RENDER_HEALTH_INTERVAL_SECONDS
+
+    async def check(self):
+        """Probe /health and update the worker's state."""
+        self.next_check = time.monotonic() + RENDER_HEALTH_INTERVAL_SECONDS
+        try:
+            response = await self.client.get("/health", timeout=5.0)
+            state = response.json()
+        except Exception as e:
+            self.mark_down(str(e) or type(e).__name__)
+            return
+        if response.status_code != 200:
+            self.mark_down(f"health {response.status_code}")
+            return
+        if not self.healthy:
+            logger.info(f"Render worker {self.url} back in rotation")
+        self.healthy = True
+        self.capacity = max(int(state.get("capacity", 1)), 1)
+        self.reported_load = (state.get("active", 0) + state.get("queued", 0)) / self.capacity
+
+class RenderPool:
+    """Load-balanced, health-checked set of render workers"""
+
+    def __init__(self, urls: List[str]):
+        self.workers = [RenderWorkerClient(url) for url in urls]
+
+    async def _refresh(self):
+        due = [worker for worker in self.workers if time.monotonic() >= worker.next_check]
+        if due:
+            await asyncio.gather(*(worker.check() for worker in due))
+
+    def _pick(self, tried: List[RenderWorkerClient]) -> Optional[RenderWorkerClient]:
+        candidates = [worker for worker in self.workers if worker.healthy and worker not in tried]
+        if not candidates:
+            return None
+        # Least loaded; random among equals so idle workers share the jobs
+        return min(candidates, key=lambda worker: (worker.load, random.random()))
+
+    async def render(self, url: str, wait_for: Optional[str] = None, timeout_ms: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Render url on the least loaded healthy worker, failing over to the others.
+
+        Returns:
+            The worker's render result (see app/render_worker.render_page) with
+            timing.round_trip_ms and the worker URL added
+
+        Raises:
+            RenderUnavailable: If no worker is up, or all stayed busy for RENDER_REQUEST_TIMEOUT_SECONDS
+            RuntimeError: If the worker could not render the page
+        """
+        payload: Dict[str, Any] = {"url": url, "wait_for": wait_for}
+        if timeout_ms:
+            payload["timeout_ms"] = timeout_ms
+        tried: List[RenderWorkerClient] = []
+        busy = False
+        deadline = time.monotonic() + RENDER_REQUEST_TIMEOUT_SECONDS
+        await self._refresh()
+        while True:
+            worker = self._pick(tried)
+            if worker is None:
+                if not busy or time.monotonic() >= deadline:
+                    raise RenderUnavailable(f"No render worker available for {url} (tried {len(tried)} of {len(self.workers)})")
+                # Every reachable worker was full: wait for capacity instead of failing
+                await asyncio.sleep(1.0)
+                tried, busy = [], False
+                await self._refresh()
+                continue
+            tried.append(worker)
+            started = time.perf_counter()
+            worker.in_flight += 1
+            try:
+                response = await worker.client.post("/render", json=payload)
+            except Exception as e:
+                # Connection failures take the worker out; a timeout may just be a slow page
+                import httpx
+
+                if isinstance(e, httpx.TimeoutException) and not isinstance(e, httpx.ConnectTimeout):
+                    raise RuntimeError(f"Render of {url} timed out on {worker.url}")
+                worker.mark_down(str(e) or type(e).__name__)
+                continue
+            finally:
+                worker.in_flight -= 1
+            if response.status_code == 503:
+                # Queue full; counts as fully loaded until the next health check
+                worker.reported_load = max(worker.reported_load, 1.0)
+                busy = True
+                continue
+            if response.status_code != 200:
+                try:
+                    detail = response.json().get("detail")
+                except ValueError:
+                    detail = response.text[:200]
+                raise RuntimeError(f"Render worker {worker.url} answered {response.status_code}: {detail}")
+            result = response.json()
+            result["timing"]["round_trip_ms"] = round((time.perf_counter() - started) * 1000.0, 1)
+            result["worker"] = worker.url
+            return result
+
+    async def close(self):
+        for worker in self.workers:
+            await worker.client.aclose()
+
+_render_pool: Optional[RenderPool] = None
+
+def get_render_pool() -> Optional[RenderPool]:
+    """Return the process-wide pool of RENDER_WORKER_URLS, or None when none are configured."""
+    global _render_pool
+    if _render_pool is None and RENDER_WORKER_URLS:
+        _render_pool = RenderPool(RENDER_WORKER_URLS)
+    return _render_pool
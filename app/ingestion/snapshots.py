@@ -0,0 +1,303 @@
+"""
+Archive of rendered pages, for re-extracting content with new selectors without
+rendering the pages again.
+
+With SNAPSHOTS_ENABLED, WebScraper stores the final HTML of every page it renders
+successfully, zstd-compressed, under SNAPSHOT_PATH:
+
+    <SNAPSHOT_PATH>/<h[:2]>/<h>/<fetched at, YYYYmmddTHHMMSSffffff>.html.zst
+
+where h is derived from the scraped URL. Each file starts with one JSON line (url, final_url,
+status, fetched_at) followed by the HTML. Only the newest SNAPSHOT_KEEP snapshots of
+a URL are kept.
+
+After tuning a source's selectors, ``reextract`` runs the extraction
+(app/ingestion/extraction.py) over the newest snapshot of each of the source's
+content rows, in REEXTRACT_WORKERS processes. It then updates the rows whose
+title, text or date changed. A field the new selectors find nothing for keeps
+its stored value.
+
+Usage:
+    python -m app.ingestion.snapshots reextract --source WSJ [--selectors '{"content_selector": "article"}']
+        [--workers 8] [--batch-size 200] [--dry-run]
+    python -m app.ingestion.snapshots stats
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import zstandard
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOTS_ENABLED = os.getenv("SNAPSHOTS_ENABLED", "false").lower() in ("1", "true", "yes")
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "data/snapshots")
+SNAPSHOT_ZSTD_LEVEL = int(os.getenv("SNAPSHOT_ZSTD_LEVEL", "6"))
+# Snapshots kept per URL, newest first
+SNAPSHOT_KEEP = int(os.getenv("SNAPSHOT_KEEP", "3"))
+REEXTRACT_WORKERS = int(os.getenv("REEXTRACT_WORKERS", str(os.cpu_count() or 1)))
+REEXTRACT_BATCH_SIZE = int(os.getenv("REEXTRACT_BATCH_SIZE", "200"))
+
+_SUFFIX = ".html.zst"
+
+def read_snapshot(path: str) -> Tuple[Dict[str, Any], str]:
+    """Return the header and HTML of a snapshot file."""
+    with open(path, "rb") as f:
+        data = zstandard.ZstdDecompressor().decompress(f.read())
+    header, _, html = data.partition(b"\n")
+    return json.loads(header), html.decode("utf-8")
+
+class SnapshotStore:
+    """Rendered pages on disk, by URL and fetch time"""
+
+    def __init__(self, root: str = SNAPSHOT_PATH, level: int = SNAPSHOT_ZSTD_LEVEL, keep: int = SNAPSHOT_KEEP):
+        self.root = root
+        self.level = level
+        self.keep = max(keep, 1)
+
+    def url_dir(self, url: str) -> str:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.root, digest[:2], digest)
+
+    def _write(self, url: str, rendered: Dict[str, Any], fetched_at: datetime) -> str:
+        header = {
+            "url": url,
+            "final_url": rendered.get("final_url"),
+            "status": rendered.get("status"),
+            "fetched_at": fetched_at.isoformat(),
+        }
+        data = json.dumps(header).encode("utf-8") + b"\n" + rendered["html"].encode("utf-8")
+        directory = self.url_dir(url)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, fetched_at.strftime("%Y%m%dT%H%M%S%f") + _SUFFIX)
+        # Write then rename so readers never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(zstandard.ZstdCompressor(level=self.level).compress(data))
+        os.replace(tmp_path, path)
+        for old in self._snapshots(directory)[self.keep:]:
+            try:
+                os.unlink(os.path.join(directory, old))
+            except FileNotFoundError:
+                pass
+        return os.path.relpath(path, self.root)
+
+    async def save(self, url: str, rendered: Dict[str, Any]) -> Optional[str]:
+        """
+        Store a rendered page (compression and disk writes run in a worker thread).
+
+        Args:
+            url: URL the page was scraped as
+            rendered: Render result with html, final_url and status
+
+        Returns:
+            Path of the snapshot relative to the archive root, or None if it could not be written
+        """
+        try:
+            return await asyncio.to_thread(self._write, url, rendered, datetime.utcnow())
+        except OSError as e:
+            # The scrape itself succeeded; losing its snapshot only costs a later re-render
+            logger.warning(f"Could not store snapshot of {url}: {str(e)}")
+            return None
+
+    @staticmethod
+    def _snapshots(directory: str) -> List[str]:
+        try:
+            names = [name for name in os.listdir(directory) if name.endswith(_SUFFIX)]
+        except FileNotFoundError:
+            return []
+        return sorted(names, reverse=True)
+
+    def latest(self, url: str) -> Optional[str]:
+        """Return the path of url's newest snapshot, or None."""
+        directory = self.url_dir(url)
+        names = self._snapshots(directory)
+        return os.path.join(directory, names[0]) if names else None
+
+    def stats(self) -> Dict[str, int]:
+        """Count the archived URLs, snapshots and compressed bytes."""
+        counts = {"urls": 0, "snapshots": 0, "bytes": 0}
+        for directory, _, names in os.walk(self.root):
+            files = [name for name in names if name.endswith(_SUFFIX)]
+            if files:
+                counts["urls"] += 1
+                counts["snapshots"] += len(files)
+                counts["bytes"] += sum(os.path.getsize(os.path.join(directory, name)) for name in files)
+        return counts
+
+_snapshot_store: Optional[SnapshotStore] = None
+
+def get_snapshot_store() -> Optional[SnapshotStore]:
+    """Return the process-wide store at SNAPSHOT_PATH, or None unless SNAPSHOTS_ENABLED."""
+    global _snapshot_store
+    if _snapshot_store is None and SNAPSHOTS_ENABLED:
+        _snapshot_store = SnapshotStore()
+    return _snapshot_store
+
+# Compiled profiles of a worker process, by their settings
+_worker_profiles: Dict[str, Any] = {}
+
+def _reextract_page(root: str, url: str, settings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Extract the fields of url's newest snapshot (runs in a worker process)."""
+    from app.ingestion.extraction import ExtractionProfile
+
+    path = SnapshotStore(root).latest(url)
+    if path is None:
+        return None
+    key = json.dumps(settings, sort_keys=True)
+    profile = _worker_profiles.get(key)
+    if profile is None:
+        profile = _worker_profiles[key] = ExtractionProfile(settings["selectors"], date_format=settings.get("date_format"))
+    _, html = read_snapshot(path)
+    return profile.extract(html)
+
+async def reextract(
+    db,
+    source_name: str,
+    selectors: Optional[Dict[str, Any]] = None,
+    workers: int = REEXTRACT_WORKERS,
+    batch_size: int = REEXTRACT_BATCH_SIZE,
+    dry_run: bool = False,
+    store: Optional[SnapshotStore] = None,
+) -> Dict[str, int]:
+    """
+    Re-run extraction over the snapshots of a source's content and update changed rows.
+
+    Rows are processed in batches of batch_size, one transaction each. Changed rows
+    are written by app.db.crud.update_extracted_contents: new raw bodies go to the
+    blob store, keyword tags and summaries follow the new text, and rows whose date
+    changes move between the daily counters.
+
+    Args:
+        db: Database session (primary)
+        source_name: Source whose content is re-extracted
+        selectors: Selectors to use for every row; defaults to the source's extraction
+            profile of each row's domain (app/ingestion/profiles.py)
+        workers: Extraction processes
+        batch_size: Rows per batch
+        dry_run: Count the changes without writing them
+        store: Snapshot archive; defaults to SNAPSHOT_PATH
+
+    Returns:
+        Counts of rows seen, updated, unchanged, without snapshot, without content
+        for the selectors, and failed
+    """
+    from sqlalchemy import select
+
+    from app.db.crud import get_source, update_extracted_contents
+    from app.db.models import Content as ContentModel
+    from app.ingestion.politeness import host_of
+    from app.ingestion.profiles import profile_settings
+
+    source = await get_source(db, source_name)
+    if source is None:
+        raise ValueError(f"Unknown source '{source_name}'")
+    store = store or SnapshotStore()
+    counts = {"rows": 0, "updated": 0, "unchanged": 0, "missing": 0, "empty": 0, "failed": 0}
+    loop = asyncio.get_running_loop()
+    last_id = 0
+
+    with ProcessPoolExecutor(max_workers=max(workers, 1)) as pool:
+        while True:
+            rows = (await db.execute(
+                select(ContentModel.id, ContentModel.date, ContentModel.url, ContentModel.title, ContentModel.clean_content)
+                .where(ContentModel.source == source.name, ContentModel.url.isnot(None), ContentModel.id > last_id)
+                .order_by(ContentModel.id)
+                .limit(batch_size)
+            )).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            counts["rows"] += len(rows)
+            results = await asyncio.gather(
+                *(
+                    loop.run_in_executor(
+                        pool, _reextract_page, store.root, row.url,
+                        {"selectors": selectors} if selectors is not None else profile_settings(source.config, host_of(row.url)),
+                    )
+                    for row in rows
+                ),
+                return_exceptions=True,
+            )
+
+            changes = []
+            for row, fields in zip(rows, results):
+                if isinstance(fields, BaseException):
+                    counts["failed"] += 1
+                    logger.warning(f"Error re-extracting {row.url}: {str(fields)}")
+                    continue
+                if fields is None:
+                    counts["missing"] += 1
+                    continue
+                if not fields["clean_content"]:
+                    counts["empty"] += 1
+                    continue
+                new_date = date.fromisoformat(fields["date"]) if fields["date"] else row.date
+                title = fields["title"] or row.title
+                if (title, fields["clean_content"], new_date) == (row.title, row.clean_content, row.date):
+                    counts["unchanged"] += 1
+                    continue
+                changes.append((row, fields, title, new_date))
+            counts["updated"] += len(changes)
+            if dry_run or not changes:
+                continue
+
+            await update_extracted_contents(db, [
+                {
+                    "id": row.id,
+                    "source": source.name,
+                    "date": row.date,
+                    "new_date": new_date,
+                    "title": title,
+                    "raw_content": fields["raw_content"],
+                    "clean_content": fields["clean_content"],
+                    "old_clean_content": row.clean_content,
+                }
+                for row, fields, title, new_date in changes
+            ])
+            await db.commit()
+            logger.info(f"Re-extracted {counts['rows']} rows of {source.name}: {counts['updated']} updated")
+    return counts
+
+async def _main(args):
+    if args.command == "stats":
+        counts = SnapshotStore().stats()
+        print(f"{counts['urls']} URLs, {counts['snapshots']} snapshots, {counts['bytes']} bytes")
+        return
+
+    from app.db.database import async_session, engine
+
+    try:
+        async with async_session() as db:
+            counts = await reextract(
+                db,
+                args.source,
+                selectors=json.loads(args.selectors) if args.selectors else None,
+                workers=args.workers,
+                batch_size=args.batch_size,
+                dry_run=args.dry_run,
+            )
+        print(f"{counts['rows']} rows: {counts['updated']} {'would change' if args.dry_run else 'updated'}, "
+              f"{counts['unchanged']} unchanged, {counts['missing']} without snapshot, "
+              f"{counts['empty']} without content, {counts['failed']} failed")
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Re-extract content from stored page snapshots")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    reextract_parser = subparsers.add_parser("reextract", help="Re-run extraction over a source's snapshots")
+    reextract_parser.add_argument("--source", required=True)
+    reextract_parser.add_argument("--selectors", help="Selectors as JSON; defaults to the source's config")
+    reextract_parser.add_argument("--workers", type=int, default=REEXTRACT_WORKERS)
+    reextract_parser.add_argument("--batch-size", type=int, default=REEXTRACT_BATCH_SIZE)
+    reextract_parser.add_argument("--dry-run", action="store_true", help="Only count the changes")
+    subparsers.add_parser("stats", help="Count stored snapshots")
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,250 @@
+"""
+Extractive summaries with TF-IDF sentence vectors and TextRank.
+
+Sentences are scored by PageRank over their cosine-similarity graph, computed with
+NumPy matrix operations, and the best ones are returned in document order. Summaries
+are computed once at ingestion (or by ``backfill`` for older rows) and stored in
+``content.summary``, so the summarize_content MCP tool only reads them. Digests over
+many documents rank the sentences of their stored summaries the same way, skipping
+near-duplicates.
+
+NumPy is imported on first use.
+
+Usage:
+    python -m app.ingestion.summarizer backfill [--source WSJ] [--start-date 2024-01-01] [--batch-size 500]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import re
+from datetime import date
+from typing import List, Optional, Sequence
+
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Content as ContentModel
+from app.db.partitions import date_range_filter
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_ON_INGEST = os.getenv("SUMMARY_ON_INGEST", "true").lower() == "true"
+SUMMARY_SENTENCES = int(os.getenv("SUMMARY_SENTENCES", "3"))
+# Only the first sentences of very long documents are ranked
+SUMMARY_MAX_SENTENCES = int(os.getenv("SUMMARY_MAX_SENTENCES", "300"))
+# Summaries are cut at a word boundary past this length (text without punctuation is one long "sentence")
+SUMMARY_MAX_CHARS = int(os.getenv("SUMMARY_MAX_CHARS", "1000"))
+
+# Sentences end at . ! or ? followed by whitespace and a capital/digit/quote, or at a blank line
+_SENTENCE_END = re.compile(r"(?<=[.!?])[\"')\]]*\s+(?=[\"'(\[]?[A-Z0-9])|\n\s*\n")
+_WORD = re.compile(r"[^\W\d_]{2,}")
+_MIN_SENTENCE_WORDS = 4
+_DAMPING = 0.85
+_DUPLICATE_SIMILARITY = 0.7
+
+_STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below between
+both but by can could did do does doing down during each few for from further had has have having he her here
+hers herself him himself his how i if in into is it its itself just me more most my myself no nor not now of off
+on once only or other our ours ourselves out over own same she should so some such than that the their theirs
+them themselves then there these they this those through to too under until up very was we were what when where
+which while who whom why will with would you your yours yourself yourselves said says say new one two also
+""".split())
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences with normalized whitespace."""
+    sentences = []
+    for part in _SENTENCE_END.split(text or ""):
+        sentence = " ".join(part.split())
+        if sentence:
+            sentences.append(sentence)
+    return sentences
+
+def _words(sentence: str) -> List[str]:
+    return [word for word in _WORD.findall(sentence.lower()) if word not in _STOPWORDS]
+
+def _sentence_vectors(sentences: Sequence[str]):
+    """
+    Return L2-normalized TF-IDF rows for the sentences (sentences x terms).
+
+    IDF is taken over the sentences themselves, so words that appear everywhere in the
+    document count for little.
+    """
+    import numpy as np
+
+    words = [_words(sentence) for sentence in sentences]
+    vocabulary = {}
+    columns = np.array([vocabulary.setdefault(word, len(vocabulary)) for row in words for word in row], dtype=np.intp)
+    rows = np.repeat(np.arange(len(sentences)), [len(row) for row in words])
+    size = max(len(vocabulary), 1)
+    counts = np.bincount(rows * size + columns, minlength=len(sentences) * size).reshape(len(sentences), size)
+
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1.0
+    vectors = np.log1p(counts) * idf
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+def textrank(sentences: Sequence[str], vectors=None, iterations: int = 50, tolerance: float = 1e-6):
+    """
+    Score sentences by PageRank over their cosine-similarity graph.
+
+    Args:
+        sentences: Sentences to rank
+        vectors: Their _sentence_vectors, if already computed
+
+    Returns:
+        NumPy array with one score per sentence
+    """
+    import numpy as np
+
+    count = len(sentences)
+    if vectors is None:
+        vectors = _sentence_vectors(sentences)
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, 0.0)
+    # Column-stochastic transition matrix; sentences similar to nothing jump anywhere
+    weights = similarity.sum(axis=0)
+    transition = np.where(weights > 0, similarity / np.where(weights == 0, 1.0, weights), 1.0 / count)
+    scores = np.full(count, 1.0 / count)
+    for _ in range(iterations):
+        updated = (1 - _DAMPING) / count + _DAMPING * (transition @ scores)
+        if np.abs(updated - scores).sum() < tolerance:
+            scores = updated
+            break
+        scores = updated
+    return scores
+
+def _shorten(summary: str) -> str:
+    if len(summary) <= SUMMARY_MAX_CHARS:
+        return summary
+    return summary[:SUMMARY_MAX_CHARS].rsplit(" ", 1)[0] + "..."
+
+def summarize(text: Optional[str], sentences: int = SUMMARY_SENTENCES) -> Optional[str]:
+    """
+    Return the highest ranked sentences of text in their original order.
+
+    Short texts are returned whole (with normalized whitespace); empty text gives None.
+
+    Args:
+        text: Clean content
+        sentences: Number of sentences to keep
+    """
+    candidates = split_sentences(text or "")[:SUMMARY_MAX_SENTENCES]
+    if not candidates:
+        return None
+    if len(candidates) <= sentences:
+        return _shorten(" ".join(candidates))
+    # Fragments such as bylines and captions are never picked
+    eligible = [index for index, sentence in enumerate(candidates) if len(sentence.split()) >= _MIN_SENTENCE_WORDS]
+    if len(eligible) <= sentences:
+        eligible = list(range(len(candidates)))
+    scores = textrank([candidates[index] for index in eligible])
+    best = sorted(sorted(range(len(eligible)), key=lambda i: -scores[i])[:sentences])
+    return _shorten(" ".join(candidates[eligible[i]] for i in best))
+
+def summarize_many(texts: Sequence[Optional[str]], sentences: int = SUMMARY_SENTENCES) -> List[Optional[str]]:
+    return [summarize(text, sentences) for text in texts]
+
+def digest(summaries: Sequence[Optional[str]], sentences: int = 5) -> List[str]:
+    """
+    Pick the most central sentences across several documents' summaries.
+
+    Sentences nearly identical to one already picked (cosine similarity above 0.7),
+    such as the same story from two sources, are skipped.
+
+    Args:
+        summaries: Stored summaries of the documents
+        sentences: Number of sentences in the digest
+
+    Returns:
+        Digest sentences, most central first
+    """
+    candidates = list(dict.fromkeys(s for summary in summaries for s in split_sentences(summary or "")))
+    if len(candidates) <= 1:
+        return candidates
+    vectors = _sentence_vectors(candidates)
+    scores = textrank(candidates, vectors)
+    picked: List[int] = []
+    for index in sorted(range(len(candidates)), key=lambda i: -scores[i]):
+        if all(float(vectors[index] @ vectors[other]) < _DUPLICATE_SIMILARITY for other in picked):
+            picked.append(index)
+            if len(picked) == sentences:
+                break
+    return [candidates[index] for index in picked]
+
+async def summarize_texts(texts: List[Optional[str]]) -> List[Optional[str]]:
+    """Summarize texts in a worker thread (NumPy releases the GIL for the heavy parts)."""
+    if not any(texts):
+        return [None for _ in texts]
+    return await asyncio.to_thread(summarize_many, texts)
+
+async def backfill(
+    db: AsyncSession,
+    source: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    batch_size: int = 500,
+) -> int:
+    """
+    Store summaries for content rows that have none, one batch per transaction.
+
+    Returns:
+        Number of rows summarized
+    """
+    done = 0
+    last = None
+    while True:
+        query = (
+            select(ContentModel.id, ContentModel.date, ContentModel.clean_content)
+            .where(ContentModel.summary.is_(None), ContentModel.clean_content.is_not(None))
+            .where(*date_range_filter(start_date, end_date))
+            .order_by(ContentModel.date, ContentModel.id)
+            .limit(batch_size)
+        )
+        if source:
+            query = query.where(ContentModel.source == source)
+        if last:
+            query = query.where(tuple_(ContentModel.date, ContentModel.id) > last)
+        rows = (await db.execute(query)).all()
+        if not rows:
+            break
+        last = (rows[-1].date, rows[-1].id)
+        summaries = await summarize_texts([row.clean_content for row in rows])
+        # ORM bulk UPDATE by primary key; empty text gets an empty summary so it is not picked up again
+        await db.execute(
+            update(ContentModel),
+            [{"id": row.id, "date": row.date, "summary": summary or ""} for row, summary in zip(rows, summaries)],
+        )
+        await db.commit()
+        done += len(rows)
+        logger.info(f"Summarized {done} rows")
+    return done
+
+async def _main(args):
+    from app.db.database import async_session, engine
+
+    try:
+        async with async_session() as db:
+            done = await backfill(
+                db,
+                source=args.source,
+                start_date=date.fromisoformat(args.start_date) if args.start_date else None,
+                end_date=date.fromisoformat(args.end_date) if args.end_date else None,
+                batch_size=args.batch_size,
+            )
+            print(f"Summarized {done} rows")
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Compute extractive summaries of stored content")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    backfill_parser = subparsers.add_parser("backfill", help="Summarize rows that have no summary yet")
+    backfill_parser.add_argument("--source")
+    backfill_parser.add_argument("--start-date", help="ISO date")
+    backfill_parser.add_argument("--end-date", help="ISO date")
+    backfill_parser.add_argument("--batch-size", type=int, default=500)
+    asyncio.run(_main(parser.parse_args()))
@@ -17,6 +17,8 @@ class TwitterClient:
         self.api_secret = os.getenv("TWITTER_API_SECRET")
         self.access_token = os.getenv("TWITTER_ACCESS_TOKEN")
         self.access_token_secret = os.getenv("TWITTER_ACCESS_TOKEN_SECRET")
+        # API host, overridable to point at a local stand-in (e.g. for load tests)
+        self.api_host = os.getenv("TWITTER_API_HOST", "api.twitter.com")
         
         self.api = None
         self.initialize()
@@ -37,7 +39,7 @@ class TwitterClient:
             )
             
             # Create API instance
-            self.api = tweepy.API(auth)
+            self.api = tweepy.API(auth, host=self.api_host)
             
             # Verify credentials
             self.api.verify_credentials()
@@ -0,0 +1,212 @@
+"""
+Streaming multipart uploads for the file ingestion endpoints.
+
+Starlette parses a form before the endpoint runs: it reads the whole body, with no
+size limit, into its own spooled file. ``receive_upload`` reads the request body
+as it arrives instead, and:
+
+- refuses a body larger than UPLOAD_MAX_BYTES from its Content-Length, before
+  reading any of it; a body without a Content-Length is cut off as soon as it
+  goes over the limit
+- hashes the file with SHA-256 while it streams
+- keeps the file in memory up to UPLOAD_SPOOL_BYTES and spills it to an anonymous
+  temporary file beyond that; the spill and later disk writes run in a worker
+  thread
+- holds one of UPLOAD_MAX_CONCURRENT slots from the first byte until the upload is
+  closed. This bounds the disk that concurrent uploads can use. Further uploads
+  wait, with their bodies left unread on the socket.
+
+A spilled file has no name on disk (``tempfile.SpooledTemporaryFile``). Its space
+is freed when the upload is closed, or when the process exits.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+from contextlib import asynccontextmanager
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, Dict, List, Optional
+
+from multipart.multipart import MultipartParser, parse_options_header
+
+logger = logging.getLogger(__name__)
+
+# Largest request body accepted (file plus form fields)
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(100 * 1024 * 1024)))
+# Files up to this size stay in memory
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", str(4 * 1024 * 1024)))
+UPLOAD_MAX_CONCURRENT = int(os.getenv("UPLOAD_MAX_CONCURRENT", "4"))
+
+_upload_slots = asyncio.Semaphore(UPLOAD_MAX_CONCURRENT)
+
+class UploadError(Exception):
+    """The request is not a usable upload"""
+    status_code = 400
+
+class UploadTooLarge(UploadError):
+    """The request body is over the size limit"""
+    status_code = 413
+
+class Upload:
+    """Form fields and the file of a received upload"""
+
+    def __init__(self):
+        self.fields: Dict[str, str] = {}
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.size = 0
+        # Positioned at the start once the upload has been received
+        self.file = SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES)
+        self._sha256 = hashlib.sha256()
+
+    @property
+    def sha256(self) -> str:
+        return self._sha256.hexdigest()
+
+    @property
+    def in_memory(self) -> bool:
+        return not self.file._rolled
+
+    def _append(self, data: bytes):
+        self._sha256.update(data)
+        self.file.write(data)
+
+    async def append(self, data: bytes):
+        """Add data to the file, in a worker thread once it is (or would be) on disk."""
+        self.size += len(data)
+        if self.in_memory and self.size <= UPLOAD_SPOOL_BYTES:
+            self._append(data)
+        else:
+            await asyncio.to_thread(self._append, data)
+
+    def close(self):
+        self.file.close()
+
+class _FormState:
+    """Multipart parser callbacks; file data is collected and written by receive_upload"""
+
+    def __init__(self, upload: Upload, file_field: str):
+        self.upload = upload
+        self.file_field = file_field
+        self.header_name = b""
+        self.header_value = b""
+        self.headers: Dict[bytes, bytes] = {}
+        self.name: Optional[str] = None
+        self.is_file = False
+        self.data: List[bytes] = []
+        self.pending: List[bytes] = []
+
+    def on_part_begin(self):
+        self.headers = {}
+        self.name = None
+        self.is_file = False
+        self.data = []
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self.header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self.header_value += data[start:end]
+
+    def on_header_end(self):
+        self.headers[self.header_name.lower()] = self.header_value
+        self.header_name = self.header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self.headers.get(b"content-disposition", b""))
+        if b"name" not in options:
+            raise UploadError("Form part without a name")
+        self.name = options[b"name"].decode("utf-8", "replace")
+        if b"filename" in options:
+            if self.name != self.file_field or self.upload.filename is not None:
+                raise UploadError(f"Unexpected file in form field '{self.name}'")
+            self.is_file = True
+            self.upload.filename = options[b"filename"].decode("utf-8", "replace")
+            content_type = self.headers.get(b"content-type")
+            self.upload.content_type = content_type.decode("latin-1") if content_type else None
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self.is_file:
+            self.pending.append(data[start:end])
+        else:
+            self.data.append(data[start:end])
+
+    def on_part_end(self):
+        if not self.is_file and self.name is not None:
+            self.upload.fields[self.name] = b"".join(self.data).decode("utf-8", "replace")
+
+    def callbacks(self) -> Dict[str, object]:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+async def _receive(request, upload: Upload, file_field: str, max_bytes: int):
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise UploadError("Expected a multipart/form-data body")
+
+    state = _FormState(upload, file_field)
+    parser = MultipartParser(params[b"boundary"], state.callbacks())
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_bytes:
+            raise UploadTooLarge(f"Upload larger than {max_bytes} bytes")
+        parser.write(chunk)
+        # Callbacks cannot await; write what this chunk added to the file
+        if state.pending:
+            data = state.pending[0] if len(state.pending) == 1 else b"".join(state.pending)
+            state.pending.clear()
+            await upload.append(data)
+    parser.finalize()
+    if upload.filename is None:
+        raise UploadError(f"No file in form field '{file_field}'")
+    if upload.in_memory:
+        upload.file.seek(0)
+    else:
+        await asyncio.to_thread(upload.file.seek, 0)
+
+@asynccontextmanager
+async def receive_upload(request, file_field: str = "file", max_bytes: int = UPLOAD_MAX_BYTES) -> AsyncIterator[Upload]:
+    """
+    Receive a multipart upload with one file from request's body stream.
+
+    The endpoint must not declare File or Form parameters, or FastAPI reads the body first.
+    The file is closed, and its disk space freed, when the block exits.
+
+    Args:
+        request: Starlette request
+        file_field: Form field of the file
+        max_bytes: Largest body accepted
+
+    Yields:
+        The received Upload
+
+    Raises:
+        UploadTooLarge: If the body is over max_bytes
+        UploadError: If the body is not a multipart form with a file in file_field
+    """
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > max_bytes:
+        raise UploadTooLarge(f"Upload of {length} bytes is larger than {max_bytes} bytes")
+
+    async with _upload_slots:
+        upload = Upload()
+        try:
+            try:
+                await _receive(request, upload, file_field, max_bytes)
+            except UploadError:
+                raise
+            except Exception as e:
+                # Malformed multipart bodies
+                raise UploadError(f"Could not read upload: {str(e)}")
+            logger.debug(f"Received {upload.filename}: {upload.size} bytes, {'memory' if upload.in_memory else 'spilled'}")
+            yield upload
+        finally:
+            upload.close()
@@ -2,89 +2,168 @@ import logging
 from playwright.async_api import async_playwright
 from bs4 import BeautifulSoup
 import asyncio
-from typing import Dict, Any, Optional
+import os
+import time
+from typing import Dict, Any, Optional, Tuple, Union
 from datetime import datetime
-import re
+
+from app.ingestion.extraction import ExtractionProfile, clean_text, extract_text, parse_date
+from app.ingestion.politeness import PolitenessLimiter, parse_retry_after, politeness_limiter
+from app.ingestion.render_client import RenderPool, get_render_pool
+from app.ingestion.snapshots import SnapshotStore, get_snapshot_store
+from app.render_worker import DEFAULT_HEADERS, RENDER_TIMEOUT_MS, render_page
 
 logger = logging.getLogger(__name__)
 
+# Times a page answered with 429/503 is retried after backing off
+POLITENESS_MAX_RETRIES = int(os.getenv("POLITENESS_MAX_RETRIES", "3"))
+# Back-off when a 429/503 has no usable Retry-After
+POLITENESS_DEFAULT_BACKOFF = float(os.getenv("POLITENESS_DEFAULT_BACKOFF", "30"))
+
 class WebScraper:
-    def __init__(self):
+    def __init__(
+        self,
+        limiter: PolitenessLimiter = politeness_limiter,
+        render_pool: Optional[RenderPool] = None,
+        snapshot_store: Optional[SnapshotStore] = None,
+    ):
+        """
+        Args:
+            limiter: Per-host politeness limiter
+            render_pool: Render workers to load pages on; defaults to RENDER_WORKER_URLS,
+                and pages are rendered in a browser owned by this scraper when there are none
+            snapshot_store: Archive for the rendered pages; defaults to SNAPSHOT_PATH when
+                SNAPSHOTS_ENABLED, otherwise pages are not kept
+        """
         self.browser = None
+        self.playwright = None
+        self.http_client = None
+        # Concurrent scrapes share one browser; the first launches it, the others wait
+        self._browser_lock = asyncio.Lock()
+        self.limiter = limiter
+        self.render_pool = render_pool if render_pool is not None else get_render_pool()
+        self.snapshot_store = snapshot_store if snapshot_store is not None else get_snapshot_store()
         
     async def initialize(self):
-        """Initialize the browser."""
-        if not self.browser:
-            playwright = await async_playwright().start()
-            self.browser = await playwright.chromium.launch(headless=True)
+        """Initialize the browser (not needed when rendering on render workers)."""
+        if self.browser or self.render_pool is not None:
+            return
+        async with self._browser_lock:
+            if not self.browser:
+                self.playwright = await async_playwright().start()
+                self.browser = await self.playwright.chromium.launch(headless=True)
         
     async def close(self):
         """Close the browser."""
         if self.browser:
             await self.browser.close()
             self.browser = None
+        if self.playwright:
+            await self.playwright.stop()
+            self.playwright = None
+        if self.http_client:
+            await self.http_client.aclose()
+            self.http_client = None
+
+    async def _fetch(self, url: str) -> Dict[str, Any]:
+        """Fetch url without a browser, in the shape of a render result."""
+        if self.http_client is None:
+            import httpx
+
+            self.http_client = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=RENDER_TIMEOUT_MS / 1000.0,
+                headers=DEFAULT_HEADERS,
+            )
+        started = time.perf_counter()
+        response = await self.http_client.get(url)
+        return {
+            "url": url,
+            "final_url": str(response.url),
+            "status": response.status_code,
+            "retry_after": response.headers.get("retry-after"),
+            "html": response.text,
+            "timing": {"total_ms": round((time.perf_counter() - started) * 1000.0, 1)},
+        }
             
-    async def scrape_url(self, url: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    async def _render(self, url: str, wait_for: Optional[str], render: str = "browser") -> Dict[str, Any]:
+        """Render url on a render worker or in this scraper's own browser, or fetch it (render="static")."""
+        if render == "static":
+            return await self._fetch(url)
+        if self.render_pool is not None:
+            return await self.render_pool.render(url, wait_for=wait_for)
+        await self.initialize()
+        return await render_page(self.browser, url, wait_for=wait_for)
+
+    async def _load(self, url: str, profile: ExtractionProfile, rate: Optional[Tuple[float, int]]) -> Dict[str, Any]:
+        """
+        Render url once the host's politeness limiter allows it.
+
+        A 429 or 503 answer blocks the host for its Retry-After (for every worker
+        sharing the limiter) and the request is queued again, up to
+        POLITENESS_MAX_RETRIES times.
+        """
+        limits = rate or ()
+        for attempt in range(POLITENESS_MAX_RETRIES + 1):
+            await self.limiter.acquire(url, *limits)
+            rendered = await self._render(url, profile.wait_for, profile.render)
+            if rendered["status"] not in (429, 503) or attempt == POLITENESS_MAX_RETRIES:
+                return rendered
+            delay = parse_retry_after(rendered["retry_after"])
+            logger.warning(f"{url} answered {rendered['status']}, retrying after {delay if delay is not None else POLITENESS_DEFAULT_BACKOFF:.1f}s")
+            await self.limiter.block(url, delay if delay is not None else POLITENESS_DEFAULT_BACKOFF)
+        return rendered
+
+    async def scrape_url(
+        self,
+        url: str,
+        config: Union[Dict[str, Any], ExtractionProfile],
+        rate: Optional[Tuple[float, int]] = None,
+    ) -> Dict[str, Any]:
         """
         Scrape content from a URL.
         
         Args:
             url: The URL to scrape
-            config: Configuration for the scraper including CSS selectors
+            config: Extraction profile of the source for this URL (see app/ingestion/profiles.py),
+                or CSS selectors for a one-off scrape:
                 - title_selector: CSS selector for the title
                 - content_selector: CSS selector for the main content
                 - date_selector: CSS selector for the date
                 - author_selector: CSS selector for the author
+                - wait_for: CSS selector to wait for before reading the page
+            rate: (requests per second, burst) for the host, e.g. from source_rate();
+                defaults to POLITENESS_DEFAULT_RATE / POLITENESS_DEFAULT_BURST
         
         Returns:
             A dictionary containing the scraped content
         """
         try:
-            await self.initialize()
-            page = await self.browser.new_page()
-            
-            # Set default headers to mimic a browser
-            await page.set_extra_http_headers({
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                "Accept-Language": "en-US,en;q=0.9",
-            })
-            
-            # Navigate to the URL
-            await page.goto(url, wait_until="networkidle")
-            
-            # Wait for content to load
-            if "wait_for" in config:
-                await page.wait_for_selector(config["wait_for"])
-                
-            # Get page content
-            html_content = await page.content()
-            
-            # Close the page
-            await page.close()
+            profile = config if isinstance(config, ExtractionProfile) else ExtractionProfile(config)
             
-            # Parse with BeautifulSoup
-            soup = BeautifulSoup(html_content, "html.parser")
+            # Render the page, queued behind other requests to the same host
+            rendered = await self._load(url, profile, rate)
+            html_content = rendered["html"]
+            logger.debug(f"Rendered {url} on {rendered.get('worker', 'local browser')}: {rendered['timing']}")
             
-            # Extract relevant information
-            title = self._extract_text(soup, config.get("title_selector"))
-            content = self._extract_text(soup, config.get("content_selector"))
-            date_str = self._extract_text(soup, config.get("date_selector"))
-            author = self._extract_text(soup, config.get("author_selector"))
+            # Keep the rendered page for re-extraction with other selectors
+            snapshot = None
+            if self.snapshot_store is not None and (rendered["status"] is None or rendered["status"] < 400):
+                snapshot = await self.snapshot_store.save(url, rendered)
             
-            # Try to parse date
-            date = None
-            if date_str:
-                date = self._parse_date(date_str)
+            # Extract relevant information with the profile's compiled selectors
+            fields = profile.extract(html_content)
             
             return {
-                "title": title,
-                "raw_content": content,
-                "clean_content": self._clean_text(content),
-                "date": date,
+                "title": fields["title"],
+                "raw_content": fields["raw_content"],
+                "clean_content": fields["clean_content"],
+                "date": fields["date"],
                 "url": url,
                 "metadata": {
-                    "author": author,
+                    "author": fields["author"],
                     "scrape_date": datetime.now().isoformat(),
+                    **({"snapshot": snapshot} if snapshot else {}),
                 }
             }
         except Exception as e:
@@ -93,42 +172,12 @@ class WebScraper:
     
     def _extract_text(self, soup: BeautifulSoup, selector: Optional[str]) -> Optional[str]:
         """Extract text from a BeautifulSoup object using a CSS selector."""
-        if not selector:
-            return None
-            
-        elements = soup.select(selector)
-        if not elements:
-            return None
-            
-        return elements[0].get_text(strip=True)
+        return extract_text(soup, selector)
     
     def _clean_text(self, text: Optional[str]) -> Optional[str]:
         """Clean text by removing extra whitespace and normalizing."""
-        if not text:
-            return None
-            
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text)
-        return text.strip()
+        return clean_text(text)
     
     def _parse_date(self, date_str: str) -> Optional[str]:
         """Parse a date string into a standardized format."""
-        try:
-            # Try common date formats
-            date_formats = [
-                "%B %d, %Y",           # January 1, 2023
-                "%d %B %Y",            # 1 January 2023
-                "%Y-%m-%d",            # 2023-01-01
-                "%m/%d/%Y",            # 01/01/2023
-                "%d/%m/%Y",            # 01/01/2023
-            ]
-            
-            for fmt in date_formats:
-                try:
-                    return datetime.strptime(date_str, fmt).date().isoformat()
-                except ValueError:
-                    continue
-                    
-            return None
-        except Exception:
-            return None 
\ No newline at end of file
+        return parse_date(date_str)
@@ -1,12 +1,16 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import os
 import logging
 from dotenv import load_dotenv
 
-# Load environment variables
+# Load environment variables (before the app modules below read their settings)
 load_dotenv()
 
+from app.core.admission import AdmissionMiddleware
+from app.core.profiling import ProfilingMiddleware
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -21,6 +25,10 @@ app = FastAPI(
     version="0.1.0",
 )
 
+# Concurrency budgets for MCP reads and each kind of ingestion (added first so
+# that CORS headers are set on its 429 responses too)
+app.add_middleware(AdmissionMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -30,6 +38,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in per-request profiling (X-Profile header or /api/admin/profiling toggle)
+app.add_middleware(ProfilingMiddleware)
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -38,6 +49,7 @@ async def root():
         "name": "MCP Server",
         "version": "0.1.0",
         "status": "online",
+        "role": APP_ROLE,
     }
 
 # Health check endpoint
@@ -46,8 +58,8 @@ async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
 
-# Include API router
-from app.api.api import api_router
+# Include API router (mounted routers depend on APP_ROLE)
+from app.api.api import api_router, APP_ROLE
 app.include_router(api_router, prefix="/api")
 
 # Include documentation customization
@@ -55,11 +67,28 @@ app.include_router(api_router, prefix="/api")
 async def startup_event():
     """Startup event handler."""
     logger.info("Starting up MCP Server...")
+    # Keep monthly content partitions created ahead of incoming dates (DDL on the
+    # primary, so only in workers that write)
+    if APP_ROLE != "mcp-only":
+        from app.db.partitions import CONTENT_PARTITION_MAINTENANCE, partition_maintenance_loop
+        if CONTENT_PARTITION_MAINTENANCE:
+            app.state.partition_task = asyncio.create_task(partition_maintenance_loop())
+    # Poll source feeds and sitemaps and crawl the discovered URLs
+    if APP_ROLE != "mcp-only":
+        from app.ingestion.discovery import DISCOVERY_ENABLED, discovery_loop
+        if DISCOVERY_ENABLED:
+            app.state.discovery_task = asyncio.create_task(discovery_loop())
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Shutdown event handler."""
     logger.info("Shutting down MCP Server...")
+    for name in ("partition_task", "discovery_task"):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
+    from app.db.database import dispose_engines
+    await dispose_engines()
 
 if __name__ == "__main__":
     import uvicorn
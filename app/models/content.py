@@ -15,10 +15,15 @@ class Tag(TagBase):
     class Config:
         orm_mode = True
 
+class TagWithCount(Tag):
+    content_count: int = 0
+    last_content_date: Optional[date] = None
+
 class ContentBase(BaseModel):
     source: str
     raw_content: str
     clean_content: Optional[str] = None
+    summary: Optional[str] = None  # Computed from clean_content when not given
     title: Optional[str] = None
     url: Optional[str] = None
     date: date
@@ -36,6 +41,16 @@ class Content(ContentBase):
     class Config:
         orm_mode = True
 
+class BulkImportError(BaseModel):
+    line: int
+    error: str
+
+class BulkImportResponse(BaseModel):
+    imported: int
+    failed: int
+    errors: List[BulkImportError] = []
+    errors_truncated: bool = False
+
 class SourceBase(BaseModel):
     name: str
     type: str
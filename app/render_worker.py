@@ -0,0 +1,290 @@
+"""
+Standalone render worker: owns headless Chromium browsers and renders pages for
+WebScraper over HTTP, so browser capacity scales separately from the API workers.
+
+Pages are rendered in a fresh browser context each (no cookies or storage shared
+between jobs), at most RENDER_PAGES_PER_BROWSER at a time per browser. Browsers are
+relaunched after RENDER_MAX_RENDERS_PER_BROWSER pages, or when they crash, to keep
+Chromium's memory in check. When more than RENDER_MAX_QUEUE jobs are waiting the
+worker answers 503 so the client sends the job to another worker.
+
+Endpoints:
+    POST /render  {"url": ..., "wait_for": "css selector", "wait_until": "networkidle", "timeout_ms": 30000}
+                  -> {"url", "final_url", "status", "retry_after", "html", "timing": {..._ms}}
+    GET  /health  -> {"status", "browsers", "capacity", "active", "queued", "rendered", "failed"}
+
+Requests must carry ``X-Render-Token`` when RENDER_WORKER_TOKEN is set (an open
+renderer fetches any URL it is given).
+
+Usage:
+    python -m app.render_worker --host 127.0.0.1 --port 8100
+    python -m app.render_worker --uds /run/mcp/render.sock
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import time
+from typing import Any, Dict, Optional
+
+from playwright.async_api import async_playwright
+
+logger = logging.getLogger(__name__)
+
+RENDER_BROWSERS = int(os.getenv("RENDER_BROWSERS", "1"))
+RENDER_PAGES_PER_BROWSER = int(os.getenv("RENDER_PAGES_PER_BROWSER", "4"))
+RENDER_MAX_RENDERS_PER_BROWSER = int(os.getenv("RENDER_MAX_RENDERS_PER_BROWSER", "500"))
+# Jobs waiting for a page beyond this are refused with 503
+RENDER_MAX_QUEUE = int(os.getenv("RENDER_MAX_QUEUE", "16"))
+RENDER_TIMEOUT_MS = int(os.getenv("RENDER_TIMEOUT_MS", "30000"))
+RENDER_WORKER_TOKEN = os.getenv("RENDER_WORKER_TOKEN") or None
+
+# Default headers to mimic a browser
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000.0, 1)
+
+async def render_page(
+    browser,
+    url: str,
+    wait_for: Optional[str] = None,
+    wait_until: str = "networkidle",
+    timeout_ms: int = RENDER_TIMEOUT_MS,
+) -> Dict[str, Any]:
+    """
+    Load url in a fresh context of browser and return its rendered HTML.
+
+    Used by the render worker and by WebScraper when it owns its browser.
+
+    Args:
+        browser: Playwright browser
+        url: Page to load
+        wait_for: CSS selector to wait for after the load (skipped for error pages)
+        wait_until: Playwright load state that ends navigation
+        timeout_ms: Navigation and wait_for timeout
+
+    Returns:
+        url, final_url (after redirects), status, retry_after header, html and
+        timing in milliseconds
+    """
+    started = time.perf_counter()
+    context = await browser.new_context(
+        user_agent=DEFAULT_HEADERS["User-Agent"],
+        extra_http_headers={"Accept-Language": DEFAULT_HEADERS["Accept-Language"]},
+    )
+    try:
+        page = await context.new_page()
+        timing = {"context_ms": _elapsed_ms(started)}
+        step = time.perf_counter()
+        response = await page.goto(url, wait_until=wait_until, timeout=timeout_ms)
+        timing["navigation_ms"] = _elapsed_ms(step)
+        status = response.status if response is not None else None
+        if wait_for and (status is None or status < 400):
+            step = time.perf_counter()
+            await page.wait_for_selector(wait_for, timeout=timeout_ms)
+            timing["wait_ms"] = _elapsed_ms(step)
+        step = time.perf_counter()
+        html = await page.content()
+        timing["content_ms"] = _elapsed_ms(step)
+        retry_after = await response.header_value("retry-after") if response is not None else None
+        timing["total_ms"] = _elapsed_ms(started)
+        return {
+            "url": url,
+            "final_url": page.url,
+            "status": status,
+            "retry_after": retry_after,
+            "html": html,
+            "timing": timing,
+        }
+    finally:
+        await context.close()
+
+class RenderOverloaded(Exception):
+    """More jobs are waiting than RENDER_MAX_QUEUE"""
+
+class _BrowserSlot:
+    def __init__(self):
+        self.browser = None
+        self.active = 0
+        self.renders = 0
+        self.lock = asyncio.Lock()
+
+class BrowserPool:
+    """Browsers of one render worker and the jobs running on them"""
+
+    def __init__(
+        self,
+        browsers: int = RENDER_BROWSERS,
+        pages_per_browser: int = RENDER_PAGES_PER_BROWSER,
+        max_renders_per_browser: int = RENDER_MAX_RENDERS_PER_BROWSER,
+        max_queue: int = RENDER_MAX_QUEUE,
+    ):
+        self.slots = [_BrowserSlot() for _ in range(max(browsers, 1))]
+        self.pages_per_browser = max(pages_per_browser, 1)
+        self.max_renders_per_browser = max_renders_per_browser
+        self.max_queue = max_queue
+        self.capacity = len(self.slots) * self.pages_per_browser
+        self._pages = asyncio.Semaphore(self.capacity)
+        self._playwright = None
+        self.queued = 0
+        self.rendered = 0
+        self.failed = 0
+
+    @property
+    def active(self) -> int:
+        return sum(slot.active for slot in self.slots)
+
+    async def start(self):
+        self._playwright = await async_playwright().start()
+        for slot in self.slots:
+            await self._launch(slot)
+        logger.info(f"Render worker ready: {len(self.slots)} browser(s), {self.capacity} pages")
+
+    async def close(self):
+        for slot in self.slots:
+            if slot.browser is not None:
+                await slot.browser.close()
+                slot.browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _launch(self, slot: _BrowserSlot):
+        if slot.browser is not None:
+            try:
+                await slot.browser.close()
+            except Exception:
+                pass
+        slot.browser = await self._playwright.chromium.launch(headless=True)
+        slot.renders = 0
+
+    async def _ready_slot(self) -> _BrowserSlot:
+        # Least busy browser, avoiding browsers due for recycling while others can take the job
+        due = lambda s: s.renders >= self.max_renders_per_browser
+        slot = min([s for s in self.slots if not due(s)] or self.slots, key=lambda s: s.active)
+        async with slot.lock:
+            if due(slot):
+                # Let its pages finish, then start a fresh browser
+                while slot.active:
+                    await asyncio.sleep(0.05)
+                await self._launch(slot)
+            elif slot.browser is None or not slot.browser.is_connected():
+                await self._launch(slot)
+        return slot
+
+    async def render(self, url: str, **options) -> Dict[str, Any]:
+        """
+        Render url on the least busy browser, waiting for a free page.
+
+        Raises:
+            RenderOverloaded: If RENDER_MAX_QUEUE jobs are already waiting
+        """
+        if self.queued >= self.max_queue and self._pages.locked():
+            raise RenderOverloaded()
+        started = time.perf_counter()
+        self.queued += 1
+        try:
+            await self._pages.acquire()
+        finally:
+            self.queued -= 1
+        try:
+            queued_ms = _elapsed_ms(started)
+            slot = await self._ready_slot()
+            slot.active += 1
+            try:
+                result = await render_page(slot.browser, url, **options)
+            finally:
+                slot.active -= 1
+                slot.renders += 1
+            result["timing"]["queued_ms"] = queued_ms
+            self.rendered += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._pages.release()
+
+    def health(self) -> Dict[str, Any]:
+        connected = [slot for slot in self.slots if slot.browser is not None and slot.browser.is_connected()]
+        return {
+            "status": "healthy" if connected else "starting",
+            "worker": socket.gethostname(),
+            "browsers": len(connected),
+            "capacity": self.capacity,
+            "active": self.active,
+            "queued": self.queued,
+            "rendered": self.rendered,
+            "failed": self.failed,
+        }
+
+def create_app(pool: Optional[BrowserPool] = None):
+    """Build the render worker's FastAPI application."""
+    from fastapi import FastAPI, Header, HTTPException
+    from fastapi.responses import JSONResponse
+    from pydantic import BaseModel
+
+    class RenderRequest(BaseModel):
+        url: str
+        wait_for: Optional[str] = None
+        wait_until: str = "networkidle"
+        timeout_ms: int = RENDER_TIMEOUT_MS
+
+    pool = pool or BrowserPool()
+    app = FastAPI(title="MCP Render Worker")
+
+    def check_token(token: Optional[str]):
+        if RENDER_WORKER_TOKEN and token != RENDER_WORKER_TOKEN:
+            raise HTTPException(status_code=401, detail="Invalid render token")
+
+    @app.on_event("startup")
+    async def startup_event():
+        await pool.start()
+
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        await pool.close()
+
+    @app.post("/render")
+    async def render(request: RenderRequest, x_render_token: Optional[str] = Header(None)):
+        check_token(x_render_token)
+        try:
+            return await pool.render(
+                request.url,
+                wait_for=request.wait_for,
+                wait_until=request.wait_until,
+                timeout_ms=request.timeout_ms,
+            )
+        except RenderOverloaded:
+            return JSONResponse(status_code=503, content={"detail": "Render worker overloaded"}, headers={"Retry-After": "1"})
+        except Exception as e:
+            logger.warning(f"Error rendering {request.url}: {str(e)}")
+            raise HTTPException(status_code=502, detail=f"Error rendering {request.url}: {str(e)}")
+
+    @app.get("/health")
+    async def health(x_render_token: Optional[str] = Header(None)):
+        check_token(x_render_token)
+        state = pool.health()
+        return JSONResponse(status_code=200 if state["status"] == "healthy" else 503, content=state)
+
+    return app
+
+if __name__ == "__main__":
+    import uvicorn
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Run a render worker that owns headless browsers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--uds", help="Listen on this unix socket instead of host/port")
+    args = parser.parse_args()
+    # One process per worker: the browser pool lives in it
+    if args.uds:
+        uvicorn.run(create_app(), uds=args.uds)
+    else:
+        uvicorn.run(create_app(), host=args.host, port=args.port)
@@ -0,0 +1,142 @@
+"""
+Time-window and retention benchmark for the partitioned content table.
+
+Loads the same synthetic rows into two scratch tables, one laid out like content
+before migration 0003 (single table, btree on date) and one laid out like it after
+(partitioned by month, BRIN indexes plus the newest-first btree), then times:
+
+- a one-week window query like the MCP tools run (count and a page of 20 rows)
+- removing the oldest month: DELETE on the single table, DETACH + DROP on the partitioned one
+
+Usage:
+    python -m benchmarks.bench_partitions --database-url postgresql+asyncpg://... [--rows 500000]
+        [--months 24] [--output results.json] [--baseline baseline.json]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, time as clock, timedelta
+from typing import Dict
+
+from benchmarks.common import DEFAULT_THRESHOLD, compare_to_baseline, report_regressions, write_results
+
+COLUMNS = "id INTEGER NOT NULL, source VARCHAR(50), title VARCHAR(255), date DATE NOT NULL, created_at TIMESTAMP, clean_content TEXT"
+
+def _month(start: date, offset: int) -> date:
+    index = start.year * 12 + start.month - 1 + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+async def _create_tables(raw, start: date, months: int):
+    await raw.execute(
+        "DROP TABLE IF EXISTS bench_content_single, bench_content_partitioned CASCADE;"
+        f"CREATE TABLE bench_content_single ({COLUMNS}, PRIMARY KEY (id));"
+        "CREATE INDEX ON bench_content_single (date);"
+        f"CREATE TABLE bench_content_partitioned ({COLUMNS}, PRIMARY KEY (id, date)) PARTITION BY RANGE (date);"
+        "CREATE INDEX ON bench_content_partitioned USING brin (date) WITH (pages_per_range = 32);"
+        "CREATE INDEX ON bench_content_partitioned USING brin (created_at) WITH (pages_per_range = 32);"
+        "CREATE INDEX ON bench_content_partitioned (date DESC, id DESC);"
+    )
+    for offset in range(months):
+        first, end = _month(start, offset), _month(start, offset + 1)
+        await raw.execute(
+            f"CREATE TABLE bench_content_partitioned_{offset} PARTITION OF bench_content_partitioned"
+            f" FOR VALUES FROM ('{first}') TO ('{end}')"
+        )
+
+async def _time(raw, query: str, *args, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await raw.fetch(query, *args)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+async def run(database_url: str, rows: int, months: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    rng = random.Random(3)
+    start = date(2023, 1, 1)
+    days = (_month(start, months) - start).days
+    # Rows arrive in date order, as ingestion does
+    records = []
+    for i in range(rows):
+        day = start + timedelta(days=i * days // rows)
+        records.append((i + 1, rng.choice(["WSJ", "Twitter", "Email", "PDF"]), f"Item {i}", day,
+                        datetime.combine(day, clock(12)), "lorem ipsum " * rng.randint(5, 40)))
+
+    engine = create_async_engine(database_url)
+    results = {}
+    try:
+        async with engine.connect() as conn:
+            raw = (await conn.get_raw_connection()).driver_connection
+            await _create_tables(raw, start, months)
+            columns = ["id", "source", "title", "date", "created_at", "clean_content"]
+            for table in ("bench_content_single", "bench_content_partitioned"):
+                await raw.copy_records_to_table(table, records=records, columns=columns)
+                await raw.execute(f"VACUUM ANALYZE {table}")
+
+            window_start = _month(start, months // 2) + timedelta(days=10)
+            window_end = window_start + timedelta(days=6)
+            for table in ("bench_content_single", "bench_content_partitioned"):
+                size = await raw.fetchval(
+                    "SELECT sum(pg_relation_size(c.oid)) FROM pg_class c WHERE c.relkind = 'i' AND c.relname LIKE $1",
+                    f"{table}%",
+                )
+                count_seconds = await _time(
+                    raw, f"SELECT count(*) FROM {table} WHERE date >= $1 AND date <= $2",
+                    window_start, window_end, repeat=repeat,
+                )
+                page_seconds = await _time(
+                    raw, f"SELECT id, source, title, date FROM {table} WHERE date >= $1 AND date <= $2"
+                    " ORDER BY date DESC LIMIT 20",
+                    window_start, window_end, repeat=repeat,
+                )
+                results[f"partitions.window[{table}]"] = {
+                    "count_median_seconds": count_seconds,
+                    "page_median_seconds": page_seconds,
+                    "index_bytes": float(size or 0),
+                }
+
+            # Retention: remove the oldest month
+            started = time.perf_counter()
+            await raw.execute(f"DELETE FROM bench_content_single WHERE date < '{_month(start, 1)}'")
+            results["partitions.retention[bench_content_single]"] = {"median_seconds": time.perf_counter() - started}
+            started = time.perf_counter()
+            await raw.execute(
+                "ALTER TABLE bench_content_partitioned DETACH PARTITION bench_content_partitioned_0;"
+                "DROP TABLE bench_content_partitioned_0"
+            )
+            results["partitions.retention[bench_content_partitioned]"] = {"median_seconds": time.perf_counter() - started}
+
+            await raw.execute("DROP TABLE bench_content_single, bench_content_partitioned CASCADE")
+    finally:
+        await engine.dispose()
+    return results
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare time-window queries and retention on partitioned content")
+    parser.add_argument("--database-url", required=True, help="Postgres database for the scratch tables")
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--baseline", help="Compare against a previous JSON results file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", args.database_url)
+    results = asyncio.run(run(args.database_url, args.rows, args.months, args.repeat))
+    write_results(results, args.output)
+    if args.baseline:
+        return report_regressions(compare_to_baseline(
+            results, args.baseline, args.threshold,
+            metrics=["count_median_seconds", "page_median_seconds", "median_seconds"],
+        ))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
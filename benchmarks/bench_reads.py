@@ -0,0 +1,109 @@
+"""
+Content read path benchmark.
+
+Times one page of the content listing (newest first, with tags) at 100 and 1,000
+rows per page, through:
+
+- the ORM path the endpoints used before: ``select(Content)`` with
+  ``selectinload(tags)``, ``content_to_dict``, validation through the pydantic
+  ``Content`` response model and FastAPI's ``jsonable_encoder`` + ``json.dumps``
+- the read path in app/db/reads.py: a column-projected Core select with tags
+  aggregated in the same query, encoded with orjson
+
+Both must produce the same items. Runs against the content already in the database
+(load some first, e.g. with the bulk import endpoint).
+
+Usage:
+    python -m benchmarks.bench_reads --database-url postgresql+asyncpg://... [--pages 100 1000]
+        [--output results.json] [--baseline baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+from benchmarks.common import DEFAULT_THRESHOLD, compare_to_baseline, report_regressions, write_results
+
+async def _time(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+async def run(pages: List[int], repeat: int) -> Dict[str, Dict[str, float]]:
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+    from sqlalchemy.orm import selectinload
+
+    from app.db import reads
+    from app.db.crud import content_to_dict
+    from app.db.database import async_session, engine
+    from app.db.models import Content as ContentModel
+    from app.models.content import Content
+
+    adapter = TypeAdapter(List[Content])
+    results = {}
+    try:
+        async with async_session() as db:
+            for limit in pages:
+                async def orm_page():
+                    query = (
+                        select(ContentModel)
+                        .options(selectinload(ContentModel.tags))
+                        .order_by(ContentModel.date.desc(), ContentModel.id.desc())
+                        .limit(limit)
+                    )
+                    rows = (await db.execute(query)).scalars().all()
+                    items = adapter.validate_python([content_to_dict(row, None) for row in rows])
+                    body = json.dumps(jsonable_encoder(items)).encode()
+                    # Fresh objects every round, as in a request
+                    db.expunge_all()
+                    return body
+
+                async def core_page():
+                    return reads.dumps(await reads.list_content(db, limit=limit))
+
+                orm_items, core_items = json.loads(await orm_page()), json.loads(await core_page())
+                if orm_items != core_items:
+                    raise AssertionError(f"ORM and Core pages of {limit} rows differ")
+                if len(core_items) < limit:
+                    print(f"Only {len(core_items)} rows in content; page of {limit} is short", file=sys.stderr)
+
+                orm_seconds = await _time(orm_page, repeat)
+                core_seconds = await _time(core_page, repeat)
+                results[f"reads.list[orm,{limit}]"] = {"median_seconds": orm_seconds}
+                results[f"reads.list[core,{limit}]"] = {
+                    "median_seconds": core_seconds,
+                    "speedup": orm_seconds / core_seconds,
+                }
+    finally:
+        await engine.dispose()
+    return results
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare content listing pages through the ORM and the Core read path")
+    parser.add_argument("--database-url", required=True, help="Postgres database with content loaded")
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 1000], help="Rows per page")
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--baseline", help="Compare against a previous JSON results file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    # Must be set before app.db.database creates its engine
+    os.environ["DATABASE_URL"] = args.database_url
+    results = asyncio.run(run(args.pages, args.repeat))
+    write_results(results, args.output)
+    if args.baseline:
+        return report_regressions(compare_to_baseline(results, args.baseline, args.threshold, metrics=["median_seconds"]))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
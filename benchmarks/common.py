@@ -0,0 +1,130 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Every benchmark produces a flat ``{name: {metric: value}}`` mapping which is written
+as JSON so that runs can be compared against a stored baseline.
+"""
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+from statistics import median
+from typing import Callable, Dict, Any, List, Optional
+
+# Default allowed slowdown before a metric is reported as a regression (20%)
+DEFAULT_THRESHOLD = 0.20
+
+def time_callable(fn: Callable[[], Any], repeat: int = 5, min_time: float = 0.2) -> Dict[str, float]:
+    """
+    Time a callable the way timeit does: calibrate a loop count, then repeat.
+
+    Args:
+        fn: Zero-argument callable to time
+        repeat: Number of timed rounds
+        min_time: Minimum duration of a single round in seconds
+
+    Returns:
+        Median and best seconds per call, and calls per second from the median
+    """
+    # Calibrate the number of calls per round
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+
+    rounds = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rounds.append((time.perf_counter() - start) / number)
+
+    median_seconds = median(rounds)
+    return {
+        "median_seconds": median_seconds,
+        "min_seconds": min(rounds),
+        # Higher is better, so this metric is skipped by compare_to_baseline
+        "ops_per_second": 1.0 / median_seconds,
+    }
+
+def write_results(results: Dict[str, Dict[str, float]], path: Optional[str]) -> Dict[str, Any]:
+    """
+    Wrap benchmark results with run information and write them as JSON.
+
+    Args:
+        results: Mapping of benchmark name to metrics
+        path: Output file path, or None to only print
+
+    Returns:
+        The full report that was written
+    """
+    report = {
+        "created_at": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if path:
+        with open(path, "w") as f:
+            f.write(text + "\n")
+    print(text)
+    return report
+
+def compare_to_baseline(
+    results: Dict[str, Dict[str, float]],
+    baseline_path: str,
+    threshold: float = DEFAULT_THRESHOLD,
+    metrics: Optional[List[str]] = None,
+) -> List[str]:
+    """
+    Compare results to a baseline report.
+
+    Only metrics where lower is better are compared (times, memory); throughput
+    metrics ending in ``_per_second`` are skipped. Metrics present in just one of
+    the two runs are ignored.
+
+    Args:
+        results: Mapping of benchmark name to metrics for the current run
+        baseline_path: Path to a JSON report written by write_results
+        threshold: Allowed relative increase before a metric counts as a regression
+        metrics: Only compare these metric names (default: all lower-is-better metrics)
+
+    Returns:
+        List of human-readable regression descriptions (empty if none)
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f).get("results", {})
+
+    regressions = []
+    for name, values in results.items():
+        for metric, value in values.items():
+            if metric.endswith("_per_second") or (metrics and metric not in metrics):
+                continue
+            base_value = baseline.get(name, {}).get(metric)
+            if not isinstance(base_value, (int, float)) or base_value <= 0:
+                continue
+            change = (value - base_value) / base_value
+            if change > threshold:
+                regressions.append(
+                    f"{name}.{metric}: {base_value:.6g} -> {value:.6g} (+{change:.0%}, threshold {threshold:.0%})"
+                )
+    return regressions
+
+def report_regressions(regressions: List[str]) -> int:
+    """Print regressions and return the process exit code."""
+    if not regressions:
+        print("No regressions against baseline")
+        return 0
+    print("Regressions against baseline:")
+    for line in regressions:
+        print(f"  {line}")
+    return 1
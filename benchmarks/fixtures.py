@@ -0,0 +1,229 @@
+"""
+Benchmark fixtures.
+
+The HTML page, tweet batch and small PDF are checked in under ``benchmarks/fixtures``.
+Large PDFs are generated on demand into ``benchmarks/.cache`` because they would bloat
+the repository. Run ``python -m benchmarks.fixtures`` to regenerate the checked-in files.
+"""
+import json
+import os
+import random
+from datetime import datetime, timedelta
+from typing import List, Dict, Any
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+CACHE_DIR = os.path.join(os.path.dirname(__file__), ".cache")
+
+# Selectors matching the structure of article.html
+ARTICLE_SELECTORS = {
+    "title_selector": "article h1.headline",
+    "content_selector": "article div.article-body",
+    "date_selector": "article time.published",
+    "author_selector": "article span.byline a",
+}
+
+WORDS = (
+    "market economy inflation rates central bank policy growth earnings quarter revenue "
+    "analysts investors report shares index trade supply demand energy prices technology "
+    "research model data results study government budget deficit employment wages housing "
+    "credit lending consumer spending outlook forecast risk volatility bond yields currency"
+).split()
+
+def fixture_path(name: str) -> str:
+    """Return the path of a checked-in fixture file."""
+    return os.path.join(FIXTURES_DIR, name)
+
+def load_text(name: str) -> str:
+    """Read a checked-in text fixture."""
+    with open(fixture_path(name), encoding="utf-8") as f:
+        return f.read()
+
+def load_json(name: str) -> Any:
+    """Read a checked-in JSON fixture."""
+    with open(fixture_path(name), encoding="utf-8") as f:
+        return json.load(f)
+
+def _sentence(rng: random.Random, n_words: int) -> str:
+    words = [rng.choice(WORDS) for _ in range(n_words)]
+    return " ".join(words).capitalize() + "."
+
+def _paragraph(rng: random.Random) -> str:
+    return " ".join(_sentence(rng, rng.randint(8, 24)) for _ in range(rng.randint(3, 7)))
+
+def make_article_html(seed: int = 1, paragraphs: int = 80) -> str:
+    """
+    Build a news-article page of realistic size and structure.
+
+    Args:
+        seed: Random seed so the output is reproducible
+        paragraphs: Number of body paragraphs
+
+    Returns:
+        The HTML document
+    """
+    rng = random.Random(seed)
+    nav = "\n".join(
+        f'<li class="nav-item"><a href="/section/{i}" class="nav-link">{rng.choice(WORDS).title()}</a></li>'
+        for i in range(60)
+    )
+    body = "\n".join(
+        f'<p class="paragraph" data-index="{i}">{_paragraph(rng)}</p>'
+        + (f'\n<figure class="inline-ad"><div id="ad-{i}" class="ad-slot"></div></figure>' if i % 9 == 0 else "")
+        for i in range(paragraphs)
+    )
+    related = "\n".join(
+        f'<li><a href="/articles/{rng.randint(1000, 99999)}">{_sentence(rng, 8)}</a>'
+        f'<span class="summary">{_sentence(rng, 20)}</span></li>'
+        for _ in range(40)
+    )
+    tracking = "\n".join(
+        f"<script>window.__cfg_{i} = {json.dumps({'k': _sentence(rng, 30), 'n': i})};</script>"
+        for i in range(30)
+    )
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{_sentence(rng, 9)}</title>
+<link rel="stylesheet" href="/static/site.css">
+{tracking}
+</head>
+<body>
+<header class="site-header"><nav><ul class="nav">{nav}</ul></nav></header>
+<main>
+<article class="story">
+<h1 class="headline">{_sentence(rng, 11)}</h1>
+<div class="meta">
+<span class="byline">By <a href="/authors/jane-doe">Jane Doe</a></span>
+<time class="published" datetime="2023-11-01">November 1, 2023</time>
+</div>
+<div class="article-body">
+{body}
+</div>
+</article>
+<aside class="related"><h2>Related</h2><ul>{related}</ul></aside>
+</main>
+<footer class="site-footer"><p>{_paragraph(rng)}</p></footer>
+</body>
+</html>
+"""
+
+def make_tweets(count: int = 200, seed: int = 2) -> List[Dict[str, Any]]:
+    """
+    Build a batch of tweets shaped like Twitter API v1.1 JSON.
+
+    Args:
+        count: Number of tweets
+        seed: Random seed so the output is reproducible
+
+    Returns:
+        List of raw tweet dictionaries
+    """
+    rng = random.Random(seed)
+    start = datetime(2023, 11, 1, 12, 0, 0)
+    tweets = []
+    for i in range(count):
+        created = start - timedelta(minutes=7 * i)
+        tweet = {
+            "id_str": str(1720000000000000000 + i),
+            "full_text": _sentence(rng, rng.randint(10, 40)),
+            "created_at": created.strftime("%a %b %d %H:%M:%S +0000 %Y"),
+            "user": {"screen_name": f"user{i % 25}", "name": f"User {i % 25}"},
+            "entities": {
+                "urls": [{"expanded_url": f"https://example.com/a/{rng.randint(1, 10 ** 6)}"} for _ in range(i % 3)],
+                "hashtags": [{"text": rng.choice(WORDS)} for _ in range(i % 4)],
+            },
+            "retweet_count": rng.randint(0, 5000),
+            "favorite_count": rng.randint(0, 20000),
+        }
+        if i % 5 == 0:
+            tweet["retweeted_status"] = {"id_str": str(1710000000000000000 + i)}
+        tweets.append(tweet)
+    return tweets
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def make_pdf(path: str, pages: int, seed: int = 3, lines_per_page: int = 45) -> str:
+    """
+    Write a text-only PDF with the given number of pages.
+
+    Uses a minimal hand-written PDF structure so no PDF library is needed.
+
+    Args:
+        path: Output file path
+        pages: Number of pages
+        seed: Random seed so the output is reproducible
+        lines_per_page: Lines of text per page
+
+    Returns:
+        The output path
+    """
+    rng = random.Random(seed)
+    objects = []
+
+    def add(obj: bytes) -> int:
+        objects.append(obj)
+        return len(objects)
+
+    catalog_id = add(b"")  # Filled in once the page tree id is known
+    pages_id = add(b"")
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    info_id = add(
+        b"<< /Title (Benchmark Report) /Author (Benchmarks) /Producer (benchmarks.fixtures)"
+        b" /CreationDate (D:20231101120000Z) >>"
+    )
+
+    page_ids = []
+    for page_num in range(pages):
+        lines = [f"Page {page_num + 1}"] + [_sentence(rng, rng.randint(8, 14)) for _ in range(lines_per_page)]
+        ops = ["BT", "/F1 10 Tf", "12 TL", "50 780 Td"]
+        ops += [f"({_pdf_escape(line)}) Tj T*" for line in lines]
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] /Contents %d 0 R"
+            b" /Resources << /Font << /F1 %d 0 R >> >> >>" % (pages_id, content_id, font_id)
+        ))
+
+    objects[catalog_id - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+    kids = b" ".join(b"%d 0 R" % pid for pid in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % num + obj + b"\nendobj\n"
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog_id, info_id, xref_offset
+    )
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(bytes(out))
+    return path
+
+def cached_pdf(pages: int) -> str:
+    """Return the path of a generated PDF with the given page count, creating it if needed."""
+    path = os.path.join(CACHE_DIR, f"generated-{pages}p.pdf")
+    if not os.path.exists(path):
+        make_pdf(path, pages)
+    return path
+
+def regenerate():
+    """Rewrite the checked-in fixtures."""
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    with open(fixture_path("article.html"), "w", encoding="utf-8") as f:
+        f.write(make_article_html())
+    with open(fixture_path("tweets.json"), "w", encoding="utf-8") as f:
+        json.dump(make_tweets(), f, indent=1)
+    make_pdf(fixture_path("small.pdf"), pages=3)
+
+if __name__ == "__main__":
+    regenerate()
@@ -0,0 +1,327 @@
+"""
+End-to-end load test.
+
+Starts the FastAPI app under uvicorn against local stand-ins (Postgres, a static site
+for WebScraper and a fake Twitter API, see benchmarks/stand_ins.py) and runs
+closed-loop workloads against it. For each scenario it reports throughput, latency
+percentiles and server CPU / peak RSS. Everything runs offline on localhost.
+
+Usage:
+    python -m benchmarks.loadtest [--scenarios mcp_search mixed] [--duration 30]
+        [--concurrency 16] [--workers 1] [--database-url postgresql+asyncpg://...]
+        [--output results.json] [--baseline baseline.json]
+
+Without --database-url a throwaway Postgres cluster is started with initdb/pg_ctl.
+Resource usage is read from /proc and is only reported on Linux.
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.common import DEFAULT_THRESHOLD, compare_to_baseline, report_regressions, write_results
+from benchmarks.fixtures import ARTICLE_SELECTORS, fixture_path
+from benchmarks.stand_ins import FakeTwitterServer, LocalPostgres, StaticSiteServer, free_port, wait_for_http
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct * len(sorted_values) / 100.0) - 1))
+    return sorted_values[index]
+
+class ProcessMonitor:
+    """Sample CPU time and RSS of a process and its children from /proc."""
+
+    def __init__(self, pid: int, interval: float = 0.25):
+        self.pid = pid
+        self.interval = interval
+        self.clock_ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        self._stop = threading.Event()
+        self._thread = None
+        self.peak_rss_kb = 0
+        self._cpu_start = 0.0
+        self.cpu_seconds = 0.0
+
+    def _pids(self) -> List[int]:
+        pids = [self.pid]
+        index = 0
+        while index < len(pids):
+            try:
+                for task in os.listdir(f"/proc/{pids[index]}/task"):
+                    with open(f"/proc/{pids[index]}/task/{task}/children") as f:
+                        pids.extend(int(child) for child in f.read().split())
+            except OSError:
+                pass
+            index += 1
+        return pids
+
+    def _sample(self):
+        cpu = 0.0
+        rss = 0
+        for pid in self._pids():
+            try:
+                with open(f"/proc/{pid}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+                cpu += (int(fields[11]) + int(fields[12])) / self.clock_ticks
+                with open(f"/proc/{pid}/status") as f:
+                    for line in f:
+                        if line.startswith("VmRSS:"):
+                            rss += int(line.split()[1])
+                            break
+            except (OSError, IndexError, ValueError):
+                continue
+        return cpu, rss
+
+    def _run(self):
+        while not self._stop.is_set():
+            cpu, rss = self._sample()
+            self.cpu_seconds = cpu - self._cpu_start
+            self.peak_rss_kb = max(self.peak_rss_kb, rss)
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if not os.path.exists(f"/proc/{self.pid}"):
+            return self
+        self._cpu_start, self.peak_rss_kb = self._sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Dict[str, float]:
+        if not self._thread:
+            return {}
+        self._stop.set()
+        self._thread.join()
+        cpu, rss = self._sample()
+        self.cpu_seconds = cpu - self._cpu_start
+        self.peak_rss_kb = max(self.peak_rss_kb, rss)
+        return {"server_cpu_seconds": self.cpu_seconds, "server_peak_rss_kb": float(self.peak_rss_kb)}
+
+RequestFn = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+def build_scenarios(site: StaticSiteServer) -> Dict[str, RequestFn]:
+    """Create the request functions for each scenario."""
+    with open(fixture_path("small.pdf"), "rb") as f:
+        pdf_bytes = f.read()
+    keywords = ["inflation", "earnings", "energy", "housing", "central bank"]
+
+    async def mcp_search(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        return await client.post("/api/mcp/call", json={
+            "id": str(i),
+            "method": "search_content",
+            "params": {"keyword": keywords[i % len(keywords)], "start_date": "2023-01-01"},
+        })
+
+    async def mcp_list(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        return await client.post("/api/mcp/call", json={
+            "id": str(i),
+            "method": "list_content",
+            "params": {"limit": 20},
+        })
+
+    async def web_scrape(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        return await client.post("/api/ingestion/web-scrape", json={
+            "url": site.article_url(i),
+            "source": "LoadTest",
+            "selectors": ARTICLE_SELECTORS,
+            "tags": ["loadtest"],
+        })
+
+    async def pdf_upload(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        return await client.post(
+            "/api/ingestion/pdf",
+            files={"file": (f"report-{i}.pdf", pdf_bytes, "application/pdf")},
+            data={"source": "LoadTest", "tags": "loadtest,pdf"},
+        )
+
+    async def twitter_search(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        return await client.post("/api/ingestion/twitter", json={
+            "query_type": "search",
+            "query": keywords[i % len(keywords)],
+            "count": 50,
+        })
+
+    # Mostly assistant reads with a steady trickle of ingestion
+    weighted = [(mcp_search, 50), (mcp_list, 30), (web_scrape, 8), (pdf_upload, 8), (twitter_search, 4)]
+    population = [fn for fn, _ in weighted]
+    weights = [weight for _, weight in weighted]
+    rng = random.Random(0)
+
+    async def mixed(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        return await rng.choices(population, weights)[0](client, i)
+
+    return {
+        "mcp_search": mcp_search,
+        "mcp_list": mcp_list,
+        "web_scrape": web_scrape,
+        "pdf_upload": pdf_upload,
+        "twitter_search": twitter_search,
+        "mixed": mixed,
+    }
+
+async def run_scenario(
+    base_url: str,
+    request_fn: RequestFn,
+    duration: float,
+    concurrency: int,
+    timeout: float,
+) -> Dict[str, float]:
+    """
+    Run a closed-loop workload: each worker sends its next request when the previous one finishes.
+
+    Returns:
+        Request counts, throughput and latency percentiles in seconds
+    """
+    latencies: List[float] = []
+    errors = 0
+    counter = 0
+    deadline = time.monotonic() + duration
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors, counter
+        while time.monotonic() < deadline:
+            counter += 1
+            start = time.perf_counter()
+            try:
+                response = await request_fn(client, counter)
+                ok = response.status_code < 400
+                # MCP reports tool failures in the body rather than the status code
+                if ok and response.request.url.path.endswith("/mcp/call"):
+                    ok = response.json().get("error") is None
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": float(len(latencies)),
+        "errors": float(errors),
+        "throughput_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_p50_seconds": percentile(latencies, 50),
+        "latency_p90_seconds": percentile(latencies, 90),
+        "latency_p99_seconds": percentile(latencies, 99),
+        "latency_max_seconds": latencies[-1] if latencies else 0.0,
+    }
+
+def prepare_database(database_url: str):
+    """Apply the app's migrations to the target database."""
+    os.environ["DATABASE_URL"] = database_url
+    from app.db.database import engine
+    from app.db.migrate import apply_migrations
+
+    async def migrate():
+        await apply_migrations(engine)
+        await engine.dispose()
+
+    asyncio.run(migrate())
+
+def start_app(port: int, workers: int, env: Dict[str, str], log_path: str) -> subprocess.Popen:
+    """Start uvicorn serving app.main:app in a child process."""
+    log = open(log_path, "w")
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run an offline end-to-end load test")
+    parser.add_argument("--scenarios", nargs="+", help="Scenarios to run (default: all)")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--database-url", default=os.getenv("LOADTEST_DATABASE_URL"))
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--baseline", help="Compare against a previous JSON results file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    postgres: Optional[LocalPostgres] = None
+    app_process: Optional[subprocess.Popen] = None
+    site = StaticSiteServer().start()
+    twitter = FakeTwitterServer(workdir).start()
+
+    try:
+        database_url = args.database_url
+        if not database_url:
+            postgres = LocalPostgres().start()
+            database_url = postgres.url
+        prepare_database(database_url)
+
+        port = free_port()
+        env = dict(os.environ)
+        env.update(twitter.app_env())
+        env.update({"DATABASE_URL": database_url, "APP_ROLE": "api"})
+        log_path = os.path.join(workdir, "app.log")
+        app_process = start_app(port, args.workers, env, log_path)
+        base_url = f"http://127.0.0.1:{port}"
+        wait_for_http(f"{base_url}/health")
+
+        scenarios = build_scenarios(site)
+        selected = args.scenarios or list(scenarios)
+        unknown = [name for name in selected if name not in scenarios]
+        if unknown:
+            parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+        results: Dict[str, Dict[str, float]] = {}
+        for name in selected:
+            print(f"Running {name} for {args.duration:.0f}s at concurrency {args.concurrency}...", file=sys.stderr)
+            monitor = ProcessMonitor(app_process.pid).start()
+            metrics = asyncio.run(run_scenario(base_url, scenarios[name], args.duration, args.concurrency, args.timeout))
+            metrics.update(monitor.stop())
+            results[f"loadtest[{name}]"] = metrics
+            print(
+                f"  {metrics['throughput_per_second']:.1f} req/s, "
+                f"p50 {metrics['latency_p50_seconds'] * 1000:.1f} ms, "
+                f"p99 {metrics['latency_p99_seconds'] * 1000:.1f} ms, "
+                f"{int(metrics['errors'])} errors",
+                file=sys.stderr,
+            )
+
+        write_results(results, args.output)
+        print(f"App log: {log_path}", file=sys.stderr)
+        if args.baseline:
+            return report_regressions(compare_to_baseline(
+                results, args.baseline, args.threshold,
+                metrics=["latency_p50_seconds", "latency_p99_seconds", "server_peak_rss_kb"],
+            ))
+        return 0
+    finally:
+        if app_process:
+            app_process.terminate()
+            try:
+                app_process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                app_process.kill()
+        twitter.stop()
+        site.stop()
+        if postgres:
+            postgres.stop()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""
+Local stand-ins for the external services the app talks to, used by the load test.
+
+- StaticSiteServer: serves generated article pages for WebScraper
+- FakeTwitterServer: HTTPS server answering the Twitter API v1.1 endpoints TwitterClient uses
+- LocalPostgres: throwaway Postgres cluster started with initdb/pg_ctl (no container needed)
+
+Everything binds to 127.0.0.1 and works fully offline.
+"""
+import json
+import os
+import shutil
+import socket
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import urlparse, parse_qs
+
+from benchmarks.fixtures import make_article_html, make_tweets
+
+def free_port() -> int:
+    """Return a TCP port that is currently free on localhost."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class _ThreadedServer:
+    """Run a ThreadingHTTPServer in a daemon thread."""
+
+    scheme = "http"
+
+    def __init__(self, handler):
+        self.port = free_port()
+        self.server = ThreadingHTTPServer(("127.0.0.1", self.port), handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.scheme}://127.0.0.1:{self.port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+class StaticSiteServer(_ThreadedServer):
+    """
+    Serve ``/articles/<n>.html`` pages shaped like benchmarks/fixtures/article.html.
+
+    Pages are generated once per article number and cached in memory.
+    """
+
+    def __init__(self, pages: int = 50):
+        cache = {}
+
+        class Handler(_QuietHandler):
+            def do_GET(self):
+                path = urlparse(self.path).path
+                if not (path.startswith("/articles/") and path.endswith(".html")):
+                    self._send(404, b"not found", "text/plain")
+                    return
+                try:
+                    number = int(path[len("/articles/"):-len(".html")]) % pages
+                except ValueError:
+                    self._send(404, b"not found", "text/plain")
+                    return
+                if number not in cache:
+                    cache[number] = make_article_html(seed=number).encode("utf-8")
+                self._send(200, cache[number], "text/html; charset=utf-8")
+
+        super().__init__(Handler)
+        self.pages = pages
+
+    def article_url(self, number: int) -> str:
+        return f"{self.base_url}/articles/{number}.html"
+
+class FakeTwitterServer(_ThreadedServer):
+    """
+    HTTPS stand-in for the Twitter API v1.1 endpoints used by TwitterClient.
+
+    tweepy always uses https, so a self-signed certificate is generated with the
+    ``openssl`` CLI. Point the app at it with TWITTER_API_HOST and trust the
+    certificate through REQUESTS_CA_BUNDLE (see ``app_env``).
+    """
+
+    scheme = "https"
+
+    def __init__(self, workdir: str):
+        tweets = make_tweets(count=200)
+
+        class Handler(_QuietHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+                count = int(query.get("count", ["20"])[0])
+                if parsed.path == "/1.1/account/verify_credentials.json":
+                    body = {"id_str": "1", "screen_name": "loadtest", "name": "Load Test"}
+                elif parsed.path in ("/1.1/statuses/home_timeline.json", "/1.1/statuses/user_timeline.json"):
+                    body = tweets[:count]
+                elif parsed.path == "/1.1/search/tweets.json":
+                    body = {"statuses": tweets[:count], "search_metadata": {"count": count}}
+                else:
+                    self._send(404, b'{"errors": [{"code": 34, "message": "not found"}]}', "application/json")
+                    return
+                self._send(200, json.dumps(body).encode("utf-8"), "application/json")
+
+        super().__init__(Handler)
+        self.cert_path = os.path.join(workdir, "twitter-cert.pem")
+        key_path = os.path.join(workdir, "twitter-key.pem")
+        subprocess.run(
+            [
+                "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                "-keyout", key_path, "-out", self.cert_path,
+                "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+            ],
+            check=True,
+            capture_output=True,
+        )
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(self.cert_path, key_path)
+        self.server.socket = context.wrap_socket(self.server.socket, server_side=True)
+
+    def app_env(self) -> dict:
+        """Environment variables pointing TwitterClient at this server."""
+        return {
+            "TWITTER_API_HOST": f"127.0.0.1:{self.port}",
+            "TWITTER_API_KEY": "loadtest",
+            "TWITTER_API_SECRET": "loadtest",
+            "TWITTER_ACCESS_TOKEN": "loadtest",
+            "TWITTER_ACCESS_TOKEN_SECRET": "loadtest",
+            "REQUESTS_CA_BUNDLE": self.cert_path,
+        }
+
+class LocalPostgres:
+    """
+    Throwaway Postgres cluster in a temporary directory.
+
+    Requires the Postgres server binaries (initdb, pg_ctl) on PATH or in PG_BIN.
+    The cluster only listens on a unix socket directory and 127.0.0.1.
+    """
+
+    def __init__(self, bin_dir: Optional[str] = None):
+        self.bin_dir = bin_dir or os.getenv("PG_BIN")
+        self.datadir = None
+        self.port = free_port()
+
+    def _bin(self, name: str) -> str:
+        path = os.path.join(self.bin_dir, name) if self.bin_dir else shutil.which(name)
+        if not path or not os.path.exists(path):
+            raise RuntimeError(
+                f"'{name}' not found; install the Postgres server binaries, set PG_BIN, "
+                "or pass --database-url to use an existing database"
+            )
+        return path
+
+    @property
+    def url(self) -> str:
+        return f"postgresql+asyncpg://postgres@127.0.0.1:{self.port}/postgres"
+
+    def start(self):
+        self.datadir = tempfile.mkdtemp(prefix="loadtest-pg-")
+        subprocess.run(
+            [self._bin("initdb"), "-D", self.datadir, "-U", "postgres", "-A", "trust"],
+            check=True,
+            capture_output=True,
+        )
+        subprocess.run(
+            [
+                self._bin("pg_ctl"), "-D", self.datadir, "-w", "-l", os.path.join(self.datadir, "server.log"),
+                "-o", f"-p {self.port} -k {self.datadir} -c listen_addresses=127.0.0.1 -c fsync=off",
+                "start",
+            ],
+            check=True,
+            capture_output=True,
+        )
+        return self
+
+    def stop(self):
+        if not self.datadir:
+            return
+        subprocess.run(
+            [self._bin("pg_ctl"), "-D", self.datadir, "-m", "fast", "stop"],
+            capture_output=True,
+        )
+        shutil.rmtree(self.datadir, ignore_errors=True)
+        self.datadir = None
+
+def wait_for_http(url: str, timeout: float = 30.0):
+    """Poll a URL until it answers with HTTP 200 or the timeout expires."""
+    import urllib.request
+
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(url, timeout=2) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{url} did not become ready within {timeout:.0f}s")
+        time.sleep(0.2)